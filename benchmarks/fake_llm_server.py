@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""Groq-compatible chat completions server with synthetic responses.
+
+Answers every prompt the pipeline sends with schema-valid JSON (or prose
+for story, section and summary prompts) after a configurable latency, so
+the full pipeline can be load-tested without an API key or rate limits::
+
+    python -m benchmarks.fake_llm_server --port 8765 --median-ms 800
+    GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=fake python run.py ...
+    LLM_BACKEND=openai LLM_BASE_URL=http://127.0.0.1:8765/v1 python run.py ...
+"""
+import argparse
+import copy
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, '.')
+
+from prompts import templates
+from pipeline.consistency_check import FIX_PROMPT
+
+
+JSON_MARKER = "Respond in the following JSON format ONLY (no markdown, no explanation):"
+CHAT_PATHS = ("/openai/v1/chat/completions", "/v1/chat/completions")
+LIST_ITEMS = 3
+CHARS_PER_TOKEN = 4
+
+PROSE_TEMPLATES = {"STORY_GENERATION_PROMPT", "STORY_SECTION_PROMPT", "SOURCE_CHUNK_SUMMARY_PROMPT"}
+CONSISTENCY_TEMPLATES = {"CONSISTENCY_CHECK_PROMPT", "CONSISTENCY_RECHECK_PROMPT"}
+ISSUE_FIELDS = ("lost_themes", "logical_issues", "world_rule_violations", "copied_elements", "concerns")
+
+_WORDS = (
+    "the city hums beneath a violet sky while old loyalties fray and new ones form "
+    "she weighs the cost of every promise he keeps a secret that could end them both "
+    "rain gathers on the glass towers as the council decides who will be remembered"
+).split()
+
+
+def _prompt_prefix(template: str) -> str:
+    return template.split("\n", 1)[0].split("{", 1)[0]
+
+
+PROMPT_PREFIXES = {
+    name: _prompt_prefix(value)
+    for name, value in vars(templates).items()
+    if name.endswith("_PROMPT") and isinstance(value, str)
+}
+PROMPT_PREFIXES["FIX_PROMPT"] = _prompt_prefix(FIX_PROMPT)
+
+
+def identify_template(prompt: str):
+    """Name of the prompt template ``prompt`` was rendered from, or None."""
+    matches = [name for name, prefix in PROMPT_PREFIXES.items() if prefix and prompt.startswith(prefix)]
+    # Several templates share an opening sentence prefix; the longest one wins
+    return max(matches, key=lambda name: len(PROMPT_PREFIXES[name]), default=None)
+
+
+def _json_example(prompt: str):
+    if JSON_MARKER not in prompt:
+        return None
+    example = prompt.split(JSON_MARKER, 1)[1]
+    example = re.sub(r'"score":\s*1-10', '"score": 8', example)
+    try:
+        return json.loads(example)
+    except ValueError:
+        return None
+
+
+def _expand(value):
+    """Fill an example JSON document: lists get LIST_ITEMS numbered items."""
+    if isinstance(value, dict):
+        return {key: _expand(item) for key, item in value.items()}
+    if isinstance(value, list):
+        if not value:
+            return []
+        return [_number(_expand(value[i % len(value)]), i + 1) for i in range(LIST_ITEMS)]
+    return value
+
+
+def _number(value, n: int):
+    if isinstance(value, str):
+        return f"{value} {n}"
+    if isinstance(value, dict):
+        return {key: _number(item, n) for key, item in value.items()}
+    return value
+
+
+def _names(section: str) -> list:
+    return re.findall(r'(?:^|[{,\s"])name"?\s*[:=]\s*"?([^",}\n]+)', section)
+
+
+def _section(prompt: str, start: str, end: str) -> str:
+    text = prompt.split(start, 1)[-1]
+    return text.split(end, 1)[0] if end in text else text
+
+
+class ResponseSynthesizer:
+    """Builds a plausible response for each pipeline prompt."""
+
+    def __init__(self, rng: random.Random, fix_rate: float = 0.0, prose_words: int = 600, summary_words: int = 150):
+        self.rng = rng
+        self.fix_rate = fix_rate
+        self.prose_words = prose_words
+        self.summary_words = summary_words
+
+    def prose(self, words: int) -> str:
+        paragraphs = []
+        remaining = words
+        while remaining > 0:
+            size = min(remaining, self.rng.randint(40, 90))
+            text = " ".join(self.rng.choice(_WORDS) for _ in range(size))
+            paragraphs.append(text[0].upper() + text[1:] + ".")
+            remaining -= size
+        return "\n\n".join(paragraphs)
+
+    def respond(self, template: str, prompt: str, json_mode: bool) -> str:
+        if template in PROSE_TEMPLATES or (template is None and not json_mode):
+            words = self.summary_words if template == "SOURCE_CHUNK_SUMMARY_PROMPT" else self.prose_words
+            return self.prose(words)
+        if template == "FIX_PROMPT":
+            return json.dumps({"patches": [
+                {"op": "replace", "path": "plot.reconstructed_plot.climax.stakes", "value": "The stakes, made explicit"}
+            ]})
+
+        example = _json_example(prompt)
+        if example is None:
+            return "{}"
+        data = _expand(example)
+
+        if template in CONSISTENCY_TEMPLATES:
+            self._passing_review(data, allow_fixes=template == "CONSISTENCY_CHECK_PROMPT")
+        elif template == "CHARACTER_SINGLE_TRANSFORM_PROMPT":
+            names = _names(_section(prompt, "ORIGINAL CHARACTER:", "FULL ORIGINAL CAST"))
+            data["original_name"] = names[0] if names else "Unknown"
+        elif template == "CHARACTER_TRANSFORM_PROMPT":
+            names = _names(_section(prompt, "ORIGINAL CHARACTERS:", "TARGET WORLD:"))
+            template_character = example["transformed_characters"][0]
+            data["transformed_characters"] = [
+                dict(_number(copy.deepcopy(template_character), i + 1), original_name=name)
+                for i, name in enumerate(names or ["Protagonist", "Antagonist"])
+            ]
+        elif template == "SOURCE_ABSTRACTION_PROMPT":
+            data["central_conflict"]["type"] = "Both"
+        return json.dumps(data)
+
+    def _passing_review(self, data: dict, allow_fixes: bool):
+        for category in data.values():
+            if isinstance(category, dict):
+                for field in ISSUE_FIELDS:
+                    if field in category:
+                        category[field] = []
+        if allow_fixes and self.rng.random() < self.fix_rate:
+            data["required_fixes"] = ["The climax stakes are unclear"]
+            data["internal_consistency"]["logical_issues"] = ["The climax stakes are unclear"]
+        else:
+            data["required_fixes"] = []
+
+
+class LatencyModel:
+    """Lognormal time to first token plus a per-token generation rate."""
+
+    def __init__(self, rng: random.Random, median_ms: float = 300, sigma: float = 0.5,
+                 tokens_per_sec: float = 0, stall_rate: float = 0.0, stall_ms: float = 5000):
+        self.rng = rng
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.tokens_per_sec = tokens_per_sec
+        self.stall_rate = stall_rate
+        self.stall_ms = stall_ms
+
+    def first_token_s(self) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        delay = self.rng.lognormvariate(math.log(self.median_ms), self.sigma) / 1000
+        if self.stall_rate and self.rng.random() < self.stall_rate:
+            delay += self.stall_ms / 1000
+        return delay
+
+    def per_token_s(self) -> float:
+        return 1 / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0
+
+
+def count_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+class FakeLLMServer:
+    """Threaded HTTP server speaking the OpenAI/Groq chat completions API.
+
+    ``error_rate`` of requests fail with 503 and ``rate_limit_rate`` with 429
+    and a Retry-After of ``retry_after_s``. Requests per template are counted
+    in ``stats``. Use as a context manager or call ``start``/``stop``.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, seed: int = None,
+                 median_ms: float = 300, sigma: float = 0.5, tokens_per_sec: float = 0,
+                 stall_rate: float = 0.0, stall_ms: float = 5000, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after_s: float = 1.0, fix_rate: float = 0.0,
+                 prose_words: int = 600):
+        self.rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.latency = LatencyModel(self.rng, median_ms, sigma, tokens_per_sec, stall_rate, stall_ms)
+        self.synthesizer = ResponseSynthesizer(self.rng, fix_rate, prose_words)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after_s = retry_after_s
+        self.stats = {"requests": 0, "errors": 0, "rate_limited": 0, "templates": {}}
+        self._stats_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeLLMServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-llm-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def _count(self, key: str, template: str = None):
+        with self._stats_lock:
+            self.stats[key] += 1
+            if template is not None:
+                templates_seen = self.stats["templates"]
+                templates_seen[template] = templates_seen.get(template, 0) + 1
+
+    def plan(self, request: dict) -> dict:
+        """Decide the outcome of one request: an injected error or a response and its timing."""
+        messages = request.get("messages") or []
+        prompt = next((str(m.get("content", "")) for m in reversed(messages) if m.get("role") == "user"), "")
+        template = identify_template(prompt)
+        self._count("requests", template or "unknown")
+
+        with self._rng_lock:
+            roll = self.rng.random()
+            if roll < self.rate_limit_rate:
+                self._count("rate_limited")
+                return {"status": 429, "delay_s": 0.0}
+            if roll < self.rate_limit_rate + self.error_rate:
+                self._count("errors")
+                return {"status": 503, "delay_s": self.latency.first_token_s()}
+            json_mode = (request.get("response_format") or {}).get("type") == "json_object"
+            content = self.synthesizer.respond(template, prompt, json_mode)
+            delay_s = self.latency.first_token_s()
+
+        prompt_tokens = sum(count_tokens(str(m.get("content", ""))) for m in messages)
+        completion_tokens = count_tokens(content)
+        return {
+            "status": 200,
+            "content": content,
+            "delay_s": delay_s,
+            "per_token_s": self.latency.per_token_s(),
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+
+def _completion(request: dict, plan: dict) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "fake"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": plan["content"]},
+            "finish_reason": "stop"
+        }],
+        "usage": plan["usage"]
+    }
+
+
+def _chunk(request: dict, completion_id: str, delta: dict, finish_reason=None, usage=None, groq: bool = True) -> dict:
+    chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": request.get("model", "fake"),
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+    }
+    if usage is not None and groq:
+        # Groq reports streaming usage under x_groq
+        chunk["x_groq"] = {"id": completion_id, "usage": usage}
+    elif usage is not None:
+        # OpenAI-compatible servers send it on the last chunk when stream_options asks for it
+        chunk["usage"] = usage
+    return chunk
+
+
+def _handler_for(server: FakeLLMServer):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, body: dict, headers: dict = None):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok"})
+            elif self.path == "/stats":
+                with server._stats_lock:
+                    self._send_json(200, copy.deepcopy(server.stats))
+            else:
+                self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+        def do_POST(self):
+            if self.path not in CHAT_PATHS:
+                self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+                return
+
+            plan = server.plan(request)
+            time.sleep(plan["delay_s"])
+            if plan["status"] == 429:
+                self._send_json(429, {
+                    "error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}
+                }, headers={"retry-after": f"{server.retry_after_s:g}"})
+            elif plan["status"] != 200:
+                self._send_json(plan["status"], {
+                    "error": {"message": "Service unavailable", "type": "internal_server_error"}
+                })
+            elif request.get("stream"):
+                self._stream(request, plan)
+            else:
+                time.sleep(plan["per_token_s"] * plan["usage"]["completion_tokens"])
+                self._send_json(200, _completion(request, plan))
+
+        def _stream(self, request: dict, plan: dict):
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            def send(data):
+                self.wfile.write(f"data: {json.dumps(data) if isinstance(data, dict) else data}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            content = plan["content"]
+            send(_chunk(request, completion_id, {"role": "assistant", "content": ""}))
+            step = CHARS_PER_TOKEN
+            for i in range(0, len(content), step):
+                if plan["per_token_s"]:
+                    time.sleep(plan["per_token_s"])
+                send(_chunk(request, completion_id, {"content": content[i:i + step]}))
+            include_usage = self.path.startswith("/openai/") or (request.get("stream_options") or {}).get("include_usage")
+            send(_chunk(
+                request, completion_id, {}, finish_reason="stop",
+                usage=plan["usage"] if include_usage else None, groq=self.path.startswith("/openai/")
+            ))
+            send("[DONE]")
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Groq-compatible LLM server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=None, help="Seed for deterministic latencies and content")
+    parser.add_argument("--median-ms", type=float, default=300, help="Median time to first token")
+    parser.add_argument("--sigma", type=float, default=0.5, help="Lognormal spread of the time to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=0, help="Generation speed (0 = instant)")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Fraction of requests that stall")
+    parser.add_argument("--stall-ms", type=float, default=5000, help="Extra delay of a stalled request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests failing with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--fix-rate", type=float, default=0.0, help="Fraction of consistency checks requiring a fix")
+    args = parser.parse_args()
+
+    server = FakeLLMServer(
+        host=args.host, port=args.port, seed=args.seed, median_ms=args.median_ms, sigma=args.sigma,
+        tokens_per_sec=args.tokens_per_sec, stall_rate=args.stall_rate, stall_ms=args.stall_ms,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, retry_after_s=args.retry_after,
+        fix_rate=args.fix_rate
+    )
+    print(f"Fake LLM server listening on {server.base_url} (set GROQ_BASE_URL to this)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
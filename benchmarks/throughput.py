@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Pipeline throughput at increasing batch concurrency.
+
+Runs the same job ``--runs`` times per concurrency level against the fake
+LLM server (started in-process unless ``--base-url`` points elsewhere) and
+reports runs/minute, run latency percentiles, errors and the mean wall time
+of each stage::
+
+    python -m benchmarks.throughput --concurrency 1,2,4,8 --runs 8 --median-ms 800
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, '.')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure pipeline throughput against a fake LLM backend")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Comma-separated batch concurrency levels")
+    parser.add_argument("--runs", type=int, default=8, help="Pipeline runs per concurrency level")
+    parser.add_argument("--source", default="Hamlet")
+    parser.add_argument("--target", default="Cyberpunk megacity, 2077")
+    parser.add_argument("--story-mode", default=None, help="Override STORY_MODE for every run")
+    parser.add_argument("--character-mode", default=None, help="Override CHARACTER_MODE for every run")
+    parser.add_argument("--base-url", default=None, help="Use an already running server instead of starting one")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--median-ms", type=float, default=300, help="Fake server median time to first token")
+    parser.add_argument("--sigma", type=float, default=0.5)
+    parser.add_argument("--tokens-per-sec", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--fix-rate", type=float, default=0.0)
+    parser.add_argument("--output", default=None, help="Directory for run outputs (default: a temp dir)")
+    parser.add_argument("--json", dest="json_path", default=None, help="Also write the report as JSON")
+    return parser.parse_args()
+
+
+def _percentile(values: list, pct: float):
+    from pipeline.hedging import percentile
+    return round(percentile(values, pct), 3) if values else None
+
+
+def _stage_breakdown(results: list) -> dict:
+    totals = {}
+    for summary in results:
+        try:
+            with open(os.path.join(summary['output_dir'], "metrics.json"), 'r', encoding='utf-8') as f:
+                stages = json.load(f)['stages']
+        except (OSError, ValueError, KeyError):
+            continue
+        for stage, stats in stages.items():
+            totals.setdefault(stage, []).append(stats['wall_time_s'])
+    return {stage: round(sum(times) / len(times), 3) for stage, times in totals.items()}
+
+
+def run_level(concurrency: int, args, output_root: str) -> dict:
+    from pipeline.batch import run_batch
+
+    jobs = []
+    for i in range(args.runs):
+        job = {"id": f"c{concurrency}_{i:03d}", "source": args.source, "target": args.target}
+        if args.story_mode:
+            job['story_mode'] = args.story_mode
+        if args.character_mode:
+            job['character_mode'] = args.character_mode
+        jobs.append(job)
+
+    start = time.perf_counter()
+    results = run_batch(
+        jobs,
+        output_root=os.path.join(output_root, f"concurrency_{concurrency}"),
+        concurrency=concurrency,
+        use_cache=False
+    )
+    elapsed = time.perf_counter() - start
+
+    latencies = [r['wall_time_s'] for r in results if r['status'] == "ok"]
+    return {
+        "concurrency": concurrency,
+        "runs": len(results),
+        "errors": sum(1 for r in results if r['status'] != "ok"),
+        "elapsed_s": round(elapsed, 3),
+        "runs_per_min": round(len(latencies) * 60 / elapsed, 2) if elapsed else None,
+        "p50_s": _percentile(latencies, 50),
+        "p99_s": _percentile(latencies, 99),
+        "llm_calls": sum(r['usage']['llm_calls'] for r in results),
+        "retries": sum(r['usage'].get('retries', 0) for r in results),
+        "stages": _stage_breakdown(results)
+    }
+
+
+def print_report(report: list, console):
+    from rich.table import Table
+
+    table = Table(title="Pipeline throughput")
+    for column in ("concurrency", "runs", "errors", "runs/min", "p50 (s)", "p99 (s)", "LLM calls", "retries"):
+        table.add_column(column, justify="right")
+    for level in report:
+        table.add_row(*(str(level[key]) for key in (
+            "concurrency", "runs", "errors", "runs_per_min", "p50_s", "p99_s", "llm_calls", "retries"
+        )))
+    console.print(table)
+
+    stages = list(dict.fromkeys(stage for level in report for stage in level['stages']))
+    breakdown = Table(title="Mean stage wall time (s)")
+    breakdown.add_column("stage")
+    for level in report:
+        breakdown.add_column(f"c={level['concurrency']}", justify="right")
+    for stage in stages:
+        breakdown.add_row(stage, *(str(level['stages'].get(stage, "-")) for level in report))
+    console.print(breakdown)
+
+
+def main():
+    args = parse_args()
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    output_root = args.output or tempfile.mkdtemp(prefix="throughput_")
+
+    # config.py reads the environment at import time, so isolate the cache,
+    # rate limiter and latency history before the pipeline is imported
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    os.environ.setdefault("LLM_CACHE_DIR", os.path.join(output_root, "cache"))
+    os.environ.setdefault("LLM_RATE_LIMIT_RPM", "0")
+    os.environ.setdefault("LLM_RATE_LIMIT_TPM", "0")
+
+    from rich.console import Console
+    from benchmarks.fake_llm_server import FakeLLMServer
+
+    console = Console()
+    server = None
+    if args.base_url:
+        os.environ["GROQ_BASE_URL"] = args.base_url
+    else:
+        server = FakeLLMServer(
+            seed=args.seed, median_ms=args.median_ms, sigma=args.sigma, tokens_per_sec=args.tokens_per_sec,
+            error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, fix_rate=args.fix_rate
+        ).start()
+        os.environ["GROQ_BASE_URL"] = server.base_url
+
+    console.print(f"[cyan]Backend: {os.environ['GROQ_BASE_URL']}  outputs: {output_root}[/cyan]")
+    report = []
+    try:
+        for concurrency in levels:
+            console.print(f"[dim]Running {args.runs} run(s) at concurrency {concurrency}...[/dim]")
+            report.append(run_level(concurrency, args, output_root))
+    finally:
+        if server is not None:
+            server.stop()
+
+    print_report(report, console)
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        console.print(f"[green]✓ Report written to {args.json_path}[/green]")
+
+
+if __name__ == "__main__":
+    main()
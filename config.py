@@ -5,12 +5,123 @@ load_dotenv()
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 
-MODEL_NAME = "llama-3.3-70b-versatile"
+# LLM backend: "groq" (the Groq API, or a Groq-compatible LLM_BASE_URL) or
+# "openai" for any OpenAI-compatible server at LLM_BASE_URL, e.g. a local
+# vLLM or llama.cpp server at http://localhost:8000/v1. LLM_API_KEY defaults
+# to GROQ_API_KEY for "groq" and is optional for "openai".
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "")
+LLM_API_KEY = os.getenv("LLM_API_KEY", "")
+
+MODEL_NAME = os.getenv("MODEL_NAME", "llama-3.3-70b-versatile")
 TEMPERATURE = 0.7
 MAX_OUTPUT_TOKENS = 8192
 
+# How artifacts are embedded in prompts: "compact" JSON, dense "lines", or
+# the original indented "pretty" JSON
+PROMPT_FORMAT = os.getenv("PROMPT_FORMAT", "compact")
+
+# Stage 1 map-reduce for long --source-file inputs: files larger than
+# SOURCE_MAPREDUCE_MIN_BYTES are streamed in chunks of about SOURCE_CHUNK_CHARS,
+# summarized SOURCE_CHUNK_CONCURRENCY at a time, and the summaries reduced into
+# one abstraction (condensed first once they exceed SOURCE_REDUCE_MAX_CHARS)
+SOURCE_MAPREDUCE_MIN_BYTES = int(os.getenv("SOURCE_MAPREDUCE_MIN_BYTES", "40000"))
+SOURCE_CHUNK_CHARS = int(os.getenv("SOURCE_CHUNK_CHARS", "24000"))
+SOURCE_CHUNK_CONCURRENCY = int(os.getenv("SOURCE_CHUNK_CONCURRENCY", "4"))
+SOURCE_SUMMARY_MAX_TOKENS = int(os.getenv("SOURCE_SUMMARY_MAX_TOKENS", "700"))
+SOURCE_REDUCE_MAX_CHARS = int(os.getenv("SOURCE_REDUCE_MAX_CHARS", "40000"))
+
+# Stage 3 character transformation: "single" (whole cast in one call) or
+# "fanout" (one concurrent call per character, then a group-dynamics call)
+CHARACTER_MODE = os.getenv("CHARACTER_MODE", "single")
+CHARACTER_FANOUT_RETRIES = int(os.getenv("CHARACTER_FANOUT_RETRIES", "2"))
+
+# Stage 5: after apply_fixes, re-score only the affected categories using
+# only the changed sections (set to 0 to re-run the full consistency check)
+CONSISTENCY_INCREMENTAL_RECHECK = os.getenv("CONSISTENCY_INCREMENTAL_RECHECK", "1") != "0"
+
+# Stage 6 story generation: "single" (one blocking call), "stream", or
+# "sections" (one concurrent call per plot section, stitched together)
+STORY_MODE = os.getenv("STORY_MODE", "single")
+STORY_SECTION_MAX_TOKENS = int(os.getenv("STORY_SECTION_MAX_TOKENS", "2048"))
+
+# Shared HTTP connection pool for LLM clients
+HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "120"))
+
+# Client-side rate limit per model, shared by all workers on this host
+# (defaults match the Groq free tier, and are off for the openai backend;
+# set both to 0 to disable)
+RATE_LIMIT_RPM = float(os.getenv("LLM_RATE_LIMIT_RPM", "30" if LLM_BACKEND == "groq" else "0"))
+RATE_LIMIT_TPM = float(os.getenv("LLM_RATE_LIMIT_TPM", "12000" if LLM_BACKEND == "groq" else "0"))
+# Completion tokens budgeted for calls that do not set max_tokens
+RATE_LIMIT_COMPLETION_TOKENS = int(os.getenv("LLM_RATE_LIMIT_COMPLETION_TOKENS", "1024"))
+# Longest a paced caller sleeps before re-checking the budget (refunds can shorten its wait)
+RATE_LIMIT_POLL_INTERVAL = float(os.getenv("LLM_RATE_LIMIT_POLL_INTERVAL", "1.0"))
+
+# Retry policy for LLM calls: decorrelated-jitter backoff between
+# RETRY_BASE_DELAY and RETRY_MAX_DELAY seconds. A Retry-After longer than
+# RETRY_MAX_DELAY is not waited out.
+RETRY_MAX_RETRIES = int(os.getenv("LLM_RETRY_MAX_RETRIES", "3"))
+RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "60"))
+# Consecutive transport/server failures that open the circuit breaker, and
+# how long it stays open before a single probe call is let through
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("LLM_CIRCUIT_RESET_TIMEOUT", "30"))
+
+# Hedged requests (async JSON calls only): if a call has not returned by
+# the HEDGE_PERCENTILE of its stage's recent latencies, send one duplicate and
+# keep whichever finishes first. Hedges are capped at HEDGE_MAX_RATIO of calls.
+HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+HEDGE_HISTORY_SIZE = int(os.getenv("LLM_HEDGE_HISTORY_SIZE", "200"))
+HEDGE_MAX_RATIO = float(os.getenv("LLM_HEDGE_MAX_RATIO", "0.1"))
+
+# Per-stage run metrics are written to <output>/metrics.json; set a path to
+# also export them as a Prometheus textfile (node exporter textfile collector)
+METRICS_PROMETHEUS_TEXTFILE = os.getenv("METRICS_PROMETHEUS_TEXTFILE", "")
+
+# Span tracing: append Chrome trace events (one JSON object per line) to
+# this file; empty disables tracing
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+
+# Record/replay LLM traffic: LLM_CASSETTE_MODE "record" appends every
+# request/response pair to the LLM_CASSETTE file (gzip if it ends in .gz);
+# "replay" answers from it offline, after the "recorded" latency or "zero".
+# The response and stage caches are bypassed while a cassette is active;
+# client-side rate limiting still paces recording and is skipped on replay.
+CASSETTE_PATH = os.getenv("LLM_CASSETTE", "")
+CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off")
+CASSETTE_LATENCY = os.getenv("LLM_CASSETTE_LATENCY", "recorded")
+
+# Batch mode
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+# Output rendering
+RENDER_THREAD_WORKERS = int(os.getenv("RENDER_THREAD_WORKERS", "4"))
+RENDER_PROCESS_WORKERS = int(os.getenv("RENDER_PROCESS_WORKERS", "2"))
+
+# On-disk LLM response cache
+CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".cache")
+CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+# Bundled source material library
+SOURCE_LIBRARY_PATH = os.getenv("SOURCE_LIBRARY_PATH", "data/source_materials.json")
+
+# Prebuilt Stage 1 abstractions for the bundled sources (run.py warm-cache)
+ABSTRACTION_INDEX_PATH = os.getenv("ABSTRACTION_INDEX_PATH", os.path.join(CACHE_DIR, "abstraction_index.json"))
+
 def validate_config():
-    if not GROQ_API_KEY:
+    if LLM_BACKEND == "openai":
+        if not LLM_BASE_URL:
+            raise ValueError("LLM_BACKEND=openai needs LLM_BASE_URL, e.g. http://localhost:8000/v1")
+        return True
+    if not (GROQ_API_KEY or LLM_API_KEY):
         raise ValueError(
             "GROQ_API_KEY not set. Get your FREE API key at:\n"
             "  https://console.groq.com/keys\n\n"
@@ -0,0 +1,127 @@
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+
+from groq import Groq, AsyncGroq, Stream, AsyncStream
+from groq.types.chat import ChatCompletion, ChatCompletionChunk
+
+from config import GROQ_API_KEY, HTTP_TIMEOUT, LLM_BACKEND, LLM_BASE_URL, LLM_API_KEY
+
+
+class LLMBackend(ABC):
+    """Builds the chat clients ``make_llm_call`` and the streaming helpers talk to.
+
+    A client only has to provide ``chat.completions.create(**kwargs)`` that
+    returns an OpenAI-shaped completion, or a stream of chunks when called
+    with ``stream=True`` (awaitable for async clients), and ``close()``.
+    """
+
+    name = None
+
+    def __init__(self, base_url: str = None, api_key: str = None):
+        self.base_url = base_url or None
+        self.api_key = api_key or None
+
+    @abstractmethod
+    def client(self, api_key: str, http_client):
+        """Return a sync client that sends requests through ``http_client``."""
+
+    @abstractmethod
+    def async_client(self, api_key: str, http_client):
+        """Return an async client that sends requests through ``http_client``."""
+
+
+class GroqBackend(LLMBackend):
+    """The Groq API (or a Groq-compatible server at ``base_url``/``GROQ_BASE_URL``)."""
+
+    name = "groq"
+
+    def __init__(self, base_url: str = None, api_key: str = None):
+        super().__init__(base_url, api_key or GROQ_API_KEY)
+
+    def client(self, api_key: str, http_client) -> Groq:
+        return Groq(api_key=api_key, base_url=self.base_url, timeout=HTTP_TIMEOUT, max_retries=0,
+                    http_client=http_client)
+
+    def async_client(self, api_key: str, http_client) -> AsyncGroq:
+        return AsyncGroq(api_key=api_key, base_url=self.base_url, timeout=HTTP_TIMEOUT, max_retries=0,
+                         http_client=http_client)
+
+
+class _OpenAICompletions:
+
+    PATH = "chat/completions"
+
+    def __init__(self, client):
+        self._client = client
+
+    def _post(self, params: dict):
+        stream = bool(params.get('stream'))
+        if stream:
+            # OpenAI-compatible servers only report streaming usage when asked
+            params = dict(params, stream_options=params.get('stream_options') or {"include_usage": True})
+        return self._client.post(
+            self.PATH,
+            body=params,
+            cast_to=ChatCompletion,
+            stream=stream,
+            stream_cls=(AsyncStream if isinstance(self._client, AsyncGroq) else Stream)[ChatCompletionChunk]
+        )
+
+    def create(self, **params):
+        return self._post(params)
+
+
+class _AsyncOpenAICompletions(_OpenAICompletions):
+
+    async def create(self, **params):
+        return await self._post(params)
+
+
+class _OpenAIClient:
+
+    def __init__(self, client, completions_cls):
+        self._client = client
+        self.chat = SimpleNamespace(completions=completions_cls(client))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Any server implementing ``POST {base_url}/chat/completions`` (vLLM, llama.cpp, TGI, LiteLLM, ...).
+
+    The Groq SDK's transport is reused with the OpenAI path layout, so
+    connection pooling, SSE parsing and the error types the retry policy
+    classifies behave exactly as they do for Groq.
+    """
+
+    name = "openai"
+
+    def __init__(self, base_url: str = None, api_key: str = None):
+        if not base_url:
+            raise ValueError("The openai backend needs LLM_BASE_URL, e.g. http://localhost:8000/v1")
+        # Local servers often need no key, but an empty bearer token is not a valid header
+        super().__init__(base_url, api_key or "none")
+
+    def client(self, api_key: str, http_client) -> _OpenAIClient:
+        client = Groq(api_key=api_key, base_url=self.base_url, timeout=HTTP_TIMEOUT, max_retries=0,
+                      http_client=http_client)
+        return _OpenAIClient(client, _OpenAICompletions)
+
+    def async_client(self, api_key: str, http_client) -> _OpenAIClient:
+        client = AsyncGroq(api_key=api_key, base_url=self.base_url, timeout=HTTP_TIMEOUT, max_retries=0,
+                           http_client=http_client)
+        return _OpenAIClient(client, _AsyncOpenAICompletions)
+
+
+BACKENDS = {
+    GroqBackend.name: GroqBackend,
+    OpenAICompatibleBackend.name: OpenAICompatibleBackend
+}
+
+
+def create_backend(name: str = LLM_BACKEND, base_url: str = LLM_BASE_URL, api_key: str = LLM_API_KEY) -> LLMBackend:
+    backend_cls = BACKENDS.get(name)
+    if backend_cls is None:
+        raise ValueError(f"Unknown LLM backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return backend_cls(base_url, api_key)
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+import re
+import time
+from rich.console import Console
+
+from config import BATCH_CONCURRENCY, STORY_MODE, CHARACTER_MODE
+from pipeline.orchestrator import NarrativeTransformer
+from pipeline.clients import close_async_clients
+from pipeline.library import get_source_library, SourceNotFoundError
+
+
+def load_jobs(jobs_path: str) -> list:
+    jobs = []
+    seen_ids = set()
+    with open(jobs_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            job = json.loads(line)
+            if not job.get('target') or not (job.get('source') or job.get('source_file')):
+                raise ValueError(f"{jobs_path}:{line_no}: each job needs 'target' and either 'source' or 'source_file'")
+
+            if job.get('source') and not job.get('source_file'):
+                try:
+                    get_source_library().find(job['source'])
+                except SourceNotFoundError as e:
+                    raise ValueError(f"{jobs_path}:{line_no}: {e}") from None
+
+            if job.get('story_mode', STORY_MODE) not in NarrativeTransformer.STORY_MODES:
+                raise ValueError(f"{jobs_path}:{line_no}: unknown story_mode '{job['story_mode']}'")
+            if job.get('character_mode', CHARACTER_MODE) not in NarrativeTransformer.CHARACTER_MODES:
+                raise ValueError(f"{jobs_path}:{line_no}: unknown character_mode '{job['character_mode']}'")
+
+            job.setdefault('id', f"job_{line_no:04d}")
+            if job['id'] in seen_ids:
+                raise ValueError(f"{jobs_path}:{line_no}: duplicate job id '{job['id']}'")
+            seen_ids.add(job['id'])
+            jobs.append(job)
+    return jobs
+
+
+def _job_output_dir(output_root: str, job: dict) -> str:
+    if job.get('output'):
+        return job['output']
+    safe_id = re.sub(r'[^A-Za-z0-9._-]+', '_', str(job['id']))
+    return os.path.join(output_root, safe_id)
+
+
+async def _run_job(job: dict, output_root: str, use_cache: bool) -> dict:
+    output_dir = _job_output_dir(output_root, job)
+    os.makedirs(output_dir, exist_ok=True)
+
+    source = job.get('source')
+    summary = {
+        "id": job['id'],
+        "source": job.get('source_file') or source,
+        "target": job['target'],
+        "output_dir": output_dir
+    }
+
+    start = time.perf_counter()
+    with open(os.path.join(output_dir, "run.log"), 'w', encoding='utf-8') as log:
+        transformer = NarrativeTransformer(
+            output_dir=output_dir,
+            use_cache=use_cache,
+            console=Console(file=log, width=120),
+            story_mode=job.get('story_mode', STORY_MODE),
+            character_mode=job.get('character_mode', CHARACTER_MODE)
+        )
+        try:
+            if job.get('source_file'):
+                source = job['source_file']
+
+            result = await transformer.run_pipeline_async(source, job['target'], source_file=job.get('source_file'))
+            summary['render_timings'] = await transformer.wait_for_outputs_async()
+
+            overall = result['artifacts'].get('metadata', {}).get('overall_score', {})
+            summary.update({
+                "status": "ok",
+                "overall_score": overall.get('overall_score'),
+                "passed": overall.get('passed')
+            })
+            if transformer.render_errors:
+                failures = "; ".join(f"{name}: {error}" for name, error in transformer.render_errors.items())
+                summary.update({"status": "error", "error": f"Rendering failed: {failures}"})
+        except Exception as e:
+            summary.update({
+                "status": "error",
+                "error": f"{type(e).__name__}: {e}",
+                "overall_score": None,
+                "passed": None
+            })
+
+    summary['wall_time_s'] = round(time.perf_counter() - start, 3)
+    summary['usage'] = transformer.metrics.usage()
+    summary['cache'] = transformer.metrics.cache_stats()
+    summary['stage_cache'] = transformer.metrics.stage_cache
+    return summary
+
+
+async def run_batch_async(
+    jobs: list,
+    output_root: str = "output",
+    summary_path: str = None,
+    concurrency: int = BATCH_CONCURRENCY,
+    use_cache: bool = True,
+    on_result=None
+) -> list:
+    """Run ``jobs`` on a pool of ``concurrency`` workers sharing one event loop.
+
+    Each finished job is appended to the JSONL summary as soon as it completes.
+    """
+    os.makedirs(output_root, exist_ok=True)
+    summary_path = summary_path or os.path.join(output_root, "batch_summary.jsonl")
+
+    queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    results = []
+
+    with open(summary_path, 'w', encoding='utf-8') as summary_file:
+        async def worker():
+            while True:
+                try:
+                    job = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                summary = await _run_job(job, output_root, use_cache)
+                summary_file.write(json.dumps(summary, ensure_ascii=False) + "\n")
+                summary_file.flush()
+                results.append(summary)
+                if on_result:
+                    on_result(summary)
+
+        worker_count = max(1, min(concurrency, len(jobs)))
+        await asyncio.gather(*(worker() for _ in range(worker_count)))
+
+    return results
+
+
+def run_batch(
+    jobs: list,
+    output_root: str = "output",
+    summary_path: str = None,
+    concurrency: int = BATCH_CONCURRENCY,
+    use_cache: bool = True,
+    on_result=None
+) -> list:
+    async def _run():
+        try:
+            return await run_batch_async(jobs, output_root, summary_path, concurrency, use_cache, on_result)
+        finally:
+            await close_async_clients()
+
+    return asyncio.run(_run())
@@ -0,0 +1,220 @@
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from config import CACHE_ENABLED, CACHE_DIR, CACHE_MAX_BYTES
+
+
+CACHE_DB_NAME = "llm_responses.sqlite3"
+STAGE_DB_NAME = "stage_results.sqlite3"
+
+_cache_bypassed = contextvars.ContextVar("llm_cache_bypassed", default=False)
+
+
+def make_cache_key(model: str, messages: list, temperature: float,
+                   response_format: dict = None, max_tokens: int = None) -> str:
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "response_format": response_format,
+            "max_tokens": max_tokens
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SQLiteStore(ABC):
+    """SQLite-backed store with one connection per thread.
+
+    SQLite's file locking makes the store safe to share between processes.
+    """
+
+    def __init__(self, cache_dir: str, db_name: str):
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, db_name)
+        self._local = threading.local()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @abstractmethod
+    def _init_schema(self):
+        """Create the store's tables; called once the database directory exists."""
+
+
+class ResponseCache(SQLiteStore):
+    """Content-addressed LLM response store.
+
+    Entries are evicted least-recently-used first once the total stored size
+    exceeds ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        super().__init__(cache_dir, CACHE_DB_NAME)
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " content TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+
+    def _count(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str):
+        conn = self._connect()
+        row = conn.execute("SELECT content FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self._count(hit=False)
+            return None
+        conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        self._count(hit=True)
+        return row[0]
+
+    def put(self, key: str, content: str):
+        size = len(content.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, content, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, content, size, now, now)
+            )
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self):
+        self._connect().execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+class StageCache(SQLiteStore):
+    """Validated stage results keyed by a fingerprint of the stage's inputs."""
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        super().__init__(cache_dir, STAGE_DB_NAME)
+
+    def _init_schema(self):
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS stages ("
+            " fingerprint TEXT PRIMARY KEY,"
+            " stage TEXT NOT NULL,"
+            " result TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+
+    def get(self, fingerprint: str):
+        row = self._connect().execute(
+            "SELECT result FROM stages WHERE fingerprint = ?", (fingerprint,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, fingerprint: str, stage: str, result):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO stages (fingerprint, stage, result, created_at) VALUES (?, ?, ?, ?)",
+            (fingerprint, stage, json.dumps(result, ensure_ascii=False), time.time())
+        )
+
+    def clear(self, stage: str = None):
+        if stage is None:
+            self._connect().execute("DELETE FROM stages")
+        else:
+            self._connect().execute("DELETE FROM stages WHERE stage = ?", (stage,))
+
+
+_cache = None
+_stage_cache = None
+_cache_lock = threading.Lock()
+_cache_enabled = CACHE_ENABLED
+
+
+def set_cache_enabled(enabled: bool):
+    global _cache_enabled
+    _cache_enabled = enabled
+
+
+@contextlib.contextmanager
+def cache_bypassed():
+    token = _cache_bypassed.set(True)
+    try:
+        yield
+    finally:
+        _cache_bypassed.reset(token)
+
+
+def get_response_cache():
+    global _cache
+    if not _cache_enabled or _cache_bypassed.get():
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
+
+
+def get_stage_cache():
+    global _stage_cache
+    if not _cache_enabled or _cache_bypassed.get():
+        return None
+    if _stage_cache is None:
+        with _cache_lock:
+            if _stage_cache is None:
+                _stage_cache = StageCache()
+    return _stage_cache
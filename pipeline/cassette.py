@@ -0,0 +1,330 @@
+import asyncio
+import difflib
+import gzip
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+from config import CASSETTE_PATH, CASSETTE_MODE, CASSETTE_LATENCY
+from pipeline.cache import make_cache_key
+from pipeline.tracing import span
+from pipeline.utils import _chunk_token, _chunk_usage
+
+
+MODES = ("record", "replay")
+LATENCIES = ("recorded", "zero")
+REPLAY_CHUNK_CHARS = 64
+MAX_DIFF_LINES = 60
+
+_cassette = None
+
+
+class CassetteMismatchError(RuntimeError):
+    """A replayed request has no recorded counterpart."""
+
+
+def _request(kwargs: dict) -> dict:
+    return {
+        "model": kwargs.get('model'),
+        "messages": kwargs.get('messages'),
+        "temperature": kwargs.get('temperature'),
+        "response_format": kwargs.get('response_format'),
+        "max_tokens": kwargs.get('max_tokens')
+    }
+
+
+def _request_key(request: dict) -> str:
+    return make_cache_key(**request)
+
+
+def _render(request: dict) -> list:
+    lines = [f"{name}: {json.dumps(request[name])}" for name in ("model", "temperature", "response_format", "max_tokens")]
+    for message in request.get('messages') or []:
+        lines.append(f"[{message.get('role')}]")
+        lines.extend(str(message.get('content', '')).splitlines())
+    return lines
+
+
+def _open(path: str, mode: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class Cassette:
+    """Recorded LLM request/response pairs, one compact JSON object per line.
+
+    In "record" mode every completed call is appended as it finishes. In
+    "replay" mode requests are matched on the same fields as the response
+    cache key; identical requests are answered in recorded order, and the
+    last recording is reused once they run out. A request that was never
+    recorded raises CassetteMismatchError with a diff against the closest
+    recorded prompt. Paths ending in ``.gz`` are gzip-compressed.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", latency: str = "recorded"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}' (expected one of {', '.join(MODES)})")
+        if latency not in LATENCIES:
+            raise ValueError(f"Unknown cassette latency '{latency}' (expected one of {', '.join(LATENCIES)})")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._played = {}
+        self._file = None
+
+        if mode == "record":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = _open(path, 'w')
+        else:
+            with _open(path, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry['key'], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def record(self, kwargs: dict, content: str, usage, latency_s: float, first_token_s: float = None):
+        request = _request(kwargs)
+        entry = {
+            "key": _request_key(request),
+            "request": request,
+            "content": content,
+            "usage": [getattr(usage, 'prompt_tokens', None), getattr(usage, 'completion_tokens', None)]
+            if usage is not None else None,
+            "latency_s": round(latency_s, 4)
+        }
+        if first_token_s is not None:
+            entry["first_token_s"] = round(first_token_s, 4)
+        with self._lock:
+            self._entries.setdefault(entry['key'], []).append(entry)
+            self._file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n")
+            self._file.flush()
+
+    def play(self, kwargs: dict) -> dict:
+        request = _request(kwargs)
+        key = _request_key(request)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise self._mismatch(request)
+            index = self._played.get(key, 0)
+            self._played[key] = index + 1
+            return entries[min(index, len(entries) - 1)]
+
+    def _mismatch(self, request: dict) -> CassetteMismatchError:
+        rendered = "\n".join(_render(request))
+        candidates = [entries[0]['request'] for entries in self._entries.values()]
+        if not candidates:
+            return CassetteMismatchError(f"Cassette {self.path} is empty")
+
+        def similarity(candidate):
+            return difflib.SequenceMatcher(None, "\n".join(_render(candidate)), rendered, autojunk=False).quick_ratio()
+
+        closest = max(candidates, key=similarity)
+        diff = list(difflib.unified_diff(
+            _render(closest), _render(request), fromfile="recorded", tofile="requested", lineterm="", n=1
+        ))
+        if len(diff) > MAX_DIFF_LINES:
+            diff = diff[:MAX_DIFF_LINES] + [f"... ({len(diff) - MAX_DIFF_LINES} more diff lines)"]
+        return CassetteMismatchError(
+            f"No recorded response in {self.path} for this request. Closest recording:\n" + "\n".join(diff)
+        )
+
+    def delays(self, entry: dict) -> tuple:
+        """Seconds to wait before the first token and before the end of the response."""
+        if self.latency == "zero":
+            return 0.0, 0.0
+        total = entry.get('latency_s') or 0.0
+        first = entry.get('first_token_s')
+        return (total, 0.0) if first is None else (first, max(0.0, total - first))
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _usage(entry: dict):
+    if not entry.get('usage'):
+        return None
+    prompt_tokens, completion_tokens = entry['usage']
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=(prompt_tokens or 0) + (completion_tokens or 0)
+    )
+
+
+def _replayed_response(entry: dict):
+    message = SimpleNamespace(role="assistant", content=entry['content'])
+    return SimpleNamespace(
+        model=entry['request']['model'],
+        choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")],
+        usage=_usage(entry)
+    )
+
+
+def _replayed_chunks(entry: dict) -> list:
+    content = entry['content']
+    chunks = [
+        SimpleNamespace(choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=content[i:i + REPLAY_CHUNK_CHARS]))])
+        for i in range(0, len(content), REPLAY_CHUNK_CHARS)
+    ]
+    # Usage arrives on the final chunk, as Groq reports it under x_groq
+    chunks.append(SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=_usage(entry))))
+    return chunks
+
+
+class _StreamRecorder:
+    """Collects a stream's text, usage and timing as the caller consumes it."""
+
+    def __init__(self, cassette: Cassette, kwargs: dict, start: float):
+        self.cassette = cassette
+        self.kwargs = kwargs
+        self.start = start
+        self.parts = []
+        self.usage = None
+        self.first_token_at = None
+
+    def observe(self, chunk):
+        self.usage = _chunk_usage(chunk) or self.usage
+        text = _chunk_token(chunk)
+        if text:
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+            self.parts.append(text)
+
+    def finish(self):
+        first_token_s = self.first_token_at - self.start if self.first_token_at else None
+        self.cassette.record(
+            self.kwargs, "".join(self.parts), self.usage, time.perf_counter() - self.start, first_token_s
+        )
+
+
+class _Completions:
+
+    def __init__(self, completions, cassette: Cassette):
+        self._completions = completions
+        self._cassette = cassette
+
+    def create(self, stream: bool = False, **kwargs):
+        if self._cassette.mode == "replay":
+            entry = self._cassette.play(kwargs)
+            first, rest = self._cassette.delays(entry)
+            with span("cassette_replay", cat="llm", stream=stream):
+                time.sleep(first)
+            if stream:
+                return self._replay_stream(entry, rest)
+            time.sleep(rest)
+            return _replayed_response(entry)
+
+        start = time.perf_counter()
+        if stream:
+            return self._record_stream(self._completions.create(stream=True, **kwargs), kwargs, start)
+        response = self._completions.create(**kwargs)
+        self._cassette.record(
+            kwargs, response.choices[0].message.content, getattr(response, 'usage', None),
+            time.perf_counter() - start
+        )
+        return response
+
+    def _replay_stream(self, entry: dict, rest: float):
+        chunks = _replayed_chunks(entry)
+        for chunk in chunks:
+            time.sleep(rest / len(chunks))
+            yield chunk
+
+    def _record_stream(self, stream, kwargs: dict, start: float):
+        recorder = _StreamRecorder(self._cassette, kwargs, start)
+        for chunk in stream:
+            recorder.observe(chunk)
+            yield chunk
+        recorder.finish()
+
+
+class _AsyncCompletions(_Completions):
+
+    async def create(self, stream: bool = False, **kwargs):
+        if self._cassette.mode == "replay":
+            entry = self._cassette.play(kwargs)
+            first, rest = self._cassette.delays(entry)
+            with span("cassette_replay", cat="llm", stream=stream):
+                await asyncio.sleep(first)
+            if stream:
+                return self._replay_stream(entry, rest)
+            await asyncio.sleep(rest)
+            return _replayed_response(entry)
+
+        start = time.perf_counter()
+        if stream:
+            return self._record_stream(await self._completions.create(stream=True, **kwargs), kwargs, start)
+        response = await self._completions.create(**kwargs)
+        self._cassette.record(
+            kwargs, response.choices[0].message.content, getattr(response, 'usage', None),
+            time.perf_counter() - start
+        )
+        return response
+
+    async def _replay_stream(self, entry: dict, rest: float):
+        chunks = _replayed_chunks(entry)
+        for chunk in chunks:
+            await asyncio.sleep(rest / len(chunks))
+            yield chunk
+
+    async def _record_stream(self, stream, kwargs: dict, start: float):
+        recorder = _StreamRecorder(self._cassette, kwargs, start)
+        async for chunk in stream:
+            recorder.observe(chunk)
+            yield chunk
+        recorder.finish()
+
+
+class CassetteClient:
+    """Wraps an LLM client so chat completions are recorded to or replayed from a cassette."""
+
+    def __init__(self, client, cassette: Cassette):
+        self._client = client
+        self.cassette = cassette
+        completions = client.chat.completions
+        wrapper = _AsyncCompletions if asyncio.iscoroutinefunction(completions.create) else _Completions
+        self.chat = SimpleNamespace(completions=wrapper(completions, cassette))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def configure_cassette(path: str = None, mode: str = "replay", latency: str = "recorded"):
+    """Record to or replay from the cassette at ``path``; ``None`` or an empty path turns cassettes off."""
+    global _cassette
+    if _cassette is not None:
+        _cassette.close()
+    _cassette = Cassette(path, mode, latency) if path else None
+    return _cassette
+
+
+def active_cassette():
+    return _cassette
+
+
+def replaying() -> bool:
+    return _cassette is not None and _cassette.mode == "replay"
+
+
+def wrap_client(client):
+    if _cassette is None:
+        return client
+    return CassetteClient(client, _cassette)
+
+
+if CASSETTE_PATH and CASSETTE_MODE != "off":
+    configure_cassette(CASSETTE_PATH, CASSETTE_MODE, CASSETTE_LATENCY)
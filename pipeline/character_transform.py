@@ -1,42 +1,170 @@
-import json
-from groq import Groq
-from prompts.templates import CHARACTER_TRANSFORM_PROMPT
-from config import GROQ_API_KEY, MODEL_NAME, TEMPERATURE
-from pipeline.utils import parse_llm_json, make_llm_call
+import asyncio
+from prompts.templates import CHARACTER_TRANSFORM_PROMPT, CHARACTER_SINGLE_TRANSFORM_PROMPT, GROUP_DYNAMICS_PROMPT
+from config import MODEL_NAME, TEMPERATURE, CHARACTER_FANOUT_RETRIES
+from pipeline.utils import parse_llm_json, make_llm_call, make_llm_call_async
+from pipeline.serialization import to_prompt
+from pipeline.clients import get_client, get_async_client
+from pipeline.schemas import validate_transformed_character, validate_character_transformation
+from pipeline.retry import RETRYABLE, CircuitOpenError, classify_error
 
 
-def transform_characters(source_characters: list, target_world: dict) -> dict:
-    client = Groq(api_key=GROQ_API_KEY)
-    
-    characters_text = json.dumps(source_characters, indent=2)
-    
-    world_text = f"""
+def _world_context(target_world: dict) -> str:
+    return f"""
 World: {target_world.get('world_name', 'Target World')}
 Era: {target_world.get('era', 'Unknown')}
 Domain: {target_world.get('domain', 'Unknown')}
-Setting: {json.dumps(target_world.get('setting_details', {}), indent=2)}
-Rules: {json.dumps(target_world.get('internal_rules', []), indent=2)}
+Setting: {to_prompt(target_world.get('setting_details', {}), stage='character_transformation')}
+Rules: {to_prompt(target_world.get('internal_rules', []), stage='character_transformation')}
 """
+
+
+def _build_request(source_characters: list, target_world: dict) -> dict:
+    characters_text = to_prompt(source_characters, stage='character_transformation')
     
     prompt = CHARACTER_TRANSFORM_PROMPT.format(
         characters=characters_text,
-        world=world_text
+        world=_world_context(target_world)
     )
     
-    response_content = make_llm_call(
-        client=client,
-        model=MODEL_NAME,
-        messages=[
+    return {
+        'model': MODEL_NAME,
+        'messages': [
             {"role": "system", "content": "You are a character designer. Always respond with valid JSON only, no markdown."},
             {"role": "user", "content": prompt}
         ],
-        temperature=TEMPERATURE,
-        response_format={"type": "json_object"}
+        'temperature': TEMPERATURE,
+        'response_format': {"type": "json_object"},
+        'validate': lambda characters: validate_character_transformation(characters)[0]
+    }
+
+
+def transform_characters(source_characters: list, target_world: dict) -> dict:
+    response_content = make_llm_call(client=get_client(), **_build_request(source_characters, target_world))
+    return parse_llm_json(response_content)
+
+
+async def transform_characters_async(source_characters: list, target_world: dict) -> dict:
+    response_content = await make_llm_call_async(
+        client=get_async_client(),
+        **_build_request(source_characters, target_world)
     )
-    
     return parse_llm_json(response_content)
 
 
+def _build_single_request(character: dict, cast: list, world_text: str, feedback: str = None) -> dict:
+    cast_text = "\n".join(f"- {c.get('name')}: {c.get('role_in_plot', c.get('archetype', ''))}" for c in cast)
+    feedback_text = ""
+    if feedback:
+        feedback_text = f"\nYOUR PREVIOUS ATTEMPT WAS REJECTED: {feedback}\nFix this and include every required field.\n"
+    
+    prompt = CHARACTER_SINGLE_TRANSFORM_PROMPT.format(
+        character=to_prompt(character, stage='character_transformation'),
+        cast=cast_text,
+        world=world_text,
+        feedback=feedback_text
+    )
+    
+    return {
+        'model': MODEL_NAME,
+        'messages': [
+            {"role": "system", "content": "You are a character designer. Always respond with valid JSON only, no markdown."},
+            {"role": "user", "content": prompt}
+        ],
+        'temperature': TEMPERATURE,
+        'response_format': {"type": "json_object"},
+        'validate': lambda character: validate_transformed_character(character)[0]
+    }
+
+
+def _build_group_dynamics_request(transformed: list) -> dict:
+    cast_text = "\n".join(
+        f"- {c.get('new_name')} (was {c.get('original_name')}): {c.get('new_identity')}; "
+        f"relationships: {'; '.join(c.get('key_relationships', [])) or 'none listed'}"
+        for c in transformed
+    )
+    
+    return {
+        'model': MODEL_NAME,
+        'messages': [
+            {"role": "system", "content": "You are a character designer. Always respond with valid JSON only, no markdown."},
+            {"role": "user", "content": GROUP_DYNAMICS_PROMPT.format(characters=cast_text)}
+        ],
+        'temperature': TEMPERATURE,
+        'response_format': {"type": "json_object"}
+    }
+
+
+async def _transform_one_async(client, character: dict, cast: list, world_text: str, feedback: str = None) -> str:
+    return await make_llm_call_async(
+        client=client,
+        **_build_single_request(character, cast, world_text, feedback)
+    )
+
+
+async def transform_characters_fanout_async(
+    source_characters: list,
+    target_world: dict,
+    max_retries: int = CHARACTER_FANOUT_RETRIES
+) -> dict:
+    """Transform each character in its own concurrent call.
+
+    Characters whose output fails to parse or validate are retried
+    individually, with the error fed back into the prompt. Calls that still
+    fail with a retryable API error are retried without feedback; fatal
+    errors (auth, bad request, an open circuit) are raised at once. A final
+    lightweight call derives ``group_dynamics`` from the transformed cast.
+    """
+    client = get_async_client()
+    world_text = _world_context(target_world)
+    transformed = [None] * len(source_characters)
+    errors = {}
+    last_error = {}
+    pending = list(range(len(source_characters)))
+    
+    for _ in range(max_retries + 1):
+        outcomes = await asyncio.gather(*(
+            _transform_one_async(client, source_characters[i], source_characters, world_text, errors.get(i))
+            for i in pending
+        ), return_exceptions=True)
+        
+        failed = []
+        for i, outcome in zip(pending, outcomes):
+            if isinstance(outcome, BaseException):
+                if isinstance(outcome, CircuitOpenError) or classify_error(outcome) not in RETRYABLE:
+                    raise outcome
+                last_error[i] = str(outcome)
+                failed.append(i)
+                continue
+            try:
+                data = parse_llm_json(outcome)
+            except ValueError as e:
+                errors[i] = last_error[i] = str(e)
+                failed.append(i)
+                continue
+            valid, character, error = validate_transformed_character(data)
+            if valid:
+                transformed[i] = character
+            else:
+                errors[i] = last_error[i] = error
+                failed.append(i)
+        
+        pending = failed
+        if not pending:
+            break
+    
+    if pending:
+        names = ", ".join(source_characters[i].get('name', f"#{i + 1}") for i in pending)
+        raise ValueError(f"Character transformation failed for: {names} ({last_error[pending[0]]})")
+    
+    response_content = await make_llm_call_async(client=client, **_build_group_dynamics_request(transformed))
+    group = parse_llm_json(response_content)
+    
+    return {
+        "transformed_characters": transformed,
+        "group_dynamics": group.get('group_dynamics', group)
+    }
+
+
 def create_character_mapping_table(original: list, transformed: dict) -> list:
     mappings = []
     transformed_chars = transformed.get('transformed_characters', [])
@@ -0,0 +1,131 @@
+import contextlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+from pipeline.utils import write_text_atomic
+
+
+def _dumps(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+class CheckpointStore:
+    """Append-only store of per-stage pipeline outputs.
+
+    Each completed stage is written once as its own record file; a small
+    manifest lists the records in order. Every file is written atomically,
+    so a crash leaves either the previous manifest or the new one, never a
+    torn file. Saving a stage costs O(that stage's output).
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory: str, legacy_path: str = None):
+        self.directory = directory
+        self.legacy_path = legacy_path
+        self._manifest = None
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, self.MANIFEST)
+
+    def _write_manifest(self, manifest: dict):
+        write_text_atomic(self.manifest_path, _dumps(manifest))
+        self._manifest = manifest
+
+    def manifest(self) -> dict:
+        if self._manifest is None:
+            if os.path.exists(self.manifest_path):
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self._manifest = json.load(f)
+            elif self.legacy_path and os.path.exists(self.legacy_path):
+                self._migrate_legacy()
+        return self._manifest
+
+    def exists(self) -> bool:
+        return self.manifest() is not None
+
+    def begin(self, source_name: str, target_setting: str):
+        """Start a new run, discarding any records from a previous one."""
+        self.clear()
+        os.makedirs(self.directory, exist_ok=True)
+        self._write_manifest({
+            "source_name": source_name,
+            "target_setting": target_setting,
+            "completed_stage": 0,
+            "timestamp": datetime.now().isoformat(),
+            "records": []
+        })
+
+    def save_stage(self, stage: int, artifacts: dict) -> str:
+        manifest = self.manifest()
+        if manifest is None:
+            raise RuntimeError("No checkpoint run in progress; call begin() first")
+        return self._append_record(manifest, stage, artifacts, datetime.now().isoformat())
+
+    def _append_record(self, manifest: dict, stage: int, artifacts: dict, timestamp: str) -> str:
+        file_name = f"{len(manifest['records']) + 1:02d}_stage_{stage}.json"
+        path = os.path.join(self.directory, file_name)
+        write_text_atomic(path, _dumps({"stage": stage, "artifacts": artifacts}))
+
+        self._write_manifest({
+            **manifest,
+            "completed_stage": stage,
+            "timestamp": timestamp,
+            "records": manifest['records'] + [{
+                "stage": stage,
+                "file": file_name,
+                "artifacts": sorted(artifacts),
+                "timestamp": timestamp
+            }]
+        })
+        return path
+
+    def load_artifacts(self, keys: tuple = None) -> dict:
+        """Return the latest value of each artifact, reading only the records that hold them."""
+        manifest = self.manifest()
+        if manifest is None:
+            return {}
+
+        latest = {}
+        for record in manifest['records']:
+            for key in record['artifacts']:
+                if keys is None or key in keys:
+                    latest[key] = record['file']
+
+        artifacts = {}
+        for file_name in dict.fromkeys(latest.values()):
+            with open(os.path.join(self.directory, file_name), 'r', encoding='utf-8') as f:
+                record = json.load(f)['artifacts']
+            artifacts.update({key: record[key] for key, source in latest.items() if source == file_name})
+        return artifacts
+
+    def clear(self):
+        self._remove_records()
+        if self.legacy_path:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.legacy_path)
+
+    def _remove_records(self):
+        self._manifest = None
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+
+    def _migrate_legacy(self):
+        with open(self.legacy_path, 'r', encoding='utf-8') as f:
+            legacy = json.load(f)
+        # The legacy file stays the only copy until the migrated manifest is on disk
+        self._remove_records()
+        os.makedirs(self.directory, exist_ok=True)
+        timestamp = legacy.get('timestamp') or datetime.now().isoformat()
+        self._append_record({
+            "source_name": legacy['source_name'],
+            "target_setting": legacy['target_setting'],
+            "completed_stage": 0,
+            "timestamp": timestamp,
+            "records": []
+        }, legacy['completed_stage'], legacy.get('artifacts', {}), timestamp)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.legacy_path)
@@ -0,0 +1,107 @@
+import asyncio
+import atexit
+import threading
+import weakref
+
+import httpx
+from groq import DefaultHttpxClient, DefaultAsyncHttpxClient
+
+from config import (
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_TIMEOUT
+)
+from pipeline.backends import LLMBackend, create_backend
+from pipeline.cassette import wrap_client
+
+
+_backend = None
+_clients = {}
+_clients_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_backend() -> LLMBackend:
+    """Return the backend selected by ``LLM_BACKEND``."""
+    global _backend
+    if _backend is None:
+        with _clients_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def configure_backend(name: str, base_url: str = None, api_key: str = None) -> LLMBackend:
+    """Switch every stage to another backend; clients of the previous one are closed."""
+    global _backend
+    backend = create_backend(name, base_url, api_key)
+    close_clients()
+    # Async clients can only be closed on their own event loop; drop them
+    _async_clients.clear()
+    with _clients_lock:
+        _backend = backend
+    return backend
+
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+    )
+
+
+def get_client(api_key: str = None):
+    """Return the process-wide client of the configured backend for ``api_key``.
+
+    The client owns a pooled httpx transport, so keep-alive connections and
+    TLS sessions are reused across stages, threads and batch jobs. SDK
+    retries are disabled; ``retry_with_backoff`` owns the retry policy.
+    While a cassette is active the client records to or replays from it.
+    """
+    backend = get_backend()
+    key = api_key or backend.api_key or ""
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = backend.client(key, DefaultHttpxClient(limits=_http_limits(), timeout=HTTP_TIMEOUT))
+                _clients[key] = client
+    return wrap_client(client)
+
+
+def get_async_client(api_key: str = None):
+    """Return the async client for ``api_key`` bound to the running event loop.
+
+    httpx async transports cannot be shared between event loops, so the
+    registry keeps one pooled client per loop.
+    """
+    backend = get_backend()
+    key = api_key or backend.api_key or ""
+    loop = asyncio.get_running_loop()
+    loop_clients = _async_clients.get(loop)
+    if loop_clients is None:
+        loop_clients = _async_clients[loop] = {}
+    client = loop_clients.get(key)
+    if client is None:
+        client = backend.async_client(key, DefaultAsyncHttpxClient(limits=_http_limits(), timeout=HTTP_TIMEOUT))
+        loop_clients[key] = client
+    return wrap_client(client)
+
+
+async def close_async_clients():
+    loop_clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in loop_clients.values():
+        await client.close()
+
+
+def close_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+atexit.register(close_clients)
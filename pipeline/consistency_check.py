@@ -1,37 +1,237 @@
-import json
-from groq import Groq
-from prompts.templates import CONSISTENCY_CHECK_PROMPT
-from config import GROQ_API_KEY, MODEL_NAME
-from pipeline.utils import parse_llm_json, make_llm_call
+import re
 
+from prompts.templates import CONSISTENCY_CHECK_PROMPT, CONSISTENCY_RECHECK_PROMPT, CONSISTENCY_CATEGORY_FORMATS
+from config import MODEL_NAME
+from pipeline.utils import parse_llm_json, make_llm_call, make_llm_call_async
+from pipeline.serialization import to_prompt, PROSE_ONLY_FIELDS
+from pipeline.clients import get_client, get_async_client
+from pipeline.patches import apply_patch
 
-def check_consistency(
+
+def _build_check_request(
     original_analysis: dict,
     world: dict,
     characters: dict,
     plot: dict
 ) -> dict:
-    client = Groq(api_key=GROQ_API_KEY)
-    
     prompt = CONSISTENCY_CHECK_PROMPT.format(
-        original_analysis=json.dumps(original_analysis, indent=2),
-        world=json.dumps(world, indent=2),
-        characters=json.dumps(characters, indent=2),
-        plot=json.dumps(plot, indent=2)
+        original_analysis=to_prompt(original_analysis, stage='consistency_check'),
+        world=to_prompt(world, stage='consistency_check'),
+        characters=to_prompt(characters, stage='consistency_check', drop=PROSE_ONLY_FIELDS),
+        plot=to_prompt(plot, stage='consistency_check')
     )
     
+    return {
+        'model': MODEL_NAME,
+        'messages': [
+            {"role": "system", "content": "You are a narrative quality reviewer. Always respond with valid JSON only, no markdown."},
+            {"role": "user", "content": prompt}
+        ],
+        'temperature': 0.3,
+        'response_format': {"type": "json_object"}
+    }
+
+
+def check_consistency(
+    original_analysis: dict,
+    world: dict,
+    characters: dict,
+    plot: dict
+) -> dict:
     response_content = make_llm_call(
-        client=client,
-        model=MODEL_NAME,
-        messages=[
+        client=get_client(),
+        **_build_check_request(original_analysis, world, characters, plot)
+    )
+    return parse_llm_json(response_content)
+
+
+async def check_consistency_async(
+    original_analysis: dict,
+    world: dict,
+    characters: dict,
+    plot: dict
+) -> dict:
+    response_content = await make_llm_call_async(
+        client=get_async_client(),
+        **_build_check_request(original_analysis, world, characters, plot)
+    )
+    return parse_llm_json(response_content)
+
+
+CATEGORY_ISSUE_FIELDS = {
+    "thematic_fidelity": ("lost_themes",),
+    "internal_consistency": ("logical_issues", "world_rule_violations"),
+    "originality_check": ("copied_elements",),
+    "cultural_sensitivity": ("concerns",)
+}
+
+NO_ISSUE_MARKERS = {"", "none", "n/a", "no issues"}
+
+
+def _has_issues(values) -> bool:
+    return any(str(v).strip().lower() not in NO_ISSUE_MARKERS for v in values or [])
+
+
+def categories_to_recheck(check_result: dict) -> list:
+    """Categories whose issue lists produced the required fixes.
+
+    Falls back to every category when no issues are itemised.
+    """
+    categories = [
+        category for category, fields in CATEGORY_ISSUE_FIELDS.items()
+        if any(_has_issues(check_result.get(category, {}).get(field)) for field in fields)
+    ]
+    return categories or list(CATEGORY_ISSUE_FIELDS)
+
+
+def artifact_sections(plot: dict, characters: dict) -> dict:
+    """Split plot and characters into path-addressed sections.
+
+    Paths look like ``plot.reconstructed_plot.rising_action[2]`` or
+    ``characters.transformed_characters[0]``.
+    """
+    sections = {}
+    for key, value in plot.get('reconstructed_plot', {}).items():
+        if key == 'rising_action' and isinstance(value, list):
+            for i, event in enumerate(value):
+                sections[f"plot.reconstructed_plot.rising_action[{i}]"] = event
+        else:
+            sections[f"plot.reconstructed_plot.{key}"] = value
+    for key, value in plot.items():
+        if key != 'reconstructed_plot':
+            sections[f"plot.{key}"] = value
+    
+    for i, character in enumerate(characters.get('transformed_characters', [])):
+        sections[f"characters.transformed_characters[{i}]"] = character
+    for key, value in characters.items():
+        if key != 'transformed_characters':
+            sections[f"characters.{key}"] = value
+    return sections
+
+
+def changed_sections(before_plot: dict, before_characters: dict, plot: dict, characters: dict) -> dict:
+    before = artifact_sections(before_plot, before_characters)
+    after = artifact_sections(plot, characters)
+    changed = {path: value for path, value in after.items() if before.get(path) != value}
+    changed.update({path: None for path in before if path not in after})
+    return changed
+
+
+def _recheck_context(categories: list, original_analysis: dict, world: dict) -> dict:
+    context = {}
+    if "thematic_fidelity" in categories:
+        context['original_themes'] = original_analysis.get('core_themes', [])
+        context['theme_mapping'] = world.get('theme_mapping', [])
+    if "internal_consistency" in categories:
+        context['world_rules'] = world.get('internal_rules', [])
+        context['forbidden_actions'] = world.get('forbidden_actions', [])
+    if "originality_check" in categories:
+        context['original_plot'] = original_analysis.get('plot_structure', {})
+    return context
+
+
+def _build_recheck_request(
+    previous: dict,
+    categories: list,
+    changed: dict,
+    original_analysis: dict,
+    world: dict
+) -> dict:
+    issues_text = "\n".join(f"- {fix}" for fix in previous.get('required_fixes', []))
+    changed_text = "\n".join(
+        f"{path}: {to_prompt(value, stage='consistency_recheck')}" for path, value in changed.items()
+    )
+    
+    prompt = CONSISTENCY_RECHECK_PROMPT.format(
+        previous_review=to_prompt({c: previous.get(c, {}) for c in categories}, stage='consistency_recheck'),
+        issues=issues_text,
+        changed_sections=changed_text,
+        context=to_prompt(_recheck_context(categories, original_analysis, world), stage='consistency_recheck'),
+        categories_format=",\n    ".join(CONSISTENCY_CATEGORY_FORMATS[c] for c in categories)
+    )
+    
+    return {
+        'model': MODEL_NAME,
+        'messages': [
             {"role": "system", "content": "You are a narrative quality reviewer. Always respond with valid JSON only, no markdown."},
             {"role": "user", "content": prompt}
         ],
-        temperature=0.3,
-        response_format={"type": "json_object"}
+        'temperature': 0.3,
+        'response_format': {"type": "json_object"}
+    }
+
+
+def _merge_recheck(previous: dict, response: dict, categories: list, changed: dict) -> dict:
+    merged = {k: v for k, v in previous.items() if k not in ('overall_score', 'manual_review', 'recheck')}
+    for category in categories:
+        if isinstance(response.get(category), dict):
+            merged[category] = response[category]
+    merged['required_fixes'] = response.get('required_fixes', [])
+    if 'suggestions' in response:
+        merged['suggestions'] = response['suggestions']
+    merged['recheck'] = {
+        "rescored_categories": categories,
+        "reused_categories": [c for c in CATEGORY_ISSUE_FIELDS if c not in categories],
+        "changed_sections": sorted(changed)
+    }
+    return merged
+
+
+def _unchanged_recheck(previous: dict) -> dict:
+    result = {k: v for k, v in previous.items() if k not in ('overall_score', 'manual_review')}
+    result['recheck'] = {
+        "rescored_categories": [],
+        "reused_categories": list(CATEGORY_ISSUE_FIELDS),
+        "changed_sections": []
+    }
+    return result
+
+
+def recheck_consistency(
+    previous: dict,
+    original_analysis: dict,
+    world: dict,
+    before_plot: dict,
+    before_characters: dict,
+    plot: dict,
+    characters: dict
+) -> dict:
+    """Re-score only the categories tied to the fixed issues.
+
+    Only the sections ``apply_fixes`` changed are sent; scores for every
+    other category are carried over from ``previous``.
+    """
+    changed = changed_sections(before_plot, before_characters, plot, characters)
+    if not changed:
+        return _unchanged_recheck(previous)
+    
+    categories = categories_to_recheck(previous)
+    response_content = make_llm_call(
+        client=get_client(),
+        **_build_recheck_request(previous, categories, changed, original_analysis, world)
     )
+    return _merge_recheck(previous, parse_llm_json(response_content), categories, changed)
+
+
+async def recheck_consistency_async(
+    previous: dict,
+    original_analysis: dict,
+    world: dict,
+    before_plot: dict,
+    before_characters: dict,
+    plot: dict,
+    characters: dict
+) -> dict:
+    changed = changed_sections(before_plot, before_characters, plot, characters)
+    if not changed:
+        return _unchanged_recheck(previous)
     
-    return parse_llm_json(response_content)
+    categories = categories_to_recheck(previous)
+    response_content = await make_llm_call_async(
+        client=get_async_client(),
+        **_build_recheck_request(previous, categories, changed, original_analysis, world)
+    )
+    return _merge_recheck(previous, parse_llm_json(response_content), categories, changed)
 
 
 def calculate_overall_score(check_result: dict) -> dict:
@@ -61,15 +261,124 @@ def calculate_overall_score(check_result: dict) -> dict:
 
 FIX_PROMPT = '''You are a narrative editor. The following transformation has issues that need fixing.
 
-CURRENT ARTIFACTS:
-- Plot: {plot}
-- Characters: {characters}
+SECTIONS RELATED TO THE ISSUES (path: current value):
+{fragments}
+
+ALL SECTION PATHS:
+{outline}
 
 ISSUES TO FIX:
 {issues}
 
-Provide corrected versions of the affected elements. Focus only on the specific issues mentioned.
-Respond in JSON format with keys "fixed_plot" and "fixed_characters" (include only fields that changed).'''
+Fix only the specific issues mentioned, changing as little as possible.
+Respond in JSON format with a key "patches": a list of operations such as
+{{"op": "replace", "path": "plot.reconstructed_plot.rising_action[2].effect", "value": "New effect"}}
+{{"op": "insert", "path": "plot.reconstructed_plot.rising_action[3]", "value": {{"event": "...", "cause": "...", "effect": "..."}}}}
+"replace" overwrites the field or list item at the path; "insert" adds a new list item at that position.
+Paths start with "plot." or "characters." and use [n] for list positions.'''
+
+
+def _section_keywords(path: str, value) -> list:
+    name = re.sub(r'\[\d+\]$', '', path.rsplit('.', 1)[-1])
+    keywords = [name.replace('_', ' ')]
+    if isinstance(value, dict):
+        keywords += [value[k] for k in ('original_name', 'new_name') if isinstance(value.get(k), str) and value[k]]
+    return [k.lower() for k in keywords]
+
+
+def _event_indices(text: str) -> set:
+    """Rising-action positions an issue refers to: ``event 3`` (1-based) or ``rising action[2]``."""
+    indices = {int(n) - 1 for n in re.findall(r'\bevent\s*#?(\d+)', text)}
+    indices |= {int(n) for n in re.findall(r'rising action\s*\[(\d+)\]', text)}
+    return indices
+
+
+def _matches_issue(path: str, value, text: str) -> bool:
+    position = re.search(r'rising_action\[(\d+)\]$', path)
+    if position:
+        indices = _event_indices(text)
+        if indices:
+            return int(position.group(1)) in indices
+    return any(keyword in text for keyword in _section_keywords(path, value))
+
+
+def select_fix_fragments(required_fixes: list, plot: dict, characters: dict) -> dict:
+    """Pick the sections named in ``required_fixes``.
+
+    A section matches when an issue mentions its name (``climax``, ``rising
+    action``) or, for characters, their original or new name. An issue that
+    numbers its event (``Rising action event 3 ...``) matches only that
+    rising-action item. Issues that match nothing add no sections; the
+    prompt's outline still lists every path they could patch.
+    """
+    sections = artifact_sections(plot, characters)
+    selected = set()
+    for fix in required_fixes:
+        text = re.sub(r'[_-]', ' ', str(fix).lower())
+        selected.update(path for path, value in sections.items() if _matches_issue(path, value, text))
+    return {path: value for path, value in sections.items() if path in selected}
+
+
+def _build_fix_request(required_fixes: list, plot: dict, characters: dict) -> dict:
+    issues_text = "\n".join(f"- {fix}" for fix in required_fixes)
+    fragments = select_fix_fragments(required_fixes, plot, characters)
+    
+    prompt = FIX_PROMPT.format(
+        fragments="\n".join(
+            f"{path}: {to_prompt(value, stage='fixes')}" for path, value in fragments.items()
+        ) or "(none named; choose paths from the list below)",
+        outline=", ".join(artifact_sections(plot, characters)),
+        issues=issues_text
+    )
+    
+    return {
+        'model': MODEL_NAME,
+        'messages': [
+            {"role": "system", "content": "You are a narrative editor. Return valid JSON only."},
+            {"role": "user", "content": prompt}
+        ],
+        'temperature': 0.5,
+        'response_format': {"type": "json_object"}
+    }
+
+
+def _merge_fixes(fixes: dict, required_fixes: list, plot: dict, characters: dict) -> tuple:
+    patches = fixes.get('patches')
+    if not isinstance(patches, list):
+        patches = []
+    patched, patched_paths, rejected = apply_patch({"plot": plot, "characters": characters}, patches)
+    applied_fixes = []
+    
+    if patched_paths:
+        plot, characters = patched['plot'], patched['characters']
+        applied_fixes.append({
+            "type": "patch",
+            "status": "applied",
+            "issues_addressed": required_fixes,
+            "patched_paths": patched_paths
+        })
+    
+    for rejection in rejected:
+        applied_fixes.append({"type": "patch", "status": "rejected", **rejection})
+    
+    if not patched_paths:
+        applied_fixes.append({
+            "type": "manual_review",
+            "status": "flagged",
+            "issues": required_fixes,
+            "reason": "LLM did not return any valid patches" if rejected else "LLM did not return specific fixes"
+        })
+    
+    return plot, characters, applied_fixes
+
+
+def _fix_failed(required_fixes: list, error: Exception) -> list:
+    return [{
+        "type": "manual_review",
+        "status": "flagged",
+        "issues": required_fixes,
+        "reason": f"Fix generation failed: {str(error)}"
+    }]
 
 
 def apply_fixes(
@@ -81,75 +390,41 @@ def apply_fixes(
     max_retries: int = 1
 ) -> tuple:
     required_fixes = check_result.get('required_fixes', [])
-    applied_fixes = []
     
     if not required_fixes:
         return plot, characters, []
     
-    client = Groq(api_key=GROQ_API_KEY)
-    
-    issues_text = "\n".join(f"- {fix}" for fix in required_fixes)
-    
-    prompt = FIX_PROMPT.format(
-        plot=json.dumps(plot, indent=2),
-        characters=json.dumps(characters, indent=2),
-        issues=issues_text
-    )
-    
     try:
         response_content = make_llm_call(
-            client=client,
-            model=MODEL_NAME,
-            messages=[
-                {"role": "system", "content": "You are a narrative editor. Return valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.5,
-            response_format={"type": "json_object"}
+            client=get_client(),
+            **_build_fix_request(required_fixes, plot, characters)
         )
-        
         fixes = parse_llm_json(response_content)
-        
-        if 'fixed_plot' in fixes and fixes['fixed_plot']:
-            plot = _deep_merge(plot, fixes['fixed_plot'])
-            applied_fixes.append({
-                "type": "plot",
-                "status": "applied",
-                "issues_addressed": required_fixes
-            })
-        
-        if 'fixed_characters' in fixes and fixes['fixed_characters']:
-            characters = _deep_merge(characters, fixes['fixed_characters'])
-            applied_fixes.append({
-                "type": "characters", 
-                "status": "applied",
-                "issues_addressed": required_fixes
-            })
-        
-        if not applied_fixes:
-            applied_fixes.append({
-                "type": "manual_review",
-                "status": "flagged",
-                "issues": required_fixes,
-                "reason": "LLM did not return specific fixes"
-            })
-            
+        return _merge_fixes(fixes, required_fixes, plot, characters)
     except Exception as e:
-        applied_fixes.append({
-            "type": "manual_review",
-            "status": "flagged",
-            "issues": required_fixes,
-            "reason": f"Fix generation failed: {str(e)}"
-        })
-    
-    return plot, characters, applied_fixes
+        return plot, characters, _fix_failed(required_fixes, e)
 
 
-def _deep_merge(base: dict, updates: dict) -> dict:
-    result = base.copy()
-    for key, value in updates.items():
-        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-            result[key] = _deep_merge(result[key], value)
-        else:
-            result[key] = value
-    return result
+async def apply_fixes_async(
+    check_result: dict,
+    plot: dict,
+    characters: dict,
+    original_analysis: dict = None,
+    world: dict = None,
+    max_retries: int = 1
+) -> tuple:
+    required_fixes = check_result.get('required_fixes', [])
+    
+    if not required_fixes:
+        return plot, characters, []
+    
+    try:
+        response_content = await make_llm_call_async(
+            client=get_async_client(),
+            **_build_fix_request(required_fixes, plot, characters)
+        )
+        fixes = parse_llm_json(response_content)
+        return _merge_fixes(fixes, required_fixes, plot, characters)
+    except Exception as e:
+        return plot, characters, _fix_failed(required_fixes, e)
+
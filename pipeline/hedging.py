@@ -0,0 +1,179 @@
+import asyncio
+import contextlib
+import math
+import threading
+import time
+
+from config import (
+    CACHE_DIR,
+    HEDGE_ENABLED,
+    HEDGE_PERCENTILE,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_HISTORY_SIZE,
+    HEDGE_MAX_RATIO
+)
+from pipeline.cache import SQLiteStore
+from pipeline.metrics import current_run, current_stage
+
+
+LATENCY_DB_NAME = "latency.sqlite3"
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class LatencyHistory(SQLiteStore):
+    """Recent LLM call latencies per stage and model, kept across runs."""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, history_size: int = HEDGE_HISTORY_SIZE):
+        self.history_size = history_size
+        super().__init__(cache_dir, LATENCY_DB_NAME)
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS latencies ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " key TEXT NOT NULL,"
+            " latency_s REAL NOT NULL,"
+            " recorded_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_latency_key ON latencies(key, id)")
+
+    def record(self, key: str, latency_s: float):
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO latencies (key, latency_s, recorded_at) VALUES (?, ?, ?)",
+            (key, latency_s, time.time())
+        )
+        conn.execute(
+            "DELETE FROM latencies WHERE key = ? AND id <= ("
+            " SELECT id FROM latencies WHERE key = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (key, key, self.history_size)
+        )
+
+    def recent(self, key: str) -> list:
+        rows = self._connect().execute(
+            "SELECT latency_s FROM latencies WHERE key = ? ORDER BY id DESC LIMIT ?",
+            (key, self.history_size)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def threshold(self, key: str, pct: float = HEDGE_PERCENTILE, min_samples: int = HEDGE_MIN_SAMPLES):
+        """Return the ``pct`` latency for ``key``, or None until ``min_samples`` calls are recorded."""
+        latencies = self.recent(key)
+        if len(latencies) < max(1, min_samples):
+            return None
+        return percentile(latencies, pct)
+
+
+class HedgeBudget:
+    """Caps hedges at ``max_ratio`` of the calls made by this process."""
+
+    def __init__(self, max_ratio: float = HEDGE_MAX_RATIO):
+        self.max_ratio = max_ratio
+        self.calls = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def record_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.max_ratio * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.hedges -= 1
+
+
+_history = None
+_history_lock = threading.Lock()
+hedge_budget = HedgeBudget()
+
+
+def get_latency_history() -> LatencyHistory:
+    global _history
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                _history = LatencyHistory()
+    return _history
+
+
+def latency_key(model: str) -> str:
+    return f"{current_stage() or 'default'}:{model}"
+
+
+def record_latency(model: str, latency_s: float, enabled: bool = None):
+    """Record one HTTP request's latency for the current stage; a no-op unless hedging is on."""
+    if enabled is None:
+        enabled = HEDGE_ENABLED
+    if enabled:
+        get_latency_history().record(latency_key(model), latency_s)
+
+
+async def _cancel(task: asyncio.Task):
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError, Exception):
+        await task
+
+
+async def _race(primary_task: asyncio.Task, hedge_task: asyncio.Task):
+    pending = {primary_task, hedge_task}
+    run = current_run()
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                if run is not None:
+                    run.record_hedge(won=task is hedge_task)
+                return task.result()
+    if run is not None:
+        run.record_hedge(won=False)
+    # Both failed: surface the primary's error, which went through retries
+    raise primary_task.exception()
+
+
+async def hedged_call_async(model: str, primary, hedge, enabled: bool = None):
+    """Await ``primary()``; if it outlives the stage's latency percentile, race it against ``hedge()``.
+
+    ``hedge`` is awaited at most once, when the threshold passes, and returns
+    a coroutine for the duplicate request, or None when no rate-limit budget
+    is available right now. The first successful response wins and the
+    other request is cancelled. If one request fails, the other is awaited.
+    The thresholds come from latencies the requests report via ``record_latency``.
+    """
+    if enabled is None:
+        enabled = HEDGE_ENABLED
+    if not enabled:
+        return await primary()
+
+    threshold = get_latency_history().threshold(latency_key(model))
+    hedge_budget.record_call()
+
+    tasks = [asyncio.ensure_future(primary())]
+    try:
+        if threshold is not None:
+            done, _ = await asyncio.wait(tasks, timeout=threshold)
+            if not done and hedge_budget.try_acquire():
+                hedge_coro = await hedge()
+                if hedge_coro is None:
+                    hedge_budget.release()
+                else:
+                    tasks.append(asyncio.ensure_future(hedge_coro))
+
+        return await (_race(*tasks) if len(tasks) > 1 else tasks[0])
+    finally:
+        for task in tasks:
+            if not task.done():
+                await _cancel(task)
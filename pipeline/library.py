@@ -0,0 +1,134 @@
+import difflib
+import functools
+import json
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from config import SOURCE_LIBRARY_PATH
+
+
+# Minimum similarity for a fuzzy match to be accepted without asking
+FUZZY_MATCH_THRESHOLD = 0.85
+# Minimum similarity for a title to be offered as a suggestion
+SUGGESTION_THRESHOLD = 0.5
+# Score given to a partial name whose words all appear in a title ("romeo")
+PARTIAL_MATCH_SCORE = 0.75
+# Fuzzy candidates scored with difflib after trigram pre-filtering
+FUZZY_CANDIDATES = 25
+
+_LEADING_ARTICLE = re.compile(r'^(the|a|an) ')
+
+
+class SourceNotFoundError(LookupError):
+
+    def __init__(self, name: str, suggestions: list):
+        self.name = name
+        self.suggestions = suggestions
+        message = f"Unknown source '{name}'"
+        if suggestions:
+            message += f". Did you mean: {', '.join(suggestions)}?"
+        super().__init__(message)
+
+
+def normalize_title(text: str) -> str:
+    """Lowercase, strip accents and punctuation, spell out '&' and drop a leading article."""
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    text = text.replace('&', ' and ').replace('_', ' ')
+    text = re.sub(r'[^a-z0-9 ]+', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return _LEADING_ARTICLE.sub('', text)
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SourceLibrary:
+    """In-memory index over the source material database.
+
+    Keys, titles, "title author" pairs and any ``aliases`` listed on an entry
+    are normalized into an exact-match table. Misses fall back to fuzzy
+    matching: a trigram index narrows the library to a few candidates, which
+    are then scored with difflib, so lookups stay fast for thousands of works.
+    """
+
+    def __init__(self, database: dict):
+        self.database = database
+        self._exact = {}
+        self._trigram_index = defaultdict(set)
+
+        for key, entry in database.items():
+            names = [key, entry.get('title', '')]
+            if entry.get('author'):
+                names.append(f"{entry.get('title', '')} {entry['author']}")
+            names.extend(entry.get('aliases', []))
+            for name in names:
+                alias = normalize_title(name)
+                if alias and alias not in self._exact:
+                    self._exact[alias] = key
+                    for gram in _trigrams(alias):
+                        self._trigram_index[gram].add(alias)
+
+    @classmethod
+    def from_file(cls, path: str = SOURCE_LIBRARY_PATH) -> 'SourceLibrary':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.database)
+
+    def __contains__(self, name: str) -> bool:
+        return self.resolve(name) is not None
+
+    def entries(self) -> list:
+        return list(self.database.items())
+
+    def _ranked(self, query: str) -> list:
+        """Return ``[(score, key)]`` for the best fuzzy candidates, one per work."""
+        shared = Counter()
+        for gram in _trigrams(query):
+            for alias in self._trigram_index.get(gram, ()):
+                shared[alias] += 1
+
+        words = set(query.split())
+        best = {}
+        for alias, _ in shared.most_common(FUZZY_CANDIDATES):
+            score = difflib.SequenceMatcher(None, query, alias).ratio()
+            if words <= set(alias.split()):
+                score = max(score, PARTIAL_MATCH_SCORE)
+            key = self._exact[alias]
+            if score > best.get(key, 0.0):
+                best[key] = score
+        return sorted(((score, key) for key, score in best.items()), reverse=True)
+
+    def resolve(self, name: str):
+        """Return the key of the work ``name`` refers to, or None."""
+        query = normalize_title(name)
+        if not query:
+            return None
+        if query in self._exact:
+            return self._exact[query]
+
+        ranked = self._ranked(query)
+        if ranked and ranked[0][0] >= FUZZY_MATCH_THRESHOLD:
+            return ranked[0][1]
+        return None
+
+    def suggest(self, name: str, limit: int = 3) -> list:
+        ranked = self._ranked(normalize_title(name))
+        return [self.database[key]['title'] for score, key in ranked[:limit] if score >= SUGGESTION_THRESHOLD]
+
+    def find(self, name: str) -> tuple:
+        """Return ``(key, entry)`` for ``name``, raising SourceNotFoundError with suggestions."""
+        key = self.resolve(name)
+        if key is None:
+            raise SourceNotFoundError(name, self.suggest(name))
+        return key, self.database[key]
+
+
+@functools.lru_cache(maxsize=None)
+def get_source_library(path: str = SOURCE_LIBRARY_PATH) -> SourceLibrary:
+    return SourceLibrary.from_file(path)
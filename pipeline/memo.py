@@ -0,0 +1,57 @@
+import hashlib
+import json
+
+from config import MODEL_NAME, TEMPERATURE, MAX_OUTPUT_TOKENS, PROMPT_FORMAT
+from prompts.templates import (
+    SOURCE_ABSTRACTION_PROMPT,
+    SOURCE_CHUNK_SUMMARY_PROMPT,
+    SOURCE_SUMMARIES_HEADER,
+    WORLD_DEFINITION_PROMPT,
+    CHARACTER_TRANSFORM_PROMPT,
+    CHARACTER_SINGLE_TRANSFORM_PROMPT,
+    GROUP_DYNAMICS_PROMPT,
+    PLOT_RECONSTRUCTION_PROMPT
+)
+
+
+# Prompt templates each memoized stage renders; editing one invalidates
+# that stage's stored results.
+STAGE_TEMPLATES = {
+    "source_abstraction": (SOURCE_ABSTRACTION_PROMPT,),
+    "source_abstraction_mapreduce": (SOURCE_ABSTRACTION_PROMPT, SOURCE_CHUNK_SUMMARY_PROMPT, SOURCE_SUMMARIES_HEADER),
+    "world_definition": (WORLD_DEFINITION_PROMPT,),
+    "character_transformation": (
+        CHARACTER_TRANSFORM_PROMPT,
+        CHARACTER_SINGLE_TRANSFORM_PROMPT,
+        GROUP_DYNAMICS_PROMPT
+    ),
+    "plot_reconstruction": (PLOT_RECONSTRUCTION_PROMPT,)
+}
+
+
+def _digest(data) -> str:
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def template_version(stage: str) -> str:
+    return _digest(STAGE_TEMPLATES[stage])[:16]
+
+
+def model_settings() -> dict:
+    return {
+        "model": MODEL_NAME,
+        "temperature": TEMPERATURE,
+        "max_output_tokens": MAX_OUTPUT_TOKENS,
+        "prompt_format": PROMPT_FORMAT
+    }
+
+
+def stage_fingerprint(stage: str, inputs: dict) -> str:
+    """Fingerprint a stage run by its inputs, prompt template version and model settings."""
+    return _digest({
+        "stage": stage,
+        "inputs": inputs,
+        "template": template_version(stage),
+        "settings": model_settings()
+    })
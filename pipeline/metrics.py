@@ -0,0 +1,225 @@
+import contextlib
+import contextvars
+import threading
+import time
+
+from pipeline.tracing import span
+
+
+STAGE_COUNTERS = (
+    "wall_time_s", "llm_time_s", "rate_limit_wait_s", "llm_calls", "prompt_tokens",
+    "completion_tokens", "retries", "hedged_calls", "cache_hits", "cache_misses"
+)
+
+# Prometheus gauge name and help text for each per-stage counter
+PROMETHEUS_STAGE_METRICS = {
+    "wall_time_s": ("narrative_stage_wall_seconds", "Wall time spent in the stage."),
+    "llm_time_s": ("narrative_stage_llm_seconds", "Time spent waiting on LLM responses."),
+    "rate_limit_wait_s": ("narrative_stage_rate_limit_wait_seconds", "Time spent waiting for rate-limit budget."),
+    "llm_calls": ("narrative_stage_llm_calls", "LLM requests sent."),
+    "prompt_tokens": ("narrative_stage_prompt_tokens", "Prompt tokens used."),
+    "completion_tokens": ("narrative_stage_completion_tokens", "Completion tokens used."),
+    "retries": ("narrative_stage_retries", "LLM calls retried."),
+    "hedged_calls": ("narrative_stage_hedged_calls", "Hedge requests sent."),
+    "cache_hits": ("narrative_stage_cache_hits", "LLM response cache hits."),
+    "cache_misses": ("narrative_stage_cache_misses", "LLM response cache misses."),
+}
+
+
+class RunMetrics:
+    """LLM usage counters for a single pipeline run.
+
+    Every counter is also attributed to the stage active in ``stage_scope``
+    when it is recorded; see ``stage_metrics``.
+    """
+
+    def __init__(self):
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.prompt_sizes = {}
+        self.stage_cache = {}
+        self.rate_limit_wait_s = 0.0
+        self.hedged_calls = 0
+        self.hedge_wins = 0
+        self.llm_time_s = 0.0
+        self.retries = 0
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def _count(self, **counters):
+        """Add ``counters`` to the run totals and to the current stage. Call with the lock held."""
+        for name, value in counters.items():
+            setattr(self, name, getattr(self, name) + value)
+        stage = current_stage()
+        if stage is not None:
+            stats = self._stage(stage)
+            for name, value in counters.items():
+                stats[name] += value
+
+    def _stage(self, stage: str) -> dict:
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = {name: 0 for name in STAGE_COUNTERS}
+        return stats
+
+    def record_response(self, response, latency_s: float = 0.0):
+        self.record_usage(getattr(response, 'usage', None), latency_s)
+
+    def record_usage(self, usage, latency_s: float = 0.0):
+        with self._lock:
+            self._count(
+                llm_calls=1,
+                llm_time_s=latency_s,
+                prompt_tokens=(getattr(usage, 'prompt_tokens', 0) or 0) if usage is not None else 0,
+                completion_tokens=(getattr(usage, 'completion_tokens', 0) or 0) if usage is not None else 0
+            )
+
+    def record_cache(self, hit: bool):
+        with self._lock:
+            if hit:
+                self._count(cache_hits=1)
+            else:
+                self._count(cache_misses=1)
+
+    def record_rate_limit_wait(self, seconds: float):
+        with self._lock:
+            self._count(rate_limit_wait_s=seconds)
+
+    def record_retry(self):
+        with self._lock:
+            self._count(retries=1)
+
+    def record_hedge(self, won: bool):
+        with self._lock:
+            self._count(hedged_calls=1)
+            if won:
+                self.hedge_wins += 1
+
+    def record_stage_time(self, stage: str, seconds: float):
+        with self._lock:
+            self._stage(stage)["wall_time_s"] += seconds
+
+    def record_stage_cache(self, stage: str, hit: bool):
+        with self._lock:
+            self.stage_cache[stage] = "hit" if hit else "miss"
+            self._stage(stage)
+
+    def record_prompt_size(self, stage: str, baseline_tokens: int, sent_tokens: int):
+        with self._lock:
+            sizes = self.prompt_sizes.setdefault(stage, {"baseline_tokens": 0, "sent_tokens": 0})
+            sizes["baseline_tokens"] += baseline_tokens
+            sizes["sent_tokens"] += sent_tokens
+
+    def prompt_savings(self) -> dict:
+        savings = {}
+        for stage, sizes in self.prompt_sizes.items():
+            saved = sizes["baseline_tokens"] - sizes["sent_tokens"]
+            savings[stage] = {
+                **sizes,
+                "saved_tokens": saved,
+                "saved_pct": round(100 * saved / sizes["baseline_tokens"], 1) if sizes["baseline_tokens"] else 0.0
+            }
+        return savings
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def usage(self) -> dict:
+        return {
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "llm_time_s": round(self.llm_time_s, 3),
+            "rate_limit_wait_s": round(self.rate_limit_wait_s, 3),
+            "retries": self.retries,
+            "hedged_calls": self.hedged_calls,
+            "hedge_wins": self.hedge_wins
+        }
+
+    def stage_metrics(self) -> dict:
+        """Per-stage wall time, LLM time, tokens, retries and cache/memo hits, in execution order."""
+        with self._lock:
+            stages = {}
+            for stage, stats in self.stages.items():
+                stages[stage] = {
+                    name: round(value, 3) if isinstance(value, float) else value
+                    for name, value in stats.items()
+                }
+                stages[stage]["memo"] = self.stage_cache.get(stage)
+            return stages
+
+    def cache_stats(self) -> dict:
+        return {"hits": self.cache_hits, "misses": self.cache_misses}
+
+
+_current_run = contextvars.ContextVar("current_run_metrics", default=None)
+_current_stage = contextvars.ContextVar("current_pipeline_stage", default=None)
+
+
+@contextlib.contextmanager
+def track_run(metrics: RunMetrics = None):
+    metrics = metrics or RunMetrics()
+    token = _current_run.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_run.reset(token)
+
+
+def current_run():
+    return _current_run.get()
+
+
+@contextlib.contextmanager
+def stage_scope(stage: str, **span_args):
+    """Attribute LLM calls made inside the block (and tasks it starts) to ``stage``, traced as a span."""
+    token = _current_stage.set(stage)
+    start = time.perf_counter()
+    try:
+        with span(stage, cat="stage", **span_args):
+            yield stage
+    finally:
+        _current_stage.reset(token)
+        run = current_run()
+        if run is not None:
+            run.record_stage_time(stage, time.perf_counter() - start)
+
+
+async def run_in_stage(stage: str, awaitable, **span_args):
+    with stage_scope(stage, **span_args):
+        return await awaitable
+
+
+def current_stage():
+    return _current_stage.get()
+
+
+def _prometheus_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_prometheus(stages: dict, wall_time_s: float, finished_at: float) -> str:
+    """Render ``stage_metrics()`` output in the Prometheus text exposition format."""
+    lines = []
+
+    def gauge(name: str, help_text: str, samples: list):
+        lines.append(f"# HELP {name} {help_text} Last pipeline run.")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{_prometheus_label(val)}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+    for counter, (name, help_text) in PROMETHEUS_STAGE_METRICS.items():
+        gauge(name, help_text, [({"stage": stage}, stats[counter]) for stage, stats in stages.items()])
+    gauge("narrative_stage_memo_hit", "1 if the stage result was reused from the stage memo.", [
+        ({"stage": stage}, int(stats["memo"] == "hit"))
+        for stage, stats in stages.items() if stats.get("memo") is not None
+    ])
+    gauge("narrative_run_wall_seconds", "Wall time of the whole run.", [({}, round(wall_time_s, 3))])
+    gauge("narrative_run_finished_timestamp_seconds", "Unix time the run finished.", [({}, round(finished_at, 3))])
+    return "\n".join(lines) + "\n"
@@ -1,79 +1,310 @@
+import asyncio
+import concurrent.futures
+import contextlib
 import json
 import os
-from datetime import datetime
+import time
 from rich.console import Console
 from rich.panel import Panel
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
-from pipeline.source_abstraction import extract_source_elements, load_source_material
-from pipeline.world_definition import define_target_world
-from pipeline.character_transform import transform_characters, create_character_mapping_table
-from pipeline.plot_reconstruction import reconstruct_plot, validate_cause_effect_chain
-from pipeline.consistency_check import check_consistency, calculate_overall_score, apply_fixes
+from pipeline.source_abstraction import (
+    extract_source_elements_async,
+    extract_source_elements_from_file_async,
+    file_sha256,
+    load_source_material
+)
+from pipeline.world_definition import define_target_world_async
+from pipeline.character_transform import (
+    transform_characters_async,
+    transform_characters_fanout_async,
+    create_character_mapping_table
+)
+from pipeline.plot_reconstruction import reconstruct_plot_async, validate_cause_effect_chain
+from pipeline.consistency_check import (
+    check_consistency_async,
+    recheck_consistency_async,
+    calculate_overall_score,
+    apply_fixes_async
+)
+from config import (
+    STORY_MODE,
+    CHARACTER_MODE,
+    CHARACTER_FANOUT_RETRIES,
+    CONSISTENCY_INCREMENTAL_RECHECK,
+    SOURCE_MAPREDUCE_MIN_BYTES,
+    METRICS_PROMETHEUS_TEXTFILE,
+    SOURCE_CHUNK_CHARS,
+    SOURCE_CHUNK_CONCURRENCY,
+    SOURCE_SUMMARY_MAX_TOKENS,
+    SOURCE_REDUCE_MAX_CHARS
+)
 from pipeline.output_generator import (
-    generate_story, 
-    generate_transformation_diff,
+    generate_story_async, 
+    generate_story_stream_async,
+    generate_story_sections_async,
+    StoryStreamWriter,
+    generate_transformation_diff_async,
+    fallback_transformation_diff,
     compile_artifacts,
     format_story_markdown,
     generate_pdf
 )
 from pipeline.visualization import generate_visualization_report
+from pipeline.cache import get_response_cache, get_stage_cache, cache_bypassed
+from pipeline.memo import stage_fingerprint
+from pipeline.source_index import lookup_abstraction
+from pipeline.metrics import RunMetrics, track_run, run_in_stage, format_prometheus
+from pipeline.tracing import span, traced
+from pipeline.rendering import get_thread_pool, get_process_pool, timed_call
+from pipeline.utils import write_text_atomic
+from pipeline.checkpoint import CheckpointStore
+from pipeline.clients import close_async_clients
+from pipeline.cassette import active_cassette
 from pipeline.schemas import (
     validate_source_abstraction,
     validate_world_definition,
     validate_character_transformation
 )
 
-console = Console()
+_default_console = Console()
 
 
 class NarrativeTransformer:
     
-    CHECKPOINT_FILE = "checkpoint.json"
+    CHECKPOINT_DIR = "checkpoints"
+    LEGACY_CHECKPOINT_FILE = "checkpoint.json"
+    STAGE_ARTIFACTS = {
+        1: ('source_analysis',),
+        2: ('world',),
+        3: ('characters',),
+        4: ('plot',),
+        5: ('consistency', 'plot', 'characters')
+    }
+    STORY_MODES = ("single", "stream", "sections")
+    CHARACTER_MODES = ("single", "fanout")
     
-    def __init__(self, output_dir: str = "output"):
+    def __init__(self, output_dir: str = "output", use_cache: bool = True, console: Console = None,
+                 story_mode: str = STORY_MODE, story_echo=None, character_mode: str = CHARACTER_MODE):
+        if story_mode not in self.STORY_MODES:
+            raise ValueError(f"Unknown story mode '{story_mode}'. Choose from: {', '.join(self.STORY_MODES)}")
+        if character_mode not in self.CHARACTER_MODES:
+            raise ValueError(f"Unknown character mode '{character_mode}'. "
+                             f"Choose from: {', '.join(self.CHARACTER_MODES)}")
         self.output_dir = output_dir
+        # A cassette must see every LLM call, so caches are bypassed while one is active
+        self.use_cache = use_cache and active_cassette() is None
+        self.console = console or _default_console
+        self.story_mode = story_mode
+        self.story_echo = story_echo
+        self.character_mode = character_mode
+        self.story_stream_stats = None
+        self.story_sections = []
+        self.metrics = RunMetrics()
+        self.render_timings = {}
+        self.render_errors = {}
+        self._pending_outputs = {}
         self.artifacts = {}
-        self._checkpoint_path = os.path.join(output_dir, self.CHECKPOINT_FILE)
+        self.checkpoints = CheckpointStore(
+            os.path.join(output_dir, self.CHECKPOINT_DIR),
+            legacy_path=os.path.join(output_dir, self.LEGACY_CHECKPOINT_FILE)
+        )
     
+    @traced(cat="checkpoint")
     def _save_checkpoint(self, stage: int, source_name: str, target_setting: str):
-        os.makedirs(self.output_dir, exist_ok=True)
-        checkpoint = {
-            "completed_stage": stage,
-            "source_name": source_name,
-            "target_setting": target_setting,
-            "artifacts": self.artifacts,
-            "timestamp": datetime.now().isoformat()
-        }
-        with open(self._checkpoint_path, 'w', encoding='utf-8') as f:
-            json.dump(checkpoint, f, indent=2, ensure_ascii=False)
-        console.print(f"  [dim]📁 Checkpoint saved (stage {stage})[/dim]")
+        if stage == 1 or not self.checkpoints.exists():
+            self.checkpoints.begin(source_name, target_setting)
+        self.checkpoints.save_stage(stage, {key: self.artifacts[key] for key in self.STAGE_ARTIFACTS[stage]})
+        self.console.print(f"  [dim]📁 Checkpoint saved (stage {stage})[/dim]")
     
     def _load_checkpoint(self) -> dict:
-        if os.path.exists(self._checkpoint_path):
-            with open(self._checkpoint_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return None
+        manifest = self.checkpoints.manifest()
+        if manifest is None:
+            return None
+        return {
+            "completed_stage": manifest['completed_stage'],
+            "source_name": manifest['source_name'],
+            "target_setting": manifest['target_setting'],
+            "artifacts": self.checkpoints.load_artifacts(),
+            "timestamp": manifest['timestamp']
+        }
     
     def _clear_checkpoint(self):
-        if os.path.exists(self._checkpoint_path):
-            os.remove(self._checkpoint_path)
+        self.checkpoints.clear()
     
     def can_resume(self) -> bool:
-        return os.path.exists(self._checkpoint_path)
+        return self.checkpoints.exists()
     
     def get_checkpoint_info(self) -> dict:
-        checkpoint = self._load_checkpoint()
-        if checkpoint:
+        manifest = self.checkpoints.manifest()
+        if manifest:
             return {
-                "stage": checkpoint.get("completed_stage"),
-                "source": checkpoint.get("source_name"),
-                "target": checkpoint.get("target_setting"),
-                "timestamp": checkpoint.get("timestamp")
+                "stage": manifest.get("completed_stage"),
+                "source": manifest.get("source_name"),
+                "target": manifest.get("target_setting"),
+                "timestamp": manifest.get("timestamp")
             }
         return None
         
-    def run_pipeline(self, source_name: str, target_setting: str, source_text: str = None, resume: bool = False) -> dict:
+    def run_pipeline(self, source_name: str, target_setting: str, source_text: str = None, resume: bool = False,
+                     source_file: str = None) -> dict:
+        async def _run():
+            try:
+                return await self.run_pipeline_async(source_name, target_setting, source_text, resume, source_file)
+            finally:
+                await close_async_clients()
+        
+        return asyncio.run(_run())
+    
+    async def run_pipeline_async(self, source_name: str, target_setting: str, source_text: str = None,
+                                 resume: bool = False, source_file: str = None) -> dict:
+        """Run all six stages.
+
+        Custom material is passed either as ``source_text`` or as a
+        ``source_file`` path; files over SOURCE_MAPREDUCE_MIN_BYTES are
+        abstracted chunk by chunk without being read into memory whole.
+        """
+        cache_context = contextlib.nullcontext() if self.use_cache else cache_bypassed()
+        self.metrics = RunMetrics()
+        self.story_stream_stats = None
+        self.story_sections = []
+        start = time.perf_counter()
+        with cache_context, track_run(self.metrics), span("run_pipeline", source=source_name, target=target_setting):
+            cache_enabled = get_response_cache() is not None
+            result = await self._run_pipeline_async(source_name, target_setting, source_text, resume, source_file)
+        wall_time_s = time.perf_counter() - start
+        
+        cache_stats = {"enabled": cache_enabled, **self.metrics.cache_stats()}
+        if cache_enabled:
+            self.console.print(f"[dim]LLM cache: {cache_stats['hits']} hit(s), {cache_stats['misses']} miss(es)[/dim]")
+        else:
+            self.console.print("[dim]LLM cache: bypassed[/dim]")
+        
+        stage_cache = dict(self.metrics.stage_cache)
+        if stage_cache:
+            hits = [stage for stage, status in stage_cache.items() if status == "hit"]
+            self.console.print(f"[dim]Stage memo: {len(hits)}/{len(stage_cache)} hit(s)"
+                               + (f" ({', '.join(hits)})" if hits else "") + "[/dim]")
+        
+        savings = self.metrics.prompt_savings()
+        if savings:
+            baseline = sum(stage['baseline_tokens'] for stage in savings.values())
+            sent = sum(stage['sent_tokens'] for stage in savings.values())
+            per_stage = ", ".join(f"{name} {stage['saved_pct']}%" for name, stage in savings.items())
+            self.console.print(f"[dim]Prompt serialization saved ~{baseline - sent} input tokens ({per_stage})[/dim]")
+        
+        stage_metrics = self.metrics.stage_metrics()
+        self._print_stage_metrics(stage_metrics)
+        
+        result['cache_stats'] = cache_stats
+        result['stage_cache'] = stage_cache
+        result['usage'] = self.metrics.usage()
+        result['prompt_savings'] = savings
+        result['stage_metrics'] = stage_metrics
+        result['wall_time_s'] = round(wall_time_s, 3)
+        self._write_metrics(result)
+        return result
+    
+    def _print_stage_metrics(self, stage_metrics: dict):
+        if not stage_metrics:
+            return
+        self.console.print("[dim]Stage metrics:[/dim]")
+        for stage, stats in stage_metrics.items():
+            memo = " (memo hit)" if stats['memo'] == "hit" else ""
+            self.console.print(
+                f"[dim]  {stage}{memo}: {stats['wall_time_s']:.2f}s wall, {stats['llm_time_s']:.2f}s LLM, "
+                f"{stats['llm_calls']} call(s), {stats['prompt_tokens']}+{stats['completion_tokens']} tokens, "
+                f"{stats['retries']} retr{'y' if stats['retries'] == 1 else 'ies'}[/dim]"
+            )
+    
+    def _write_metrics(self, result: dict):
+        """Write metrics.json to the output directory and, if configured, the Prometheus textfile."""
+        metrics = {
+            "wall_time_s": result['wall_time_s'],
+            "usage": result['usage'],
+            "cache": result['cache_stats'],
+            "stages": result['stage_metrics']
+        }
+        os.makedirs(self.output_dir, exist_ok=True)
+        write_text_atomic(os.path.join(self.output_dir, "metrics.json"), json.dumps(metrics, indent=2))
+        
+        if METRICS_PROMETHEUS_TEXTFILE:
+            write_text_atomic(METRICS_PROMETHEUS_TEXTFILE, format_prometheus(
+                result['stage_metrics'], result['wall_time_s'], time.time()
+            ))
+    
+    async def _memoized_stage(self, stage: str, inputs: dict, compute, accept=None):
+        """Return the stored result for ``stage`` with these inputs, or run ``compute`` and store it.
+
+        A result that ``accept`` rejects is returned but not stored, so a later
+        run computes it afresh.
+        """
+        stage_cache = get_stage_cache()
+        if stage_cache is None:
+            return await run_in_stage(stage, compute())
+        
+        fingerprint = stage_fingerprint(stage, inputs)
+        result = stage_cache.get(fingerprint)
+        self.metrics.record_stage_cache(stage, hit=result is not None)
+        if result is not None:
+            self.console.print(f"  [dim]↺ {stage} reused from an earlier run[/dim]")
+            return result
+        
+        result = await run_in_stage(stage, compute())
+        if accept is None or accept(result):
+            stage_cache.put(fingerprint, stage, result)
+        return result
+    
+    def _validated_abstraction(self, source_analysis: dict) -> dict:
+        valid, source_analysis, error = validate_source_abstraction(source_analysis)
+        if not valid:
+            self.console.print(f"  [yellow]⚠ Schema validation warning: {error}[/yellow]")
+        return source_analysis
+    
+    async def _abstract_source_async(self, source_name: str, source_text: str = None, source_file: str = None) -> dict:
+        if source_file and os.path.getsize(source_file) > SOURCE_MAPREDUCE_MIN_BYTES:
+            async def map_reduce():
+                source_analysis, stats = await extract_source_elements_from_file_async(source_file)
+                self.console.print(f"  → Summarized {stats['chunks']} chunks "
+                                   f"({stats['condense_steps']} condense step(s)) before abstraction")
+                return self._validated_abstraction(source_analysis)
+            
+            return await self._memoized_stage(
+                "source_abstraction_mapreduce",
+                {
+                    "source_sha256": file_sha256(source_file),
+                    # Every setting that shapes the chunk summaries or their reduction; the
+                    # concurrency sets the window after which a condense step can fire
+                    "mapreduce_min_bytes": SOURCE_MAPREDUCE_MIN_BYTES,
+                    "chunk_chars": SOURCE_CHUNK_CHARS,
+                    "chunk_concurrency": SOURCE_CHUNK_CONCURRENCY,
+                    "summary_max_tokens": SOURCE_SUMMARY_MAX_TOKENS,
+                    "reduce_max_chars": SOURCE_REDUCE_MAX_CHARS
+                },
+                map_reduce
+            )
+        
+        if source_file:
+            with open(source_file, 'r', encoding='utf-8') as f:
+                source_material = f.read()
+        elif source_text:
+            source_material = source_text
+        else:
+            source_material = load_source_material(source_name)
+        
+        source_analysis = lookup_abstraction(source_material) if self.use_cache else None
+        if source_analysis is not None:
+            self.metrics.record_stage_cache("source_abstraction", hit=True)
+            self.console.print("  [dim]↺ source_abstraction loaded from the abstraction index[/dim]")
+            return source_analysis
+        
+        async def abstract_source():
+            return self._validated_abstraction(await extract_source_elements_async(source_material))
+        
+        return await self._memoized_stage("source_abstraction", {"source_material": source_material}, abstract_source)
+    
+    async def _run_pipeline_async(self, source_name: str, target_setting: str, source_text: str = None,
+                                  resume: bool = False, source_file: str = None) -> dict:
         start_stage = 1
         checkpoint = None
         
@@ -83,8 +314,8 @@ class NarrativeTransformer:
             self.artifacts = checkpoint['artifacts']
             source_name = checkpoint['source_name']
             target_setting = checkpoint['target_setting']
-            console.print(f"[yellow]Resuming from stage {start_stage} (checkpoint: {checkpoint['timestamp']})[/yellow]")
-        console.print(Panel.fit(
+            self.console.print(f"[yellow]Resuming from stage {start_stage} (checkpoint: {checkpoint['timestamp']})[/yellow]")
+        self.console.print(Panel.fit(
             f"[bold cyan]AI Narrative Transformation System[/bold cyan]\n"
             f"Source: {source_name}\n"
             f"Target: {target_setting}",
@@ -94,70 +325,82 @@ class NarrativeTransformer:
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
-            console=console
+            console=self.console
         ) as progress:
             
             if start_stage <= 1:
                 task = progress.add_task("[cyan]Stage 1: Extracting source elements...", total=None)
                 
-                if source_text:
-                    source_material = source_text
-                else:
-                    source_material = load_source_material(source_name)
-                
-                source_analysis = extract_source_elements(source_material)
-                
-                valid, source_analysis, error = validate_source_abstraction(source_analysis)
-                if not valid:
-                    console.print(f"  [yellow]⚠ Schema validation warning: {error}[/yellow]")
+                source_analysis = await self._abstract_source_async(source_name, source_text, source_file)
                 
                 self.artifacts['source_analysis'] = source_analysis
                 
                 progress.update(task, description="[green]✓ Stage 1: Source abstraction complete")
-                console.print(f"  → Extracted {len(source_analysis.get('character_archetypes', []))} characters, "
+                self.console.print(f"  → Extracted {len(source_analysis.get('character_archetypes', []))} characters, "
                              f"{len(source_analysis.get('core_themes', []))} themes")
                 self._save_checkpoint(1, source_name, target_setting)
             else:
                 source_analysis = self.artifacts.get('source_analysis', {})
-                console.print("[dim]Stage 1: Skipped (loaded from checkpoint)[/dim]")
+                self.console.print("[dim]Stage 1: Skipped (loaded from checkpoint)[/dim]")
             
             if start_stage <= 2:
                 task = progress.add_task("[cyan]Stage 2: Defining target world...", total=None)
                 
-                world = define_target_world(
-                    target_setting,
-                    source_analysis.get('core_themes', [])
-                )
+                async def define_world():
+                    world = await define_target_world_async(
+                        target_setting,
+                        source_analysis.get('core_themes', [])
+                    )
+                    
+                    # Validate Stage 2 output
+                    valid, world, error = validate_world_definition(world)
+                    if not valid:
+                        self.console.print(f"  [red]✗ Stage 2 validation failed: {error}[/red]")
+                        raise ValueError(f"Stage 2 validation failed: {error}")
+                    return world
                 
-                # Validate Stage 2 output
-                valid, world, error = validate_world_definition(world)
-                if not valid:
-                    console.print(f"  [red]✗ Stage 2 validation failed: {error}[/red]")
-                    raise ValueError(f"Stage 2 validation failed: {error}")
+                world = await self._memoized_stage(
+                    "world_definition",
+                    {"target_setting": target_setting, "themes": source_analysis.get('core_themes', [])},
+                    define_world
+                )
                 
                 self.artifacts['world'] = world
                 
                 progress.update(task, description="[green]✓ Stage 2: World definition complete")
-                console.print(f"  → Created world: {world.get('world_name', 'Target World')}")
-                console.print(f"  → {len(world.get('internal_rules', []))} internal rules defined")
+                self.console.print(f"  → Created world: {world.get('world_name', 'Target World')}")
+                self.console.print(f"  → {len(world.get('internal_rules', []))} internal rules defined")
                 self._save_checkpoint(2, source_name, target_setting)
             else:
                 world = self.artifacts.get('world', {})
-                console.print("[dim]Stage 2: Skipped (loaded from checkpoint)[/dim]")
+                self.console.print("[dim]Stage 2: Skipped (loaded from checkpoint)[/dim]")
             
             if start_stage <= 3:
                 task = progress.add_task("[cyan]Stage 3: Transforming characters...", total=None)
                 
-                characters = transform_characters(
-                    source_analysis.get('character_archetypes', []),
-                    world
-                )
+                async def transform_cast():
+                    transform = (transform_characters_fanout_async if self.character_mode == "fanout"
+                                 else transform_characters_async)
+                    characters = await transform(
+                        source_analysis.get('character_archetypes', []),
+                        world
+                    )
+                    
+                    # Validate Stage 3 output
+                    valid, characters, error = validate_character_transformation(characters)
+                    if not valid:
+                        self.console.print(f"  [red]✗ Stage 3 validation failed: {error}[/red]")
+                        raise ValueError(f"Stage 3 validation failed: {error}")
+                    return characters
                 
-                # Validate Stage 3 output
-                valid, characters, error = validate_character_transformation(characters)
-                if not valid:
-                    console.print(f"  [red]✗ Stage 3 validation failed: {error}[/red]")
-                    raise ValueError(f"Stage 3 validation failed: {error}")
+                character_inputs = {
+                    "characters": source_analysis.get('character_archetypes', []),
+                    "world": world,
+                    "mode": self.character_mode
+                }
+                if self.character_mode == "fanout":
+                    character_inputs["retries"] = CHARACTER_FANOUT_RETRIES
+                characters = await self._memoized_stage("character_transformation", character_inputs, transform_cast)
                 
                 self.artifacts['characters'] = characters
                 
@@ -167,32 +410,37 @@ class NarrativeTransformer:
                 )
                 
                 progress.update(task, description="[green]✓ Stage 3: Character transformation complete")
-                console.print(f"  → Transformed {len(characters.get('transformed_characters', []))} characters")
+                self.console.print(f"  → Transformed {len(characters.get('transformed_characters', []))} characters")
                 self._save_checkpoint(3, source_name, target_setting)
             else:
                 characters = self.artifacts.get('characters', {})
-                console.print("[dim]Stage 3: Skipped (loaded from checkpoint)[/dim]")
+                self.console.print("[dim]Stage 3: Skipped (loaded from checkpoint)[/dim]")
             
             if start_stage <= 4:
                 task = progress.add_task("[cyan]Stage 4: Reconstructing plot...", total=None)
                 
-                plot = reconstruct_plot(
-                    source_analysis.get('plot_structure', {}),
-                    characters,
-                    world
+                plot = await self._memoized_stage(
+                    "plot_reconstruction",
+                    {"plot_structure": source_analysis.get('plot_structure', {}), "characters": characters, "world": world},
+                    lambda: reconstruct_plot_async(
+                        source_analysis.get('plot_structure', {}),
+                        characters,
+                        world
+                    ),
+                    accept=lambda plot: validate_cause_effect_chain(plot)['valid']
                 )
                 self.artifacts['plot'] = plot
                 
                 validation = validate_cause_effect_chain(plot)
                 
                 progress.update(task, description="[green]✓ Stage 4: Plot reconstruction complete")
-                console.print(f"  → Plot valid: {validation['valid']}")
+                self.console.print(f"  → Plot valid: {validation['valid']}")
                 if not validation['valid']:
-                    console.print(f"  → Issues: {validation['issues']}")
+                    self.console.print(f"  → Issues: {validation['issues']}")
                 self._save_checkpoint(4, source_name, target_setting)
             else:
                 plot = self.artifacts.get('plot', {})
-                console.print("[dim]Stage 4: Skipped (loaded from checkpoint)[/dim]")
+                self.console.print("[dim]Stage 4: Skipped (loaded from checkpoint)[/dim]")
             
             if start_stage <= 5:
                 task = progress.add_task("[cyan]Stage 5: Checking consistency...", total=None)
@@ -203,12 +451,12 @@ class NarrativeTransformer:
                 unresolved_issues = []
                 
                 # Initial consistency check
-                consistency = check_consistency(
+                consistency = await run_in_stage("consistency_check", check_consistency_async(
                     source_analysis,
                     world,
                     characters,
                     plot
-                )
+                ))
                 
                 score_info = calculate_overall_score(consistency)
                 consistency['overall_score'] = score_info
@@ -216,17 +464,44 @@ class NarrativeTransformer:
                 # Re-validation loop: apply fixes and re-check
                 while consistency.get('required_fixes') and retry_count < MAX_FIX_RETRIES:
                     retry_count += 1
-                    console.print(f"  [yellow]→ Applying fixes (attempt {retry_count}/{MAX_FIX_RETRIES})...[/yellow]")
-                    
-                    plot, characters, fixes = apply_fixes(consistency, plot, characters)
+                    self.console.print(f"  [yellow]→ Applying fixes (attempt {retry_count}/{MAX_FIX_RETRIES})...[/yellow]")
                     
-                    # Re-run consistency check after fixes
-                    consistency = check_consistency(
-                        source_analysis,
-                        world,
-                        characters,
-                        plot
+                    before_plot, before_characters = plot, characters
+                    plot, characters, fixes = await run_in_stage(
+                        "consistency_fix",
+                        apply_fixes_async(consistency, plot, characters),
+                        attempt=retry_count
                     )
+                    for fix in fixes:
+                        if fix.get('patched_paths'):
+                            self.console.print(f"  → Patched: {', '.join(fix['patched_paths'])}")
+                        elif fix.get('status') == 'rejected':
+                            self.console.print(f"  [yellow]→ Rejected patch {fix['path']}: {fix['reason']}[/yellow]")
+                    
+                    # Re-check after fixes: only the changed sections and the
+                    # categories tied to the fixed issues, unless disabled
+                    if CONSISTENCY_INCREMENTAL_RECHECK:
+                        consistency = await run_in_stage("consistency_recheck", recheck_consistency_async(
+                            consistency,
+                            source_analysis,
+                            world,
+                            before_plot,
+                            before_characters,
+                            plot,
+                            characters
+                        ), attempt=retry_count)
+                        recheck = consistency['recheck']
+                        self.console.print(
+                            f"  → Re-checked {len(recheck['rescored_categories'])} categories "
+                            f"over {len(recheck['changed_sections'])} changed sections"
+                        )
+                    else:
+                        consistency = await run_in_stage("consistency_check", check_consistency_async(
+                            source_analysis,
+                            world,
+                            characters,
+                            plot
+                        ))
                     score_info = calculate_overall_score(consistency)
                     consistency['overall_score'] = score_info
                 
@@ -234,7 +509,7 @@ class NarrativeTransformer:
                 if consistency.get('required_fixes'):
                     needs_manual_review = True
                     unresolved_issues = consistency.get('required_fixes', [])
-                    console.print(f"  [red]⚠ Unresolved issues after {MAX_FIX_RETRIES} fix attempts[/red]")
+                    self.console.print(f"  [red]⚠ Unresolved issues after {MAX_FIX_RETRIES} fix attempts[/red]")
                     consistency['manual_review'] = {
                         "status": "needs_manual_review",
                         "unresolved_issues": unresolved_issues,
@@ -246,32 +521,61 @@ class NarrativeTransformer:
                 self.artifacts['characters'] = characters
                 
                 progress.update(task, description="[green]✓ Stage 5: Consistency check complete")
-                console.print(f"  → Overall score: {score_info['overall_score']}/10")
-                console.print(f"  → Passed: {score_info['passed']}")
+                self.console.print(f"  → Overall score: {score_info['overall_score']}/10")
+                self.console.print(f"  → Passed: {score_info['passed']}")
                 if needs_manual_review:
-                    console.print(f"  → [yellow]Manual review required for {len(unresolved_issues)} issue(s)[/yellow]")
+                    self.console.print(f"  → [yellow]Manual review required for {len(unresolved_issues)} issue(s)[/yellow]")
                 self._save_checkpoint(5, source_name, target_setting)
             else:
                 consistency = self.artifacts.get('consistency', {})
                 score_info = consistency.get('overall_score', {})
-                console.print("[dim]Stage 5: Skipped (loaded from checkpoint)[/dim]")
+                self.console.print("[dim]Stage 5: Skipped (loaded from checkpoint)[/dim]")
             
             task = progress.add_task("[cyan]Stage 6: Generating story...", total=None)
             
-            story = generate_story(world, characters, plot)
+            metadata = {
+                'source_title': source_analysis.get('title', source_name),
+                'target_world': world.get('world_name', target_setting)
+            }
+            if self.story_mode == "stream":
+                story_call = self._stream_story_async(world, characters, plot, metadata)
+            elif self.story_mode == "sections":
+                story_call = self._generate_story_sections_async(world, characters, plot)
+            else:
+                story_call = generate_story_async(world, characters, plot)
             
-            transformation_diff = generate_transformation_diff(
-                source_analysis,
-                {
-                    'world': world,
-                    'characters': characters,
-                    'plot': plot
-                }
+            # Story and diff are independent: run them concurrently. A failed
+            # diff falls back to an empty one without cancelling the story.
+            story, transformation_diff = await asyncio.gather(
+                run_in_stage("story_generation", story_call),
+                run_in_stage("transformation_diff", generate_transformation_diff_async(
+                    source_analysis,
+                    {
+                        'world': world,
+                        'characters': characters,
+                        'plot': plot
+                    }
+                )),
+                return_exceptions=True
             )
+            if isinstance(story, BaseException):
+                raise story
+            if isinstance(transformation_diff, BaseException):
+                transformation_diff = fallback_transformation_diff()
             
             self.artifacts['transformation_diff'] = transformation_diff
             
             progress.update(task, description="[green]✓ Stage 6: Story generation complete")
+            stats = self.story_stream_stats
+            if stats and stats['cached']:
+                self.console.print("  → Streamed story (cached)")
+            elif stats:
+                throughput = (f"{stats['completion_tokens']} tokens at {stats['tokens_per_sec']} tok/s"
+                              if stats['tokens_per_sec'] is not None else f"{stats['completion_tokens']} tokens")
+                self.console.print(f"  → Streamed story: first token after {stats['time_to_first_token_s']}s, "
+                                   f"{throughput}")
+            if self.story_sections:
+                self.console.print(f"  → Wrote {len(self.story_sections)} story sections concurrently")
         
         self._clear_checkpoint()
         
@@ -284,55 +588,125 @@ class NarrativeTransformer:
             transformation_diff
         )
         
-        metadata = {
-            'source_title': source_analysis.get('title', source_name),
-            'target_world': world.get('world_name', target_setting)
-        }
         formatted_story = format_story_markdown(story, metadata)
         
-        self._save_outputs(formatted_story, all_artifacts, source_name, target_setting)
+        await self._save_outputs(formatted_story, all_artifacts, source_name, target_setting)
         
-        console.print(Panel.fit(
+        self.console.print(Panel.fit(
             "[bold green]Pipeline Complete![/bold green]\n"
             f"Story saved to: {self.output_dir}/story.md\n"
-            f"PDF saved to: {self.output_dir}/story.pdf\n"
-            f"Visualization: {self.output_dir}/visualization.md\n"
-            f"Artifacts saved to: {self.output_dir}/artifacts.json",
+            f"Artifacts saved to: {self.output_dir}/artifacts.json\n"
+            f"Rendering in the background: {self.output_dir}/story.pdf, {self.output_dir}/visualization.md",
             title="Success"
         ))
         
         return {
             'story': formatted_story,
-            'artifacts': all_artifacts
+            'artifacts': all_artifacts,
+            'render_timings': dict(self.render_timings),
+            'story_stream': self.story_stream_stats,
+            'story_sections': self.story_sections
         }
     
-    def _save_outputs(self, story: str, artifacts: dict, source: str, target: str):
+    async def _stream_story_async(self, world: dict, characters: dict, plot: dict, metadata: dict) -> str:
         os.makedirs(self.output_dir, exist_ok=True)
-        
         story_path = os.path.join(self.output_dir, "story.md")
-        with open(story_path, 'w', encoding='utf-8') as f:
-            f.write(story)
+        header = format_story_markdown("", metadata)
         
-        artifacts_path = os.path.join(self.output_dir, "artifacts.json")
-        with open(artifacts_path, 'w', encoding='utf-8') as f:
-            json.dump(artifacts, f, indent=2, ensure_ascii=False)
-        
-        viz_report = generate_visualization_report(artifacts)
-        viz_path = os.path.join(self.output_dir, "visualization.md")
-        with open(viz_path, 'w', encoding='utf-8') as f:
-            f.write(viz_report)
-        
-        summary = self._create_summary(artifacts, source, target)
-        summary_path = os.path.join(self.output_dir, "transformation_summary.md")
-        with open(summary_path, 'w', encoding='utf-8') as f:
-            f.write(summary)
+        with StoryStreamWriter(story_path, header, echo=self.story_echo) as writer:
+            story, self.story_stream_stats = await generate_story_stream_async(
+                world, characters, plot, on_token=writer
+            )
+        return story
+    
+    async def _generate_story_sections_async(self, world: dict, characters: dict, plot: dict) -> str:
+        story, self.story_sections = await generate_story_sections_async(world, characters, plot)
+        return story
+    
+    @traced(cat="render")
+    async def _save_outputs(self, story: str, artifacts: dict, source: str, target: str):
+        """Render all output files concurrently.
+
+        Returns once the primary artifacts (story.md, artifacts.json) are
+        durably on disk. The visualization, summary and PDF keep rendering in
+        the background; ``wait_for_outputs`` (or ``wait_for_outputs_async``)
+        joins them.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.render_timings = {}
+        self.render_errors = {}
+        threads = get_thread_pool()
         
         metadata = artifacts.get('metadata', {})
         if not metadata:
             metadata = {'source_title': source, 'target_world': target}
-        pdf_path = os.path.join(self.output_dir, "story.pdf")
         story_text = story.split('---\n\n', 1)[-1] if '---' in story else story
-        generate_pdf(story_text, metadata, pdf_path)
+        
+        primary = {
+            "story.md": threads.submit(
+                timed_call, write_text_atomic, os.path.join(self.output_dir, "story.md"), story
+            ),
+            "artifacts.json": threads.submit(
+                timed_call, self._write_artifacts, artifacts
+            )
+        }
+        secondary = {
+            "visualization.md": threads.submit(
+                timed_call, self._write_visualization, artifacts
+            ),
+            "transformation_summary.md": threads.submit(
+                timed_call, self._write_summary, artifacts, source, target
+            ),
+            "story.pdf": get_process_pool().submit(
+                timed_call, generate_pdf, story_text, metadata, os.path.join(self.output_dir, "story.pdf")
+            )
+        }
+        
+        self._pending_outputs = secondary
+        
+        for name, future in primary.items():
+            _, self.render_timings[name] = await asyncio.wrap_future(future)
+    
+    def _collect_renders(self):
+        # Only the joining side records results, so the dicts never change under a reader
+        for name, future in self._pending_outputs.items():
+            if not future.done():
+                continue
+            try:
+                _, self.render_timings[name] = future.result()
+            except Exception as e:
+                self.render_errors[name] = str(e)
+    
+    def _report_render_errors(self):
+        for name, error in self.render_errors.items():
+            self.console.print(f"  [yellow]⚠ Failed to render {name}: {error}[/yellow]")
+    
+    def wait_for_outputs(self, timeout: float = None) -> dict:
+        """Block until background renderers finish; return per-file render times."""
+        concurrent.futures.wait(self._pending_outputs.values(), timeout=timeout)
+        self._collect_renders()
+        self._report_render_errors()
+        return dict(self.render_timings)
+    
+    async def wait_for_outputs_async(self, timeout: float = None) -> dict:
+        """Await background renderers without blocking the event loop; return per-file render times."""
+        if self._pending_outputs:
+            await asyncio.wait([asyncio.wrap_future(f) for f in self._pending_outputs.values()], timeout=timeout)
+        self._collect_renders()
+        self._report_render_errors()
+        return dict(self.render_timings)
+    
+    def _write_artifacts(self, artifacts: dict) -> str:
+        artifacts_path = os.path.join(self.output_dir, "artifacts.json")
+        return write_text_atomic(artifacts_path, json.dumps(artifacts, indent=2, ensure_ascii=False))
+    
+    def _write_visualization(self, artifacts: dict) -> str:
+        viz_report = generate_visualization_report(artifacts)
+        return write_text_atomic(os.path.join(self.output_dir, "visualization.md"), viz_report)
+    
+    def _write_summary(self, artifacts: dict, source: str, target: str) -> str:
+        summary = self._create_summary(artifacts, source, target)
+        return write_text_atomic(os.path.join(self.output_dir, "transformation_summary.md"), summary)
     
     def _create_summary(self, artifacts: dict, source: str, target: str) -> str:
         stages = artifacts.get('stages', {})
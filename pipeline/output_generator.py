@@ -1,53 +1,227 @@
+import asyncio
 import json
-from groq import Groq
-from prompts.templates import STORY_GENERATION_PROMPT, TRANSFORMATION_DIFF_PROMPT
-from config import GROQ_API_KEY, MODEL_NAME, TEMPERATURE, MAX_OUTPUT_TOKENS
-from pipeline.utils import parse_llm_json, make_llm_call
+from prompts.templates import STORY_GENERATION_PROMPT, STORY_SECTION_PROMPT, TRANSFORMATION_DIFF_PROMPT
+from config import MODEL_NAME, TEMPERATURE, MAX_OUTPUT_TOKENS, STORY_SECTION_MAX_TOKENS
+from pipeline.utils import (
+    parse_llm_json,
+    make_llm_call,
+    make_llm_call_async,
+    stream_llm_call,
+    stream_llm_call_async
+)
+from pipeline.serialization import to_prompt, PROSE_ONLY_FIELDS
+from pipeline.clients import get_client, get_async_client
 
 
-def generate_story(world: dict, characters: dict, plot: dict) -> str:
-    client = Groq(api_key=GROQ_API_KEY)
-    
+def _build_story_request(world: dict, characters: dict, plot: dict) -> dict:
     prompt = STORY_GENERATION_PROMPT.format(
-        world=json.dumps(world, indent=2),
-        characters=json.dumps(characters.get('transformed_characters', []), indent=2),
-        plot=json.dumps(plot.get('reconstructed_plot', {}), indent=2)
+        world=to_prompt(world, stage='story'),
+        characters=to_prompt(characters.get('transformed_characters', []), stage='story'),
+        plot=to_prompt(plot.get('reconstructed_plot', {}), stage='story')
     )
     
-    return make_llm_call(
-        client=client,
-        model=MODEL_NAME,
-        messages=[
+    return {
+        'model': MODEL_NAME,
+        'messages': [
             {"role": "system", "content": "You are a master storyteller. Write engaging, vivid prose."},
             {"role": "user", "content": prompt}
         ],
-        temperature=0.8,
-        max_tokens=MAX_OUTPUT_TOKENS
+        'temperature': 0.8,
+        'max_tokens': MAX_OUTPUT_TOKENS
+    }
+
+
+def generate_story(world: dict, characters: dict, plot: dict) -> str:
+    return make_llm_call(client=get_client(), **_build_story_request(world, characters, plot))
+
+
+async def generate_story_async(world: dict, characters: dict, plot: dict) -> str:
+    return await make_llm_call_async(client=get_async_client(), **_build_story_request(world, characters, plot))
+
+
+def generate_story_stream(world: dict, characters: dict, plot: dict, on_token=None) -> tuple:
+    return stream_llm_call(
+        client=get_client(),
+        on_token=on_token,
+        **_build_story_request(world, characters, plot)
     )
 
 
-def generate_transformation_diff(original_analysis: dict, transformation: dict) -> dict:
-    client = Groq(api_key=GROQ_API_KEY)
+async def generate_story_stream_async(world: dict, characters: dict, plot: dict, on_token=None) -> tuple:
+    return await stream_llm_call_async(
+        client=get_async_client(),
+        on_token=on_token,
+        **_build_story_request(world, characters, plot)
+    )
+
+
+HANDOFF_KEYS = ('event', 'scene', 'immediate_aftermath', 'final_state', 'effect', 'status_quo')
+HANDOFF_MAX_CHARS = 240
+
+
+def build_story_sections(plot: dict) -> list:
+    reconstructed = plot.get('reconstructed_plot', {})
+    sections = []
+    
+    def add(key, label, beat):
+        if beat:
+            sections.append({"key": key, "label": label, "beat": beat})
+    
+    add("setup", "Setup", reconstructed.get('setup'))
+    add("inciting_incident", "Inciting Incident", reconstructed.get('inciting_incident'))
+    for i, event in enumerate(reconstructed.get('rising_action', [])):
+        add(f"rising_action[{i}]", f"Rising Action {i + 1}", event)
+    add("climax", "Climax", reconstructed.get('climax'))
+    add("falling_action", "Falling Action", reconstructed.get('falling_action'))
+    add("resolution", "Resolution", reconstructed.get('resolution'))
+    
+    return sections
+
+
+def _handoff_summary(beat) -> str:
+    if isinstance(beat, dict):
+        parts = [str(beat[key]) for key in HANDOFF_KEYS if beat.get(key)]
+        text = " ".join(parts[:2]) if parts else json.dumps(beat)
+    else:
+        text = str(beat)
+    if len(text) > HANDOFF_MAX_CHARS:
+        text = text[:HANDOFF_MAX_CHARS].rsplit(' ', 1)[0] + "..."
+    return text
+
+
+def _build_section_request(world_text: str, characters_text: str, sections: list, index: int) -> dict:
+    section = sections[index]
+    previous_handoff = _handoff_summary(sections[index - 1]['beat']) if index > 0 else "(This is the opening section.)"
+    next_handoff = (_handoff_summary(sections[index + 1]['beat'])
+                    if index + 1 < len(sections) else "(This is the final section.)")
     
+    prompt = STORY_SECTION_PROMPT.format(
+        world=world_text,
+        characters=characters_text,
+        index=index + 1,
+        total=len(sections),
+        label=section['label'],
+        beat=to_prompt(section['beat'], stage='story'),
+        previous_handoff=previous_handoff,
+        next_handoff=next_handoff
+    )
+    
+    return {
+        'model': MODEL_NAME,
+        'messages': [
+            {"role": "system", "content": "You are a master storyteller. Write engaging, vivid prose."},
+            {"role": "user", "content": prompt}
+        ],
+        'temperature': 0.8,
+        'max_tokens': STORY_SECTION_MAX_TOKENS
+    }
+
+
+async def generate_story_sections_async(world: dict, characters: dict, plot: dict) -> tuple:
+    """Write every plot section concurrently and stitch them into one story.
+
+    Each section gets the same world and character context plus short
+    hand-off summaries of its neighbours. Returns ``(story, sections)``.
+    """
+    sections = build_story_sections(plot)
+    if not sections:
+        story = await generate_story_async(world, characters, plot)
+        return story, []
+    
+    world_text = to_prompt(world, stage='story')
+    characters_text = to_prompt(characters.get('transformed_characters', []), stage='story')
+    client = get_async_client()
+    
+    texts = await asyncio.gather(*(
+        make_llm_call_async(client=client, **_build_section_request(world_text, characters_text, sections, i))
+        for i in range(len(sections))
+    ))
+    
+    story = "\n\n".join(text.strip() for text in texts if text and text.strip())
+    return story, [
+        {"key": section['key'], "label": section['label'], "characters": len(text or "")}
+        for section, text in zip(sections, texts)
+    ]
+
+
+class StoryStreamWriter:
+    """Append streamed story tokens to a file as they arrive.
+
+    ``echo``, if given, is called with each completed line so console output
+    stays readable under a live progress display.
+    """
+    
+    def __init__(self, path: str, header: str = "", echo=None):
+        self.path = path
+        self.header = header
+        self.echo = echo
+        self._file = None
+        self._line = ""
+    
+    def __enter__(self):
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._file.write(self.header)
+        self._file.flush()
+        return self
+    
+    def __call__(self, token: str):
+        self._file.write(token)
+        self._file.flush()
+        if self.echo:
+            self._line += token
+            *lines, self._line = self._line.split('\n')
+            for line in lines:
+                self.echo(line)
+    
+    def __exit__(self, exc_type, exc, tb):
+        if self.echo and self._line:
+            self.echo(self._line)
+        self._line = ""
+        self._file.close()
+        return False
+
+
+def _build_diff_request(original_analysis: dict, transformation: dict) -> dict:
     prompt = TRANSFORMATION_DIFF_PROMPT.format(
-        original=json.dumps(original_analysis, indent=2),
-        transformed=json.dumps(transformation, indent=2)
+        original=to_prompt(original_analysis, stage='transformation_diff'),
+        transformed=to_prompt(transformation, stage='transformation_diff', drop=PROSE_ONLY_FIELDS)
     )
     
+    return {
+        'model': MODEL_NAME,
+        'messages': [
+            {"role": "system", "content": "You are a narrative analyst. Always respond with valid JSON only, no markdown."},
+            {"role": "user", "content": prompt}
+        ],
+        'temperature': 0.3,
+        'response_format': {"type": "json_object"}
+    }
+
+
+def fallback_transformation_diff() -> dict:
+    return {"transformation_diff": [], "transformation_summary": "Unable to generate diff"}
+
+
+def generate_transformation_diff(original_analysis: dict, transformation: dict) -> dict:
     try:
         response_content = make_llm_call(
-            client=client,
-            model=MODEL_NAME,
-            messages=[
-                {"role": "system", "content": "You are a narrative analyst. Always respond with valid JSON only, no markdown."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            response_format={"type": "json_object"}
+            client=get_client(),
+            **_build_diff_request(original_analysis, transformation)
+        )
+        return parse_llm_json(response_content)
+    except Exception:
+        return fallback_transformation_diff()
+
+
+async def generate_transformation_diff_async(original_analysis: dict, transformation: dict) -> dict:
+    try:
+        response_content = await make_llm_call_async(
+            client=get_async_client(),
+            **_build_diff_request(original_analysis, transformation)
         )
         return parse_llm_json(response_content)
     except Exception:
-        return {"transformation_diff": [], "transformation_summary": "Unable to generate diff"}
+        return fallback_transformation_diff()
 
 
 def compile_artifacts(
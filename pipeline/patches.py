@@ -0,0 +1,211 @@
+import copy
+import re
+
+from pydantic import ValidationError
+
+from pipeline.schemas import CharacterTransformationSchema
+from pipeline.plot_reconstruction import validate_cause_effect_chain
+
+
+PATCH_OPS = ("replace", "insert")
+
+_PATH_TOKEN = re.compile(r'([A-Za-z_][A-Za-z0-9_]*)|\[(\d+)\]')
+
+
+class PatchError(ValueError):
+    pass
+
+
+def parse_path(path: str) -> list:
+    """Split ``plot.reconstructed_plot.rising_action[2].effect`` into keys and indices."""
+    if not isinstance(path, str) or not path:
+        raise PatchError(f"Invalid patch path: {path!r}")
+
+    parts = []
+    pos = 0
+    for match in _PATH_TOKEN.finditer(path):
+        if match.start() != pos:
+            raise PatchError(f"Invalid patch path: {path!r}")
+        key, index = match.groups()
+        parts.append(key if key is not None else int(index))
+        pos = match.end()
+        if pos < len(path) and path[pos] == '.':
+            pos += 1
+            if pos == len(path):
+                raise PatchError(f"Invalid patch path: {path!r}")
+    if pos != len(path) or not isinstance(parts[0], str):
+        raise PatchError(f"Invalid patch path: {path!r}")
+    return parts
+
+
+def format_path(parts: list) -> str:
+    path = ""
+    for part in parts:
+        path += f"[{part}]" if isinstance(part, int) else (f".{part}" if path else part)
+    return path
+
+
+def _resolve_parent(documents: dict, parts: list):
+    if len(parts) < 2:
+        raise PatchError(f"Patch path must point inside a document: {format_path(parts)}")
+    node = documents
+    for depth, part in enumerate(parts[:-1]):
+        if isinstance(part, int):
+            if not isinstance(node, list) or part >= len(node):
+                raise PatchError(f"No such element: {format_path(parts[:depth + 1])}")
+        elif not isinstance(node, dict) or part not in node:
+            raise PatchError(f"No such field: {format_path(parts[:depth + 1])}")
+        node = node[part]
+    return node
+
+
+def _same_shape(old, new) -> bool:
+    if isinstance(old, dict):
+        return isinstance(new, dict)
+    if isinstance(old, list):
+        return isinstance(new, list)
+    return not isinstance(new, (dict, list))
+
+
+def _is_empty(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return not value.strip()
+    return isinstance(value, (dict, list)) and not value
+
+
+def _check_keys(known: set, value, path: str):
+    if isinstance(value, dict) and known:
+        unknown = sorted(set(value) - known)
+        if unknown:
+            raise PatchError(f"Unknown field(s) {', '.join(unknown)} in value for {path}")
+
+
+def _item_keys(items: list) -> set:
+    return {key for item in items if isinstance(item, dict) for key in item}
+
+
+def validate_operation(documents: dict, operation: dict) -> list:
+    """Check ``operation`` against ``documents`` and return its parsed path.
+
+    ``replace`` must target an existing field or list item and keep its
+    shape; ``insert`` must target a list position, at most one past the end.
+    Values may not be empty or introduce fields the target does not have.
+    """
+    if not isinstance(operation, dict):
+        raise PatchError(f"Patch operation must be an object, got {type(operation).__name__}")
+    op = operation.get('op')
+    if op not in PATCH_OPS:
+        raise PatchError(f"Unknown patch op {op!r}; expected one of {', '.join(PATCH_OPS)}")
+    if 'value' not in operation:
+        raise PatchError(f"Patch operation for {operation.get('path')!r} has no value")
+
+    parts = parse_path(operation.get('path'))
+    if parts[0] not in documents:
+        raise PatchError(f"Unknown document '{parts[0]}'; expected one of {', '.join(documents)}")
+
+    parent = _resolve_parent(documents, parts)
+    target = parts[-1]
+    value = operation['value']
+    if _is_empty(value):
+        raise PatchError(f"Patch value for {operation['path']} is empty")
+
+    if op == 'insert':
+        if not isinstance(target, int) or not isinstance(parent, list):
+            raise PatchError(f"insert needs a list position: {operation['path']}")
+        if target > len(parent):
+            raise PatchError(f"insert position out of range: {operation['path']}")
+        if parent and not _same_shape(parent[0], value):
+            raise PatchError(f"Inserted value does not match the list items: {operation['path']}")
+        _check_keys(_item_keys(parent), value, operation['path'])
+        return parts
+
+    if isinstance(target, int):
+        if not isinstance(parent, list) or target >= len(parent):
+            raise PatchError(f"No such element: {operation['path']}")
+        current = parent[target]
+        known = _item_keys(parent)
+    else:
+        if not isinstance(parent, dict):
+            raise PatchError(f"Cannot set field on a non-object: {operation['path']}")
+        if target not in parent:
+            raise PatchError(f"Unknown field: {operation['path']}")
+        current = parent[target]
+        known = set(current) if isinstance(current, dict) else set()
+    if not _same_shape(current, value):
+        raise PatchError(f"Replacement changes the shape of {operation['path']}")
+    _check_keys(known, value, operation['path'])
+    return parts
+
+
+def _plot_issues(plot: dict) -> set:
+    try:
+        return set(validate_cause_effect_chain(plot)['issues'])
+    except (AttributeError, TypeError):
+        return {"Plot structure is malformed"}
+
+
+def _character_issues(characters: dict) -> set:
+    try:
+        CharacterTransformationSchema(**characters)
+    except ValidationError as e:
+        return {f"{format_path(list(error['loc']))}: {error['msg']}" for error in e.errors()}
+    return set()
+
+
+# Checks re-run on a patched document; an operation may not add new issues
+DOCUMENT_CHECKS = {
+    "plot": _plot_issues,
+    "characters": _character_issues
+}
+
+
+def apply_patch(documents: dict, operations: list) -> tuple:
+    """Apply path-addressed ``operations`` to a copy of ``documents``.
+
+    Operations are validated one at a time against the partially patched
+    copy, so later paths see earlier inserts. Each patched document is then
+    re-checked with ``DOCUMENT_CHECKS``; an operation that introduces a schema
+    or cause-effect issue the document did not already have is rolled back.
+    Invalid operations are skipped. Returns ``(patched, applied_paths, rejected)`` where ``rejected`` is a
+    list of ``{"path", "reason"}`` dicts.
+    """
+    patched = copy.deepcopy(documents)
+    applied_paths = []
+    rejected = []
+    issues = {}
+
+    for operation in operations or []:
+        try:
+            parts = validate_operation(patched, operation)
+        except PatchError as e:
+            path = operation.get('path') if isinstance(operation, dict) else None
+            rejected.append({"path": path, "reason": str(e)})
+            continue
+
+        name = parts[0]
+        candidate = {name: copy.deepcopy(patched[name])}
+        parent = _resolve_parent(candidate, parts)
+        value = copy.deepcopy(operation['value'])
+        if operation['op'] == 'insert':
+            parent.insert(parts[-1], value)
+        else:
+            parent[parts[-1]] = value
+
+        check = DOCUMENT_CHECKS.get(name)
+        if check is not None:
+            if name not in issues:
+                issues[name] = check(patched[name])
+            candidate_issues = check(candidate[name])
+            introduced = sorted(candidate_issues - issues[name])
+            if introduced:
+                rejected.append({"path": format_path(parts),
+                                 "reason": f"Patched {name} fails validation: {'; '.join(introduced)}"})
+                continue
+            issues[name] = candidate_issues
+
+        patched[name] = candidate[name]
+        applied_paths.append(format_path(parts))
+
+    return patched, applied_paths, rejected
@@ -1,23 +1,22 @@
-import json
-from groq import Groq
 from prompts.templates import PLOT_RECONSTRUCTION_PROMPT
-from config import GROQ_API_KEY, MODEL_NAME, TEMPERATURE
-from pipeline.utils import parse_llm_json, make_llm_call
+from config import MODEL_NAME, TEMPERATURE
+from pipeline.utils import parse_llm_json, make_llm_call, make_llm_call_async
+from pipeline.serialization import to_prompt, PROSE_ONLY_FIELDS
+from pipeline.clients import get_client, get_async_client
 
 
-def reconstruct_plot(
+def _build_request(
     original_plot: dict,
     transformed_characters: dict,
     world_rules: dict
 ) -> dict:
-    client = Groq(api_key=GROQ_API_KEY)
-    
-    plot_text = json.dumps(original_plot, indent=2)
-    characters_text = json.dumps(
-        transformed_characters.get('transformed_characters', []), 
-        indent=2
+    plot_text = to_prompt(original_plot, stage='plot_reconstruction')
+    characters_text = to_prompt(
+        transformed_characters.get('transformed_characters', []),
+        stage='plot_reconstruction',
+        drop=PROSE_ONLY_FIELDS
     )
-    rules_text = json.dumps(world_rules.get('internal_rules', []), indent=2)
+    rules_text = to_prompt(world_rules.get('internal_rules', []), stage='plot_reconstruction')
     
     prompt = PLOT_RECONSTRUCTION_PROMPT.format(
         plot_structure=plot_text,
@@ -25,17 +24,39 @@ def reconstruct_plot(
         world_rules=rules_text
     )
     
-    response_content = make_llm_call(
-        client=client,
-        model=MODEL_NAME,
-        messages=[
+    return {
+        'model': MODEL_NAME,
+        'messages': [
             {"role": "system", "content": "You are a story architect. Always respond with valid JSON only, no markdown."},
             {"role": "user", "content": prompt}
         ],
-        temperature=TEMPERATURE,
-        response_format={"type": "json_object"}
+        'temperature': TEMPERATURE,
+        'response_format': {"type": "json_object"},
+        'validate': lambda plot: validate_cause_effect_chain(plot)['valid']
+    }
+
+
+def reconstruct_plot(
+    original_plot: dict,
+    transformed_characters: dict,
+    world_rules: dict
+) -> dict:
+    response_content = make_llm_call(
+        client=get_client(),
+        **_build_request(original_plot, transformed_characters, world_rules)
+    )
+    return parse_llm_json(response_content)
+
+
+async def reconstruct_plot_async(
+    original_plot: dict,
+    transformed_characters: dict,
+    world_rules: dict
+) -> dict:
+    response_content = await make_llm_call_async(
+        client=get_async_client(),
+        **_build_request(original_plot, transformed_characters, world_rules)
     )
-    
     return parse_llm_json(response_content)
 
 
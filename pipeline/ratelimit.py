@@ -0,0 +1,204 @@
+import asyncio
+import contextlib
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: budget is shared per process only
+    fcntl = None
+
+from config import (
+    CACHE_DIR,
+    RATE_LIMIT_RPM,
+    RATE_LIMIT_TPM,
+    RATE_LIMIT_COMPLETION_TOKENS,
+    RATE_LIMIT_POLL_INTERVAL
+)
+from pipeline.serialization import estimate_tokens
+
+
+RATE_LIMIT_STATE_NAME = "ratelimit.json"
+
+
+def estimate_request_tokens(messages: list, max_tokens: int = None) -> int:
+    prompt_tokens = sum(estimate_tokens(str(m.get('content', ''))) for m in messages)
+    return prompt_tokens + (max_tokens or RATE_LIMIT_COMPLETION_TOKENS)
+
+
+class RateLimiter:
+    """Token buckets for requests and tokens per minute, per model.
+
+    The bucket state lives in a small JSON file guarded by ``flock``, so every
+    thread, asyncio task and process on the host draws from the same budget.
+    Callers reserve capacity up front; when the bucket is overdrawn they wait
+    until their reservation is covered, which paces a batch at the limit
+    instead of bursting into 429s. Estimates are corrected with the real
+    usage once the response arrives, and sleepers re-check the budget at
+    least every ``RATE_LIMIT_POLL_INTERVAL`` seconds so refunds reach them.
+
+    Each bucket counts the capacity ever credited to it (refills and
+    refunds); a reservation that overdraws the bucket waits until that
+    counter reaches the point where its own deficit is covered, so later
+    reservations never delay earlier ones.
+    """
+
+    def __init__(self, state_path: str, rpm: float = RATE_LIMIT_RPM, tpm: float = RATE_LIMIT_TPM):
+        self.state_path = state_path
+        self.lock_path = state_path + ".lock"
+        self.rpm = rpm
+        self.tpm = tpm
+        self._thread_lock = threading.Lock()
+        directory = os.path.dirname(state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @contextlib.contextmanager
+    def _locked_state(self):
+        with self._thread_lock, open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.state_path, 'r', encoding='utf-8') as f:
+                        state = json.load(f)
+                except (FileNotFoundError, ValueError):
+                    state = {}
+                yield state
+                self._write_state(state)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_state(self, state: dict):
+        # Temp file + rename: a crash mid-write never leaves a truncated budget behind.
+        # The flock is held, so one fixed temp name is enough.
+        tmp_path = self.state_path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(state))
+            os.replace(tmp_path, self.state_path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_path)
+            raise
+
+    def _credit(self, bucket: dict, kind: str, value: float):
+        bucket['credited'][kind] += value - bucket[kind]
+        bucket[kind] = value
+
+    def _refill(self, bucket: dict, now: float):
+        elapsed = max(0.0, now - bucket['updated'])
+        if self.rpm:
+            self._credit(bucket, 'requests', min(self.rpm, bucket['requests'] + elapsed * self.rpm / 60))
+        if self.tpm:
+            self._credit(bucket, 'tokens', min(self.tpm, bucket['tokens'] + elapsed * self.tpm / 60))
+        bucket['updated'] = now
+
+    def _bucket(self, state: dict, model: str, now: float) -> dict:
+        bucket = state.get(model)
+        if bucket is None or bucket.get('limits') != [self.rpm, self.tpm] or 'credited' not in bucket:
+            # New model or changed limits: start from a full bucket
+            bucket = state[model] = {
+                "requests": self.rpm, "tokens": self.tpm, "updated": now, "limits": [self.rpm, self.tpm],
+                "created": now, "credited": {"requests": 0.0, "tokens": 0.0}
+            }
+        self._refill(bucket, now)
+        return bucket
+
+    def _wait(self, bucket: dict, ticket: dict) -> float:
+        if bucket is None or bucket['created'] != ticket['created']:
+            # The bucket was reset (new limits); it starts full
+            return 0.0
+        wait = 0.0
+        for kind, rate in (('requests', self.rpm), ('tokens', self.tpm)):
+            missing = ticket[kind] - bucket['credited'][kind]
+            if rate and missing > 0:
+                wait = max(wait, missing * 60 / rate)
+        return wait
+
+    def _reserve(self, model: str, tokens: int) -> tuple:
+        now = time.time()
+        with self._locked_state() as state:
+            bucket = self._bucket(state, model, now)
+            if self.rpm:
+                bucket['requests'] -= 1
+            if self.tpm:
+                bucket['tokens'] -= tokens
+
+            # The credit this reservation needs before it is covered
+            ticket = {"created": bucket['created']}
+            for kind in ('requests', 'tokens'):
+                ticket[kind] = bucket['credited'][kind] + max(0.0, -bucket[kind])
+            return ticket, self._wait(bucket, ticket)
+
+    def _remaining(self, model: str, ticket: dict) -> float:
+        with self._locked_state() as state:
+            bucket = state.get(model)
+            if bucket is not None and bucket['created'] == ticket['created']:
+                self._refill(bucket, time.time())
+            return self._wait(bucket, ticket)
+
+    def reserve(self, model: str, tokens: int) -> float:
+        """Deduct one request and ``tokens`` from the budget; return seconds to wait before sending."""
+        return self._reserve(model, tokens)[1]
+
+    def try_reserve(self, model: str, tokens: int) -> bool:
+        """Reserve budget only if it is available right now; never overdraws."""
+        with self._locked_state() as state:
+            bucket = self._bucket(state, model, time.time())
+            if (self.rpm and bucket['requests'] < 1) or (self.tpm and bucket['tokens'] < tokens):
+                return False
+            if self.rpm:
+                bucket['requests'] -= 1
+            if self.tpm:
+                bucket['tokens'] -= tokens
+            return True
+
+    def settle(self, model: str, estimated_tokens: int, actual_tokens: int):
+        """Refund or charge the difference between the estimate and real usage."""
+        if not actual_tokens or not self.tpm:
+            return
+        with self._locked_state() as state:
+            bucket = state.get(model)
+            if bucket is not None and 'credited' in bucket:
+                self._refill(bucket, time.time())
+                self._credit(bucket, 'tokens', min(self.tpm, bucket['tokens'] + estimated_tokens - actual_tokens))
+
+    def acquire(self, model: str, tokens: int) -> float:
+        ticket, wait = self._reserve(model, tokens)
+        waited = 0.0
+        while wait > 0:
+            nap = min(wait, RATE_LIMIT_POLL_INTERVAL)
+            time.sleep(nap)
+            waited += nap
+            wait = self._remaining(model, ticket)
+        return waited
+
+    async def acquire_async(self, model: str, tokens: int) -> float:
+        # The state file is guarded by a blocking flock; keep it off the event loop
+        ticket, wait = await asyncio.to_thread(self._reserve, model, tokens)
+        waited = 0.0
+        while wait > 0:
+            nap = min(wait, RATE_LIMIT_POLL_INTERVAL)
+            await asyncio.sleep(nap)
+            waited += nap
+            wait = await asyncio.to_thread(self._remaining, model, ticket)
+        return waited
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    global _limiter
+    if not RATE_LIMIT_RPM and not RATE_LIMIT_TPM:
+        return None
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(os.path.join(CACHE_DIR, RATE_LIMIT_STATE_NAME))
+    return _limiter
@@ -0,0 +1,40 @@
+import concurrent.futures
+import threading
+import time
+
+from config import RENDER_THREAD_WORKERS, RENDER_PROCESS_WORKERS
+
+
+_thread_pool = None
+_process_pool = None
+_pools_lock = threading.Lock()
+
+
+def get_thread_pool() -> concurrent.futures.ThreadPoolExecutor:
+    global _thread_pool
+    with _pools_lock:
+        if _thread_pool is None:
+            _thread_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=RENDER_THREAD_WORKERS,
+                thread_name_prefix="render"
+            )
+    return _thread_pool
+
+
+def get_process_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Worker processes for CPU-bound renderers (PDF), so they don't hold the GIL."""
+    global _process_pool
+    with _pools_lock:
+        if _process_pool is None:
+            _process_pool = concurrent.futures.ProcessPoolExecutor(max_workers=RENDER_PROCESS_WORKERS)
+    return _process_pool
+
+
+def timed_call(func, *args) -> tuple:
+    """Run ``func(*args)`` and return ``(result, elapsed_seconds)``.
+
+    Module-level so it can be shipped to a worker process.
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
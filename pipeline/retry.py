@@ -0,0 +1,266 @@
+import asyncio
+import email.utils
+import functools
+import random
+import threading
+import time
+from typing import Callable, Any
+
+import httpx
+from groq import APIConnectionError, APIStatusError
+
+from config import (
+    RETRY_MAX_RETRIES,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT
+)
+from pipeline.metrics import current_run
+from pipeline.tracing import span
+
+
+# Error classes
+RATE_LIMITED = "rate_limit"
+TRANSIENT = "transient"          # transport failure, timeout or 5xx: the backend may be down
+INVALID_OUTPUT = "invalid_output"  # the model's output was rejected; a fresh sample may pass
+FATAL = "fatal"                  # auth, validation or a bug: retrying cannot help
+
+RETRYABLE = (RATE_LIMITED, TRANSIENT, INVALID_OUTPUT)
+
+_RETRYABLE_STATUS = {408, 409, 425}
+_INVALID_OUTPUT_CODES = {"json_validate_failed"}
+
+
+class CircuitOpenError(RuntimeError):
+
+    def __init__(self, retry_in: float):
+        self.retry_in = retry_in
+        super().__init__(f"LLM backend unavailable; circuit open for another {retry_in:.0f}s")
+
+
+def _error_code(exc: APIStatusError):
+    body = exc.body if isinstance(exc.body, dict) else {}
+    error = body.get('error') if isinstance(body.get('error'), dict) else body
+    return error.get('code')
+
+
+def classify_error(exc: BaseException) -> str:
+    if isinstance(exc, CircuitOpenError):
+        return FATAL
+    if isinstance(exc, APIStatusError):
+        status = exc.status_code
+        if status == 429:
+            return RATE_LIMITED
+        if status >= 500 or status in _RETRYABLE_STATUS:
+            return TRANSIENT
+        if status == 400 and _error_code(exc) in _INVALID_OUTPUT_CODES:
+            return INVALID_OUTPUT
+        return FATAL
+    if isinstance(exc, (APIConnectionError, httpx.TransportError, ConnectionError, TimeoutError)):
+        return TRANSIENT
+    return FATAL
+
+
+def retry_after(exc: BaseException):
+    """Return the server-requested delay in seconds from Retry-After headers, or None."""
+    response = getattr(exc, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+
+    value = headers.get('retry-after-ms')
+    if value is not None:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get('retry-after')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def decorrelated_jitter(previous: float, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY) -> float:
+    """Next backoff delay: uniform between ``base`` and three times the previous delay, capped."""
+    return min(cap, random.uniform(base, max(base, previous * 3)))
+
+
+class CircuitBreaker:
+    """Fail fast while the LLM backend is clearly down.
+
+    After ``failure_threshold`` consecutive transient failures the circuit
+    opens and every call raises CircuitOpenError without touching the
+    network. Once ``reset_timeout`` has passed a single probe call is let
+    through: success closes the circuit, failure re-opens it. Rate limits
+    and rejected output do not count, since the backend is answering.
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self._probing = None  # monotonic start time of the in-flight probe
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def before_call(self):
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            if self.opened_at is None:
+                return
+            now = time.monotonic()
+            remaining = self.reset_timeout - (now - self.opened_at)
+            # A probe that never reported back (e.g. cancelled) expires after reset_timeout
+            probe_pending = self._probing is not None and now - self._probing < self.reset_timeout
+            if remaining > 0 or probe_pending:
+                raise CircuitOpenError(max(0.0, remaining))
+            self._probing = now
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = None
+
+    def record_failure(self, category: str):
+        with self._lock:
+            if category != TRANSIENT:
+                # The backend answered; a pending probe has done its job
+                if self._probing is not None:
+                    self.opened_at = None
+                    self._probing = None
+                return
+            self.failures += 1
+            if self._probing is not None or (self.failure_threshold > 0 and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+            self._probing = None
+
+    def reset(self):
+        self.record_success()
+
+
+llm_circuit_breaker = CircuitBreaker()
+
+
+def _next_delay(exc: BaseException, previous: float, initial_delay: float, max_delay: float):
+    """Return the delay before the next attempt, or None if the server asked for longer than ``max_delay``."""
+    requested = retry_after(exc)
+    if requested is not None:
+        if requested > max_delay:
+            return None
+        # Spread workers that received the same Retry-After
+        return requested + random.uniform(0, initial_delay)
+    return decorrelated_jitter(previous, initial_delay, max_delay)
+
+
+def _should_retry(exc, attempt: int, max_retries: int, breaker) -> str:
+    category = classify_error(exc)
+    if breaker is not None and not isinstance(exc, CircuitOpenError):
+        breaker.record_failure(category)
+    if category not in RETRYABLE:
+        print(f"  ✗ {type(exc).__name__} is not retryable: {exc}")
+        return None
+    if attempt >= max_retries:
+        print(f"  ✗ All {max_retries + 1} attempts failed.")
+        return None
+    return category
+
+
+def _announce_retry(attempt: int, category: str, exc: BaseException, delay: float):
+    run = current_run()
+    if run is not None:
+        run.record_retry()
+    print(f"  ⚠ Attempt {attempt + 1} failed ({category}): {exc}. Retrying in {delay:.1f}s...")
+
+
+def retry_with_backoff(
+    max_retries: int = RETRY_MAX_RETRIES,
+    initial_delay: float = RETRY_BASE_DELAY,
+    max_delay: float = RETRY_MAX_DELAY,
+    breaker: CircuitBreaker = None,
+    trace_name: str = "attempt"
+) -> Callable:
+    """Retry rate limits, transport failures and rejected output with decorrelated jitter.
+
+    Retry-After headers take precedence over the computed delay. Auth and
+    validation errors are raised immediately. When ``breaker`` is given,
+    every attempt goes through it. Each attempt and backoff is traced as a
+    span named after ``trace_name``.
+    """
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs) -> Any:
+                delay = initial_delay
+                for attempt in range(max_retries + 1):
+                    if breaker is not None:
+                        breaker.before_call()
+                    try:
+                        with span(trace_name, cat="retry", attempt=attempt + 1):
+                            result = await func(*args, **kwargs)
+                    except Exception as e:
+                        category = _should_retry(e, attempt, max_retries, breaker)
+                        if category is None:
+                            raise
+                        delay = _next_delay(e, delay, initial_delay, max_delay)
+                        if delay is None:
+                            print(f"  ✗ Server asked to wait longer than {max_delay:.0f}s.")
+                            raise
+                        _announce_retry(attempt, category, e, delay)
+                        with span(f"{trace_name} backoff", cat="retry", category=category, delay_s=round(delay, 3)):
+                            await asyncio.sleep(delay)
+                    else:
+                        if breaker is not None:
+                            breaker.record_success()
+                        return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            delay = initial_delay
+            for attempt in range(max_retries + 1):
+                if breaker is not None:
+                    breaker.before_call()
+                try:
+                    with span(trace_name, cat="retry", attempt=attempt + 1):
+                        result = func(*args, **kwargs)
+                except Exception as e:
+                    category = _should_retry(e, attempt, max_retries, breaker)
+                    if category is None:
+                        raise
+                    delay = _next_delay(e, delay, initial_delay, max_delay)
+                    if delay is None:
+                        print(f"  ✗ Server asked to wait longer than {max_delay:.0f}s.")
+                        raise
+                    _announce_retry(attempt, category, e, delay)
+                    with span(f"{trace_name} backoff", cat="retry", category=category, delay_s=round(delay, 3)):
+                        time.sleep(delay)
+                else:
+                    if breaker is not None:
+                        breaker.record_success()
+                    return result
+
+        return wrapper
+    return decorator
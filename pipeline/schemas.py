@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional
 
+from pipeline.tracing import traced
+
 
 class ThemeSchema(BaseModel):
     theme: str = Field(..., min_length=1)
@@ -57,6 +59,7 @@ class SourceAbstractionSchema(BaseModel):
         return v
 
 
+@traced(cat="validate")
 def validate_source_abstraction(data: dict) -> tuple:
     try:
         validated = SourceAbstractionSchema(**data)
@@ -103,6 +106,7 @@ class WorldDefinitionSchema(BaseModel):
         return v
 
 
+@traced(cat="validate")
 def validate_world_definition(data: dict) -> tuple:
     """Validate Stage 2 output against WorldDefinitionSchema."""
     try:
@@ -145,6 +149,17 @@ class CharacterTransformationSchema(BaseModel):
         return v
 
 
+@traced(cat="validate")
+def validate_transformed_character(data: dict) -> tuple:
+    """Validate a single Stage 3 character against TransformedCharacterSchema."""
+    try:
+        validated = TransformedCharacterSchema(**data)
+        return True, validated.dict(), None
+    except Exception as e:
+        return False, data, str(e)
+
+
+@traced(cat="validate")
 def validate_character_transformation(data: dict) -> tuple:
     """Validate Stage 3 output against CharacterTransformationSchema."""
     try:
@@ -0,0 +1,88 @@
+import json
+
+from config import PROMPT_FORMAT
+from pipeline.metrics import current_run
+
+
+PROMPT_FORMATS = ("pretty", "compact", "lines")
+
+# Fields that only matter when writing prose; analytical stages drop them.
+PROSE_ONLY_FIELDS = ("visual_description",)
+
+# Rough characters-per-token ratio for English/JSON with Llama tokenizers.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def drop_fields(data, fields: tuple):
+    """Return a copy of ``data`` without any dict keys named in ``fields``, at any depth."""
+    if not fields:
+        return data
+    if isinstance(data, dict):
+        return {k: drop_fields(v, fields) for k, v in data.items() if k not in fields}
+    if isinstance(data, list):
+        return [drop_fields(item, fields) for item in data]
+    return data
+
+
+def _is_scalar(value) -> bool:
+    return not isinstance(value, (dict, list))
+
+
+def _scalar_text(value) -> str:
+    if isinstance(value, str):
+        return value.replace('\n', ' ')
+    return json.dumps(value)
+
+
+def _render_lines(value, depth: int = 0) -> list:
+    pad = " " * depth
+    lines = []
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if _is_scalar(item):
+                lines.append(f"{pad}{key}: {_scalar_text(item)}")
+            elif not item:
+                continue
+            else:
+                lines.append(f"{pad}{key}:")
+                lines.extend(_render_lines(item, depth + 1))
+    elif isinstance(value, list):
+        for item in value:
+            if _is_scalar(item):
+                lines.append(f"{pad}- {_scalar_text(item)}")
+            elif isinstance(item, dict) and all(_is_scalar(v) for v in item.values()):
+                lines.append(f"{pad}- " + "; ".join(f"{k}: {_scalar_text(v)}" for k, v in item.items()))
+            else:
+                lines.append(f"{pad}-")
+                lines.extend(_render_lines(item, depth + 1))
+    else:
+        lines.append(f"{pad}{_scalar_text(value)}")
+    return lines
+
+
+def render(data, fmt: str = PROMPT_FORMAT) -> str:
+    if fmt == "pretty":
+        return json.dumps(data, indent=2, ensure_ascii=False)
+    if fmt == "compact":
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    if fmt == "lines":
+        return "\n".join(_render_lines(data))
+    raise ValueError(f"Unknown prompt format '{fmt}'. Choose from: {', '.join(PROMPT_FORMATS)}")
+
+
+def to_prompt(data, stage: str, drop: tuple = (), fmt: str = PROMPT_FORMAT) -> str:
+    """Serialize an artifact for embedding in a prompt.
+
+    Fields in ``drop`` are removed first. The estimated token saving against
+    the old ``json.dumps(indent=2)`` rendering is recorded for ``stage``.
+    """
+    text = render(drop_fields(data, drop), fmt)
+    run = current_run()
+    if run is not None:
+        baseline = json.dumps(data, indent=2)
+        run.record_prompt_size(stage, estimate_tokens(baseline), estimate_tokens(text))
+    return text
@@ -1,54 +1,219 @@
-import json
-from groq import Groq
-from prompts.templates import SOURCE_ABSTRACTION_PROMPT
-from config import GROQ_API_KEY, MODEL_NAME, TEMPERATURE
-from pipeline.utils import parse_llm_json, make_llm_call
+import asyncio
+import hashlib
+import re
 
+from prompts.templates import SOURCE_ABSTRACTION_PROMPT, SOURCE_CHUNK_SUMMARY_PROMPT, SOURCE_SUMMARIES_HEADER
+from config import (
+    MODEL_NAME,
+    TEMPERATURE,
+    SOURCE_LIBRARY_PATH,
+    SOURCE_CHUNK_CHARS,
+    SOURCE_CHUNK_CONCURRENCY,
+    SOURCE_SUMMARY_MAX_TOKENS,
+    SOURCE_REDUCE_MAX_CHARS
+)
+from pipeline.utils import parse_llm_json, make_llm_call, make_llm_call_async
+from pipeline.clients import get_client, get_async_client
+from pipeline.library import get_source_library
 
-def extract_source_elements(source_material: str) -> dict:
-    client = Groq(api_key=GROQ_API_KEY)
-    
+
+def _build_request(source_material: str) -> dict:
     prompt = SOURCE_ABSTRACTION_PROMPT.format(source_material=source_material)
     
-    response_content = make_llm_call(
-        client=client,
-        model=MODEL_NAME,
-        messages=[
+    return {
+        'model': MODEL_NAME,
+        'messages': [
             {"role": "system", "content": "You are a narrative analyst. Always respond with valid JSON only, no markdown."},
             {"role": "user", "content": prompt}
         ],
-        temperature=TEMPERATURE,
-        response_format={"type": "json_object"}
-    )
-    
+        'temperature': TEMPERATURE,
+        'response_format': {"type": "json_object"}
+    }
+
+
+def extract_source_elements(source_material: str) -> dict:
+    response_content = make_llm_call(client=get_client(), **_build_request(source_material))
     return parse_llm_json(response_content)
 
 
-def load_source_material(source_name: str, database_path: str = "data/source_materials.json") -> str:
-    with open(database_path, 'r', encoding='utf-8') as f:
-        database = json.load(f)
-    
-    source_key = source_name.lower().replace(" ", "_").replace("and", "&").replace("&", "and")
-    
-    possible_keys = [
-        source_key,
-        source_name.lower().replace(" ", "_"),
-        source_name.lower().replace(" and ", "_and_"),
-    ]
-    
-    source = None
-    for key in database:
-        if key.lower() in [k.lower() for k in possible_keys]:
-            source = database[key]
+async def extract_source_elements_async(source_material: str) -> dict:
+    response_content = await make_llm_call_async(client=get_async_client(), **_build_request(source_material))
+    return parse_llm_json(response_content)
+
+
+CHAPTER_HEADING = re.compile(
+    r'^\s*(chapter|book|part|act|scene|canto|letter|volume)\b[\s.:-]*([0-9]+|[ivxlcdm]+\b|[a-z-]+)?',
+    re.IGNORECASE
+)
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def _iter_paragraphs(f, max_chars: int):
+    """Yield blank-line separated paragraphs of at most ``max_chars`` characters.
+
+    Longer paragraphs are emitted in sentence-aligned pieces as they are read.
+    """
+    lines, size = [], 0
+    while True:
+        line = f.readline(max_chars)
+        if not line:
             break
-        if database[key].get("title", "").lower() == source_name.lower():
-            source = database[key]
+        if not line.strip():
+            if lines:
+                yield "".join(lines).strip()
+                lines, size = [], 0
+            continue
+        lines.append(line)
+        size += len(line)
+        if size >= max_chars:
+            # Emit up to the last sentence end and carry the rest over
+            text = "".join(lines)
+            ends = [m.end() for m in _SENTENCE_END.finditer(text, 0, max_chars)]
+            cut = ends[-1] if ends and ends[-1] > max_chars // 2 else max_chars
+            yield text[:cut].strip()
+            lines, size = [text[cut:]], len(text) - cut
+    if lines:
+        yield "".join(lines).strip()
+
+
+def _split_oversized(paragraph: str, max_chars: int) -> list:
+    if len(paragraph) <= max_chars:
+        return [paragraph]
+    pieces, current = [], ""
+    for sentence in _SENTENCE_END.split(paragraph):
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def iter_source_chunks(path: str, max_chars: int = SOURCE_CHUNK_CHARS):
+    """Stream ``path`` as chunks of at most ``max_chars`` characters.
+
+    Chunks end at paragraph boundaries, and a chapter heading starts a new
+    chunk once the current one is at least half full. Only one chunk is held
+    in memory at a time.
+    """
+    chunk, size = [], 0
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for paragraph in _iter_paragraphs(f, max_chars):
+            is_heading = len(paragraph) < 100 and CHAPTER_HEADING.match(paragraph)
+            if chunk and is_heading and size >= max_chars // 2:
+                yield "\n\n".join(chunk)
+                chunk, size = [], 0
+            for piece in _split_oversized(paragraph, max_chars):
+                if chunk and size + len(piece) > max_chars:
+                    yield "\n\n".join(chunk)
+                    chunk, size = [], 0
+                chunk.append(piece)
+                size += len(piece) + 2
+    if chunk:
+        yield "\n\n".join(chunk)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _build_summary_request(excerpt: str, part_label: str) -> dict:
+    return {
+        'model': MODEL_NAME,
+        'messages': [
+            {"role": "system", "content": "You are a literary summarizer. Respond in plain prose."},
+            {"role": "user", "content": SOURCE_CHUNK_SUMMARY_PROMPT.format(part_label=part_label, excerpt=excerpt)}
+        ],
+        'temperature': 0.3,
+        'max_tokens': SOURCE_SUMMARY_MAX_TOKENS
+    }
+
+
+async def summarize_chunk_async(excerpt: str, part_label: str) -> str:
+    response_content = await make_llm_call_async(
+        client=get_async_client(),
+        **_build_summary_request(excerpt, part_label)
+    )
+    return response_content.strip()
+
+
+def _part_label(first: int, last: int) -> str:
+    return f"Part {first}" if first == last else f"Parts {first}-{last}"
+
+
+def _join_summaries(summaries: list) -> str:
+    return "\n\n".join(f"{_part_label(first, last)}:\n{summary}" for first, last, summary in summaries)
+
+
+async def extract_source_elements_from_file_async(
+    path: str,
+    chunk_chars: int = SOURCE_CHUNK_CHARS,
+    concurrency: int = SOURCE_CHUNK_CONCURRENCY,
+    reduce_max_chars: int = SOURCE_REDUCE_MAX_CHARS
+) -> tuple:
+    """Map-reduce Stage 1 over a long source file.
+
+    Chunks are read ``concurrency`` at a time and summarized concurrently.
+    Whenever the accumulated summaries exceed ``reduce_max_chars`` they are
+    condensed into one, so memory stays bounded by one window of chunks plus
+    the summary budget however long the file is. The final summaries are
+    reduced into a single abstraction with the normal Stage 1 prompt.
+
+    Returns ``(abstraction, stats)``.
+    """
+    chunks = iter_source_chunks(path, chunk_chars)
+    summaries = []
+    chunk_count = 0
+    condense_steps = 0
+    
+    while True:
+        window = []
+        for chunk in chunks:
+            chunk_count += 1
+            window.append((chunk_count, chunk))
+            if len(window) >= concurrency:
+                break
+        if not window:
             break
+        
+        results = await asyncio.gather(*(
+            summarize_chunk_async(chunk, _part_label(part, part)) for part, chunk in window
+        ))
+        summaries.extend((part, part, summary) for (part, _), summary in zip(window, results))
+        
+        if len(summaries) > 1 and sum(len(summary) for _, _, summary in summaries) > reduce_max_chars:
+            first, last = summaries[0][0], summaries[-1][1]
+            condensed = await summarize_chunk_async(
+                _join_summaries(summaries),
+                f"the summaries of {_part_label(first, last).lower()}"
+            )
+            summaries = [(first, last, condensed)]
+            condense_steps += 1
     
-    if not source:
-        return source_name
+    if not summaries:
+        raise ValueError(f"Source file '{path}' is empty")
     
-    formatted = f"""
+    abstraction = await extract_source_elements_async(f"{SOURCE_SUMMARIES_HEADER}\n\n{_join_summaries(summaries)}")
+    return abstraction, {"chunks": chunk_count, "condense_steps": condense_steps}
+
+
+def extract_source_elements_from_file(path: str, **kwargs) -> tuple:
+    return asyncio.run(extract_source_elements_from_file_async(path, **kwargs))
+
+
+def format_source_entry(source: dict) -> str:
+    return f"""
 Title: {source['title']}
 Author: {source['author']} ({source['year']})
 Type: {source['type']}
@@ -61,4 +226,13 @@ Key Themes: {', '.join(source['themes'])}
 
 Setting: {source['setting']}
 """
-    return formatted
+
+
+def load_source_material(source_name: str, database_path: str = SOURCE_LIBRARY_PATH) -> str:
+    """Return the formatted entry for ``source_name``.
+
+    Raises SourceNotFoundError, with close titles as suggestions, when the
+    name matches no work in the library.
+    """
+    _, source = get_source_library(database_path).find(source_name)
+    return format_source_entry(source)
@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from config import ABSTRACTION_INDEX_PATH, MODEL_NAME
+from pipeline.memo import template_version
+from pipeline.source_abstraction import extract_source_elements_async, format_source_entry
+from pipeline.library import get_source_library
+from pipeline.schemas import validate_source_abstraction
+from pipeline.utils import write_text_atomic
+
+
+INDEX_VERSION = 1
+
+
+def source_hash(source_material: str) -> str:
+    return hashlib.sha256(source_material.encode('utf-8')).hexdigest()
+
+
+class AbstractionIndex:
+    """Prebuilt Stage 1 abstractions for the bundled source library.
+
+    Each entry records the hash of the source text it was built from and the
+    Stage 1 template version; an entry whose source or template has changed
+    since is ignored.
+    """
+
+    def __init__(self, path: str = ABSTRACTION_INDEX_PATH):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                self.entries = data.get('entries', {})
+
+    def is_current(self, source_key: str, source_material: str) -> bool:
+        entry = self.entries.get(source_key)
+        return (
+            entry is not None
+            and entry.get('source_hash') == source_hash(source_material)
+            and entry.get('template_version') == template_version("source_abstraction")
+        )
+
+    def lookup(self, source_material: str):
+        """Return the stored abstraction for ``source_material``, or None if absent or stale."""
+        for key in self.entries:
+            if self.is_current(key, source_material):
+                return self.entries[key]['abstraction']
+        return None
+
+    def put(self, source_key: str, title: str, source_material: str, abstraction: dict):
+        self.entries[source_key] = {
+            "title": title,
+            "source_hash": source_hash(source_material),
+            "template_version": template_version("source_abstraction"),
+            "model": MODEL_NAME,
+            "built_at": datetime.now().isoformat(),
+            "abstraction": abstraction
+        }
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        write_text_atomic(self.path, json.dumps(
+            {"version": INDEX_VERSION, "entries": self.entries},
+            indent=2,
+            ensure_ascii=False
+        ))
+
+
+def lookup_abstraction(source_material: str, path: str = ABSTRACTION_INDEX_PATH):
+    return AbstractionIndex(path).lookup(source_material)
+
+
+async def build_abstraction_index(
+    database: dict = None,
+    path: str = ABSTRACTION_INDEX_PATH,
+    force: bool = False,
+    on_result=None
+) -> dict:
+    """Analyze every bundled source whose index entry is missing or stale.
+
+    Abstractions that fail ``validate_source_abstraction`` are not stored.
+    Returns ``{source_key: status}`` with status "current", "built" or an
+    error message.
+    """
+    database = database if database is not None else get_source_library().database
+    index = AbstractionIndex(path)
+
+    async def build(key: str, entry: dict) -> str:
+        source_material = format_source_entry(entry)
+        if not force and index.is_current(key, source_material):
+            return "current"
+        try:
+            abstraction = await extract_source_elements_async(source_material)
+        except Exception as e:
+            return f"error: {type(e).__name__}: {e}"
+        valid, abstraction, error = validate_source_abstraction(abstraction)
+        if not valid:
+            return f"invalid: {error}"
+        index.put(key, entry['title'], source_material, abstraction)
+        return "built"
+
+    async def build_and_report(key: str, entry: dict) -> tuple:
+        status = await build(key, entry)
+        if on_result:
+            on_result(key, entry, status)
+        return key, status
+
+    results = dict(await asyncio.gather(*(build_and_report(key, entry) for key, entry in database.items())))
+
+    # Drop entries for sources that are no longer bundled
+    for key in list(index.entries):
+        if key not in database:
+            del index.entries[key]
+    index.save()
+    return results
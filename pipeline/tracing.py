@@ -0,0 +1,188 @@
+import asyncio
+import contextvars
+import functools
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import weakref
+
+from config import TRACE_FILE
+
+
+_tracer = None
+_current_span = contextvars.ContextVar("current_trace_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class _NoopSpan:
+    """Returned by ``span`` while tracing is off; entering and leaving it does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Appends finished spans to a JSONL file as Chrome trace events.
+
+    Each line is one complete ("X") event. Every thread and asyncio task gets
+    its own lane (tid), so concurrent calls do not overlap in the viewer;
+    ``args.parent`` links a span to the span that was open when it started.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+        # Keyed by the task or thread itself, so a lane is released with its owner
+        # and a new task never inherits a finished one's lane through a reused id
+        self._lanes = weakref.WeakKeyDictionary()
+        self._lane_ids = itertools.count(1)
+        self._pid = os.getpid()
+        # perf_counter is precise but has an arbitrary epoch; anchor it to wall time
+        self._epoch_us = time.time() * 1e6 - time.perf_counter() * 1e6
+
+    def now_us(self) -> float:
+        return self._epoch_us + time.perf_counter() * 1e6
+
+    def _lane(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        owner = task if task is not None else threading.current_thread()
+        lane = self._lanes.get(owner)
+        if lane is None:
+            lane = self._lanes[owner] = next(self._lane_ids)
+            name = task.get_name() if task is not None else owner.name
+            self._write({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": lane, "args": {"name": name}})
+        return lane
+
+    def _write(self, event: dict):
+        self._file.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+
+    def emit(self, span: 'Span', end_us: float):
+        with self._lock:
+            self._write({
+                "name": span.name,
+                "cat": span.cat,
+                "ph": "X",
+                "ts": round(span.start_us, 1),
+                "dur": round(end_us - span.start_us, 1),
+                "pid": self._pid,
+                "tid": span.lane,
+                "args": span.args
+            })
+            self._file.flush()
+
+    def lane(self) -> int:
+        with self._lock:
+            return self._lane()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Span:
+
+    def __init__(self, tracer: Tracer, name: str, cat: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.args["id"] = next(_span_ids)
+        if parent is not None:
+            self.args["parent"] = parent
+        self.lane = self.tracer.lane()
+        self._token = _current_span.set(self.args["id"])
+        self.start_us = self.tracer.now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_us = self.tracer.now_us()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.emit(self, end_us)
+        return False
+
+    def set(self, **args):
+        self.args.update(args)
+
+
+def configure_tracing(path: str = None):
+    """Start writing spans to ``path``; ``None`` or an empty path turns tracing off."""
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+    _tracer = Tracer(path) if path else None
+
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, cat: str = "pipeline", **args):
+    """Context manager timing the enclosed block as a trace span."""
+    if _tracer is None:
+        return _NOOP_SPAN
+    return Span(_tracer, name, cat, args)
+
+
+def traced(name: str = None, cat: str = "pipeline"):
+    """Decorator wrapping each call of a sync or async function in a span."""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _tracer is None:
+                    return await func(*args, **kwargs)
+                with Span(_tracer, span_name, cat, {}):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with Span(_tracer, span_name, cat, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def to_chrome_trace(jsonl_path: str, output_path: str):
+    """Wrap a JSONL trace in the ``{"traceEvents": [...]}`` document chrome://tracing and Perfetto load."""
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+configure_tracing(TRACE_FILE)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m pipeline.tracing TRACE.jsonl OUTPUT.json")
+    to_chrome_trace(sys.argv[1], sys.argv[2])
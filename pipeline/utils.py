@@ -1,9 +1,20 @@
+import asyncio
+import contextlib
 import json
+import os
+import tempfile
 import time
-import functools
-from typing import Callable, Any
+from typing import Callable
 
+from pipeline.cache import get_response_cache, make_cache_key
+from pipeline.retry import retry_with_backoff, llm_circuit_breaker
+from pipeline.hedging import hedged_call_async, record_latency
+from pipeline.ratelimit import get_rate_limiter, estimate_request_tokens
+from pipeline.metrics import current_run
+from pipeline.tracing import span, traced
 
+
+@traced(cat="parse")
 def parse_llm_json(response_content: str) -> dict:
     try:
         return json.loads(response_content)
@@ -23,51 +34,371 @@ def parse_llm_json(response_content: str) -> dict:
     raise ValueError(f"Failed to parse JSON from response: {text[:200]}...")
 
 
-def retry_with_backoff(
-    max_retries: int = 3,
-    initial_delay: float = 1.0,
-    backoff_factor: float = 2.0,
-    exceptions: tuple = (Exception,)
-) -> Callable:
-    def decorator(func: Callable) -> Callable:
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs) -> Any:
-            delay = initial_delay
-            last_exception = None
-            
-            for attempt in range(max_retries + 1):
-                try:
-                    return func(*args, **kwargs)
-                except exceptions as e:
-                    last_exception = e
-                    if attempt < max_retries:
-                        print(f"  ⚠ Attempt {attempt + 1} failed: {e}. Retrying in {delay:.1f}s...")
-                        time.sleep(delay)
-                        delay *= backoff_factor
-                    else:
-                        print(f"  ✗ All {max_retries + 1} attempts failed.")
-            
-            raise last_exception
-        
-        return wrapper
-    return decorator
+def _read_umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+_UMASK = _read_umask()
+
+
+def write_text_atomic(path: str, text: str) -> str:
+    """Write ``text`` to ``path`` via a fsync'd temp file and rename.
+
+    Readers never observe a partially written file, and the data is on disk
+    once this returns.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def _is_cacheable(content: str, response_format: dict = None, validate: Callable = None) -> bool:
+    """Whether ``content`` may be cached: non-empty, parseable in JSON mode and accepted by ``validate``."""
+    if not content:
+        return False
+    if validate is not None or (response_format and response_format.get('type') == 'json_object'):
+        try:
+            data = parse_llm_json(content)
+        except ValueError:
+            return False
+        # A response the stage would reject must not be replayed on every later run
+        return validate is None or validate(data)
+    return True
+
+
+def _lookup_cache(cache, cache_key: str):
+    cached = cache.get(cache_key)
+    run = current_run()
+    if run is not None:
+        run.record_cache(hit=cached is not None)
+    return cached
+
+
+def _record_response(response, latency_s: float):
+    run = current_run()
+    if run is not None:
+        run.record_response(response, latency_s)
+
+
+def _record_usage(usage, latency_s: float):
+    run = current_run()
+    if run is not None:
+        run.record_usage(usage, latency_s)
+
+
+def _trace_usage(request_span, usage):
+    if usage is not None:
+        request_span.set(
+            prompt_tokens=getattr(usage, 'prompt_tokens', None),
+            completion_tokens=getattr(usage, 'completion_tokens', None)
+        )
+
+
+def _cassette_mode(client):
+    cassette = getattr(client, 'cassette', None)
+    return cassette.mode if cassette is not None else None
+
+
+def _response_cache(client):
+    """The response cache, or None while ``client`` records to or replays from a cassette."""
+    if _cassette_mode(client) is not None:
+        return None
+    return get_response_cache()
+
+
+def _rate_limiter(client):
+    # Replayed calls never reach the provider; recorded ones are paced as usual
+    if _cassette_mode(client) == "replay":
+        return None
+    return get_rate_limiter()
+
+
+def _acquire_budget(client, model: str, messages: list, max_tokens: int = None):
+    """Wait for rate-limit budget; return the estimated tokens to settle later, or None if unlimited."""
+    limiter = _rate_limiter(client)
+    if limiter is None:
+        return None
+    estimated = estimate_request_tokens(messages, max_tokens)
+    with span("rate_limit_budget", cat="llm", tokens=estimated) as budget_span:
+        waited = limiter.acquire(model, estimated)
+        budget_span.set(waited_s=round(waited, 3))
+    run = current_run()
+    if run is not None and waited:
+        run.record_rate_limit_wait(waited)
+    return estimated
+
+
+async def _acquire_budget_async(client, model: str, messages: list, max_tokens: int = None):
+    limiter = _rate_limiter(client)
+    if limiter is None:
+        return None
+    estimated = estimate_request_tokens(messages, max_tokens)
+    with span("rate_limit_budget", cat="llm", tokens=estimated) as budget_span:
+        waited = await limiter.acquire_async(model, estimated)
+        budget_span.set(waited_s=round(waited, 3))
+    run = current_run()
+    if run is not None and waited:
+        run.record_rate_limit_wait(waited)
+    return estimated
+
+
+async def _try_acquire_budget_async(client, model: str, messages: list, max_tokens: int = None) -> tuple:
+    """Reserve budget only if it is free right now; return ``(acquired, estimated)``."""
+    limiter = _rate_limiter(client)
+    if limiter is None:
+        return True, None
+    estimated = estimate_request_tokens(messages, max_tokens)
+    # The state file is guarded by a blocking flock; keep it off the event loop
+    return await asyncio.to_thread(limiter.try_reserve, model, estimated), estimated
+
+
+def _settled_tokens(usage) -> int:
+    return (getattr(usage, 'prompt_tokens', 0) or 0) + (getattr(usage, 'completion_tokens', 0) or 0)
+
+
+def _settle_budget(client, model: str, estimated, usage):
+    if estimated is None or usage is None:
+        return
+    _rate_limiter(client).settle(model, estimated, _settled_tokens(usage))
+
+
+async def _settle_budget_async(client, model: str, estimated, usage):
+    if estimated is None or usage is None:
+        return
+    await asyncio.to_thread(_rate_limiter(client).settle, model, estimated, _settled_tokens(usage))
+
+
+def _request_kwargs(model: str, messages: list, temperature: float,
+                    response_format: dict = None, max_tokens: int = None) -> dict:
+    kwargs = {
+        'model': model,
+        'messages': messages,
+        'temperature': temperature
+    }
+    if response_format:
+        kwargs['response_format'] = response_format
+    if max_tokens:
+        kwargs['max_tokens'] = max_tokens
+    return kwargs
 
 
 def make_llm_call(client, model: str, messages: list, temperature: float, 
-                  response_format: dict = None, max_tokens: int = None) -> str:
-    @retry_with_backoff(max_retries=3, initial_delay=1.0)
+                  response_format: dict = None, max_tokens: int = None,
+                  validate: Callable = None) -> str:
+    cache = _response_cache(client)
+    cache_key = None
+    if cache is not None:
+        cache_key = make_cache_key(model, messages, temperature, response_format, max_tokens)
+        cached = _lookup_cache(cache, cache_key)
+        if cached is not None:
+            return cached
+    
+    @retry_with_backoff(breaker=llm_circuit_breaker, trace_name="llm_call")
     def _call():
-        kwargs = {
-            'model': model,
-            'messages': messages,
-            'temperature': temperature
-        }
-        if response_format:
-            kwargs['response_format'] = response_format
-        if max_tokens:
-            kwargs['max_tokens'] = max_tokens
-            
-        response = client.chat.completions.create(**kwargs)
+        estimated = _acquire_budget(client, model, messages, max_tokens)
+        kwargs = _request_kwargs(model, messages, temperature, response_format, max_tokens)
+        with span("chat.completions.create", cat="http", model=model) as request_span:
+            start = time.perf_counter()
+            response = client.chat.completions.create(**kwargs)
+            _trace_usage(request_span, getattr(response, 'usage', None))
+        _record_response(response, time.perf_counter() - start)
+        _settle_budget(client, model, estimated, getattr(response, 'usage', None))
         return response.choices[0].message.content
     
-    return _call()
+    content = _call()
+    if cache is not None and _is_cacheable(content, response_format, validate):
+        cache.put(cache_key, content)
+    return content
+
+
+async def make_llm_call_async(client, model: str, messages: list, temperature: float,
+                              response_format: dict = None, max_tokens: int = None,
+                              validate: Callable = None) -> str:
+    cache = _response_cache(client)
+    cache_key = None
+    if cache is not None:
+        cache_key = make_cache_key(model, messages, temperature, response_format, max_tokens)
+        cached = _lookup_cache(cache, cache_key)
+        if cached is not None:
+            return cached
+    
+    async def _send(estimated, hedge: bool = False):
+        kwargs = _request_kwargs(model, messages, temperature, response_format, max_tokens)
+        with span("chat.completions.create", cat="http", model=model, hedge=hedge) as request_span:
+            start = time.perf_counter()
+            try:
+                response = await client.chat.completions.create(**kwargs)
+            except asyncio.CancelledError:
+                if not hedge:
+                    # A primary that lost to its hedge took at least this long; recording
+                    # the lower bound keeps the slow tail in the latency history
+                    record_latency(model, time.perf_counter() - start)
+                raise
+            latency_s = time.perf_counter() - start
+            _trace_usage(request_span, getattr(response, 'usage', None))
+        _record_response(response, latency_s)
+        record_latency(model, latency_s)
+        await _settle_budget_async(client, model, estimated, getattr(response, 'usage', None))
+        return response.choices[0].message.content
+    
+    @retry_with_backoff(breaker=llm_circuit_breaker, trace_name="llm_call")
+    async def _call():
+        estimated = await _acquire_budget_async(client, model, messages, max_tokens)
+        return await _send(estimated)
+    
+    async def _hedge():
+        # A hedge never waits for rate-limit budget; without it, no hedge is sent
+        acquired, estimated = await _try_acquire_budget_async(client, model, messages, max_tokens)
+        return _send(estimated, hedge=True) if acquired else None
+    
+    content = await hedged_call_async(model, _call, _hedge)
+    if cache is not None and _is_cacheable(content, response_format, validate):
+        cache.put(cache_key, content)
+    return content
+
+
+
+def _chunk_usage(chunk):
+    x_groq = getattr(chunk, 'x_groq', None)
+    return getattr(x_groq, 'usage', None) or getattr(chunk, 'usage', None)
+
+
+def _chunk_token(chunk) -> str:
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+
+def _stream_stats(start: float, first_token_at: float, end: float, token_count: int, usage=None) -> dict:
+    completion_tokens = getattr(usage, 'completion_tokens', None) or token_count
+    generation_time = end - first_token_at if first_token_at else 0
+    return {
+        "cached": False,
+        "time_to_first_token_s": round(first_token_at - start, 3) if first_token_at else None,
+        "total_time_s": round(end - start, 3),
+        "completion_tokens": completion_tokens,
+        "tokens_per_sec": round(completion_tokens / generation_time, 1) if generation_time > 0 else None
+    }
+
+
+def _cached_stream_stats() -> dict:
+    return {
+        "cached": True,
+        "time_to_first_token_s": 0.0,
+        "total_time_s": 0.0,
+        "completion_tokens": None,
+        "tokens_per_sec": None
+    }
+
+
+def stream_llm_call(client, model: str, messages: list, temperature: float,
+                    max_tokens: int = None, on_token: Callable = None) -> tuple:
+    """Stream a completion, calling ``on_token`` with each text delta.
+
+    Returns ``(content, stats)`` where stats holds time-to-first-token and
+    tokens/sec. Only opening the stream is retried; a failure mid-stream is
+    raised so callers never see duplicated output.
+    """
+    cache = _response_cache(client)
+    cache_key = None
+    if cache is not None:
+        cache_key = make_cache_key(model, messages, temperature, None, max_tokens)
+        cached = _lookup_cache(cache, cache_key)
+        if cached is not None:
+            if on_token:
+                on_token(cached)
+            return cached, _cached_stream_stats()
+    
+    estimated = start = None
+    
+    @retry_with_backoff(breaker=llm_circuit_breaker, trace_name="llm_stream_open")
+    def _open():
+        nonlocal estimated, start
+        estimated = _acquire_budget(client, model, messages, max_tokens)
+        start = time.perf_counter()
+        kwargs = _request_kwargs(model, messages, temperature, None, max_tokens)
+        return client.chat.completions.create(stream=True, **kwargs)
+    
+    stream = _open()
+    parts = []
+    first_token_at = None
+    usage = None
+    with span("llm_stream", cat="http", model=model) as stream_span:
+        for chunk in stream:
+            usage = _chunk_usage(chunk) or usage
+            token = _chunk_token(chunk)
+            if token:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                parts.append(token)
+                if on_token:
+                    on_token(token)
+        _trace_usage(stream_span, usage)
+    end = time.perf_counter()
+    
+    content = "".join(parts)
+    _record_usage(usage, end - start)
+    _settle_budget(client, model, estimated, usage)
+    if cache is not None and _is_cacheable(content):
+        cache.put(cache_key, content)
+    return content, _stream_stats(start, first_token_at, end, len(parts), usage)
+
+
+async def stream_llm_call_async(client, model: str, messages: list, temperature: float,
+                                max_tokens: int = None, on_token: Callable = None) -> tuple:
+    cache = _response_cache(client)
+    cache_key = None
+    if cache is not None:
+        cache_key = make_cache_key(model, messages, temperature, None, max_tokens)
+        cached = _lookup_cache(cache, cache_key)
+        if cached is not None:
+            if on_token:
+                on_token(cached)
+            return cached, _cached_stream_stats()
+    
+    estimated = start = None
+    
+    @retry_with_backoff(breaker=llm_circuit_breaker, trace_name="llm_stream_open")
+    async def _open():
+        nonlocal estimated, start
+        estimated = await _acquire_budget_async(client, model, messages, max_tokens)
+        start = time.perf_counter()
+        kwargs = _request_kwargs(model, messages, temperature, None, max_tokens)
+        return await client.chat.completions.create(stream=True, **kwargs)
+    
+    stream = await _open()
+    parts = []
+    first_token_at = None
+    usage = None
+    with span("llm_stream", cat="http", model=model) as stream_span:
+        async for chunk in stream:
+            usage = _chunk_usage(chunk) or usage
+            token = _chunk_token(chunk)
+            if token:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                parts.append(token)
+                if on_token:
+                    on_token(token)
+        _trace_usage(stream_span, usage)
+    end = time.perf_counter()
+    
+    content = "".join(parts)
+    _record_usage(usage, end - start)
+    await _settle_budget_async(client, model, estimated, usage)
+    if cache is not None and _is_cacheable(content):
+        cache.put(cache_key, content)
+    return content, _stream_stats(start, first_token_at, end, len(parts), usage)
@@ -1,13 +1,12 @@
 import json
-from groq import Groq
 from prompts.templates import WORLD_DEFINITION_PROMPT
-from config import GROQ_API_KEY, MODEL_NAME, TEMPERATURE
-from pipeline.utils import parse_llm_json, make_llm_call
+from config import MODEL_NAME, TEMPERATURE
+from pipeline.utils import parse_llm_json, make_llm_call, make_llm_call_async
+from pipeline.clients import get_client, get_async_client
+from pipeline.schemas import validate_world_definition
 
 
-def define_target_world(target_setting: str, source_themes: list) -> dict:
-    client = Groq(api_key=GROQ_API_KEY)
-    
+def _build_request(target_setting: str, source_themes: list) -> dict:
     themes_text = "\n".join([
         f"- {t['theme']}: {t['description']}" 
         for t in source_themes
@@ -18,17 +17,28 @@ def define_target_world(target_setting: str, source_themes: list) -> dict:
         themes=themes_text
     )
     
-    response_content = make_llm_call(
-        client=client,
-        model=MODEL_NAME,
-        messages=[
+    return {
+        'model': MODEL_NAME,
+        'messages': [
             {"role": "system", "content": "You are a world-builder. Always respond with valid JSON only, no markdown."},
             {"role": "user", "content": prompt}
         ],
-        temperature=TEMPERATURE,
-        response_format={"type": "json_object"}
+        'temperature': TEMPERATURE,
+        'response_format': {"type": "json_object"},
+        'validate': lambda world: validate_world_definition(world)[0]
+    }
+
+
+def define_target_world(target_setting: str, source_themes: list) -> dict:
+    response_content = make_llm_call(client=get_client(), **_build_request(target_setting, source_themes))
+    return parse_llm_json(response_content)
+
+
+async def define_target_world_async(target_setting: str, source_themes: list) -> dict:
+    response_content = await make_llm_call_async(
+        client=get_async_client(),
+        **_build_request(target_setting, source_themes)
     )
-    
     return parse_llm_json(response_content)
 
 
@@ -43,6 +43,21 @@ Respond in the following JSON format ONLY (no markdown, no explanation):
     }}
 }}'''
 
+SOURCE_CHUNK_SUMMARY_PROMPT = '''Summarize {part_label} of a longer work so it can later be combined with summaries of the other parts.
+
+TEXT:
+{excerpt}
+
+In plain prose (no markdown, no JSON), cover:
+- Characters who appear: names, what they want, how they change, how they relate to others
+- Key events in order, with what causes them and what they lead to
+- Themes and motifs that surface
+- Setting details that matter to the story
+
+Do NOT copy any original text verbatim. Be concise.'''
+
+SOURCE_SUMMARIES_HEADER = '''The following are summaries of consecutive parts of a long work, in reading order. Treat them together as the whole story.'''
+
 WORLD_DEFINITION_PROMPT = '''You are a world-builder. Create a coherent alternate universe based on the user's target setting.
 
 TARGET SETTING: {target_setting}
@@ -217,6 +232,56 @@ Respond in the following JSON format ONLY (no markdown, no explanation):
     "suggestions": ["Optional improvements"]
 }}'''
 
+CONSISTENCY_CATEGORY_FORMATS = {
+    "thematic_fidelity": '''"thematic_fidelity": {
+        "score": 1-10,
+        "preserved_themes": ["Themes successfully carried over"],
+        "lost_themes": ["Themes that were not preserved (if any)"],
+        "assessment": "Overall evaluation"
+    }''',
+    "internal_consistency": '''"internal_consistency": {
+        "score": 1-10,
+        "logical_issues": ["Any plot holes or contradictions"],
+        "world_rule_violations": ["Any breaks in world logic"],
+        "assessment": "Overall evaluation"
+    }''',
+    "originality_check": '''"originality_check": {
+        "score": 1-10,
+        "copied_elements": ["Any elements too close to original (should be empty)"],
+        "successfully_transformed": ["Elements well-adapted"],
+        "assessment": "Overall evaluation"
+    }''',
+    "cultural_sensitivity": '''"cultural_sensitivity": {
+        "score": 1-10,
+        "concerns": ["Any potentially problematic elements"],
+        "positive_representation": ["Respectful elements"],
+        "assessment": "Overall evaluation"
+    }'''
+}
+
+CONSISTENCY_RECHECK_PROMPT = '''You are a narrative quality reviewer. A transformation was reviewed, and fixes were applied to address the issues you found. Re-check ONLY the categories listed below.
+
+PREVIOUS REVIEW OF THESE CATEGORIES:
+{previous_review}
+
+ISSUES THE FIXES WERE MEANT TO ADDRESS:
+{issues}
+
+SECTIONS CHANGED BY THE FIXES:
+{changed_sections}
+
+REFERENCE CONTEXT:
+{context}
+
+Everything not shown above is unchanged and was already reviewed. Be strict but fair.
+
+Respond in the following JSON format ONLY (no markdown, no explanation):
+{{
+    {categories_format},
+    "required_fixes": ["Mandatory changes that are still needed (empty if all issues are resolved)"],
+    "suggestions": ["Optional improvements"]
+}}'''
+
 STORY_GENERATION_PROMPT = '''You are a master storyteller. Write the final reimagined story.
 
 WORLD:
@@ -264,3 +329,73 @@ Respond in the following JSON format ONLY (no markdown, no explanation):
     ],
     "transformation_summary": "Overall description of the transformation approach"
 }}'''
+
+STORY_SECTION_PROMPT = '''You are a master storyteller. You are writing one section of a longer reimagined story; other writers are drafting the remaining sections at the same time.
+
+WORLD:
+{world}
+
+CHARACTERS:
+{characters}
+
+THIS SECTION ({index} of {total}): {label}
+{beat}
+
+THE PREVIOUS SECTION ENDS WITH:
+{previous_handoff}
+
+THE NEXT SECTION BEGINS WITH:
+{next_handoff}
+
+Write only this section as engaging prose.
+
+Requirements:
+- Pick up seamlessly from where the previous section ends (or open the story if this is the first section)
+- End on a moment that leads naturally into the next section (or close the story with emotional resonance if this is the last)
+- Include dialogue that feels natural to the new world
+- Show, don't tell - demonstrate themes through action
+- Do not add a section heading and do not retell events from other sections
+
+Write the section now:'''
+
+CHARACTER_SINGLE_TRANSFORM_PROMPT = '''You are a character designer. Transform ONE original character to fit the new world while preserving their essence.
+
+ORIGINAL CHARACTER:
+{character}
+
+FULL ORIGINAL CAST (for relationships only):
+{cast}
+
+TARGET WORLD:
+{world}
+{feedback}
+Preserve the character's core archetype, motivation, and flaw.
+Create a new name, role, and identity appropriate to the new world.
+Do NOT use any original dialogue or specific descriptions.
+
+Respond in the following JSON format ONLY (no markdown, no explanation):
+{{
+    "original_name": "Name from source",
+    "new_name": "Name in new world",
+    "new_identity": "Who they are in this world",
+    "occupation_or_role": "Their position in this society",
+    "preserved_motivation": "Same core drive, recontextualized",
+    "preserved_flaw": "Same weakness, recontextualized",
+    "world_specific_traits": ["Trait fitting the new world"],
+    "key_relationships": ["Relationship to other characters in the cast"],
+    "visual_description": "Brief appearance in new world context"
+}}'''
+
+GROUP_DYNAMICS_PROMPT = '''You are a character designer. Describe how this transformed cast relates to each other.
+
+TRANSFORMED CAST:
+{characters}
+
+Respond in the following JSON format ONLY (no markdown, no explanation):
+{{
+    "group_dynamics": {{
+        "alliances": ["Who works together"],
+        "conflicts": ["Who opposes whom"],
+        "key_relationship_transformation": "How the central relationship changes in context"
+    }}
+}}'''
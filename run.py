@@ -1,24 +1,30 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
+import contextlib
 import sys
-import json
 from rich.console import Console
 from rich.prompt import Prompt
 from rich.panel import Panel
 
 sys.path.insert(0, '.')
 
-from config import validate_config
+from config import validate_config, BATCH_CONCURRENCY, STORY_MODE, CHARACTER_MODE
 from pipeline.orchestrator import NarrativeTransformer
+from pipeline.batch import load_jobs, run_batch
+from pipeline.source_index import build_abstraction_index
+from pipeline.clients import close_async_clients, get_backend
+from pipeline.cache import cache_bypassed
+from pipeline.tracing import configure_tracing
+from pipeline.cassette import configure_cassette, replaying, LATENCIES
+from pipeline.library import get_source_library, SourceNotFoundError
 from pipeline.world_definition import get_template_suggestions
 
 console = Console()
 
 
 def load_source_materials() -> list:
-    with open('data/source_materials.json', 'r', encoding='utf-8') as f:
-        materials = json.load(f)
-    return list(materials.items())
+    return get_source_library().entries()
 
 
 def display_numbered_sources(sources: list) -> None:
@@ -89,7 +95,17 @@ def show_world_templates() -> None:
     console.print()
 
 
-def interactive_mode() -> None:
+def echo_story_line(line: str) -> None:
+    console.print(line, markup=False, highlight=False)
+
+
+def report_render_timings(timings: dict) -> None:
+    if timings:
+        rendered = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items())
+        console.print(f"[dim]Rendered: {rendered}[/dim]")
+
+
+def interactive_mode(use_cache: bool = True, story_mode: str = "stream", character_mode: str = CHARACTER_MODE) -> None:
     console.print(Panel.fit(
         "[bold cyan]AI Narrative Transformation System[/bold cyan]\n"
         "Transform public-domain stories into alternate universes",
@@ -119,13 +135,20 @@ def interactive_mode() -> None:
         console.print("[red]Cancelled.[/red]")
         return
     
-    transformer = NarrativeTransformer()
+    transformer = NarrativeTransformer(
+        use_cache=use_cache,
+        story_mode=story_mode,
+        character_mode=character_mode,
+        story_echo=echo_story_line
+    )
     try:
         result = transformer.run_pipeline(source_title, target)
         
         console.print("\n[bold green]Story Preview (first 500 chars):[/bold green]")
         console.print(Panel(result['story'][:500] + "...", title="Preview"))
         
+        report_render_timings(transformer.wait_for_outputs())
+        
         console.print("\n[bold]Full output saved to 'output/' directory[/bold]")
         
     except Exception as e:
@@ -134,7 +157,12 @@ def interactive_mode() -> None:
 
 
 def cli_mode(args):
-    transformer = NarrativeTransformer(output_dir=args.output)
+    transformer = NarrativeTransformer(
+        output_dir=args.output,
+        use_cache=not args.no_cache,
+        story_mode=args.story_mode or STORY_MODE,
+        character_mode=args.character_mode
+    )
     
     if args.resume:
         if not transformer.can_resume():
@@ -159,6 +187,7 @@ def cli_mode(args):
                 console.print("\n[bold cyan]Generated Story:[/bold cyan]\n")
                 console.print(result['story'])
             
+            report_render_timings(transformer.wait_for_outputs())
             return result
             
         except Exception as e:
@@ -168,24 +197,35 @@ def cli_mode(args):
     source = args.source
     target = args.target
     
-    source_text = None
     if args.source_file:
-        with open(args.source_file, 'r', encoding='utf-8') as f:
-            source_text = f.read()
         source = args.source_file
+    else:
+        try:
+            _, entry = get_source_library().find(source)
+        except SourceNotFoundError as e:
+            console.print(f"[bold red]Error:[/bold red] {e}")
+            console.print("[dim]Run with --list-sources to see available works, or use --source-file.[/dim]")
+            sys.exit(1)
+        source = entry['title']
     
     console.print(f"[yellow]Transforming:[/yellow] {source}")
     console.print(f"[yellow]Into:[/yellow] {target}\n")
     
-    transformer = NarrativeTransformer(output_dir=args.output)
+    transformer = NarrativeTransformer(
+        output_dir=args.output,
+        use_cache=not args.no_cache,
+        story_mode=args.story_mode or STORY_MODE,
+        character_mode=args.character_mode
+    )
     
     try:
-        result = transformer.run_pipeline(source, target, source_text)
+        result = transformer.run_pipeline(source, target, source_file=args.source_file)
         
         if args.print_story:
             console.print("\n[bold cyan]Generated Story:[/bold cyan]\n")
             console.print(result['story'])
         
+        report_render_timings(transformer.wait_for_outputs())
         return result
         
     except Exception as e:
@@ -193,12 +233,81 @@ def cli_mode(args):
         raise
 
 
+def batch_mode(args):
+    try:
+        jobs = load_jobs(args.batch)
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]Batch Error:[/bold red] {e}")
+        sys.exit(1)
+    
+    summary_path = args.batch_summary or f"{args.output}/batch_summary.jsonl"
+    console.print(f"[yellow]Running {len(jobs)} job(s) with concurrency {args.concurrency}[/yellow]")
+    console.print(f"[yellow]Summary:[/yellow] {summary_path}\n")
+    
+    def report(summary):
+        if summary['status'] == 'ok':
+            console.print(f"  [green]✓[/green] {summary['id']}: score {summary['overall_score']}/10, "
+                          f"{summary['wall_time_s']:.1f}s, {summary['usage']['total_tokens']} tokens")
+        else:
+            console.print(f"  [red]✗[/red] {summary['id']}: {summary['error']}")
+    
+    results = run_batch(
+        jobs,
+        output_root=args.output,
+        summary_path=summary_path,
+        concurrency=args.concurrency,
+        use_cache=not args.no_cache,
+        on_result=report
+    )
+    
+    failed = sum(1 for r in results if r['status'] != 'ok')
+    console.print(f"\n[bold]Batch complete:[/bold] {len(results) - failed} succeeded, {failed} failed")
+    return results
+
+
+def warm_cache_mode(args):
+    console.print("[yellow]Building Stage 1 abstractions for the bundled sources...[/yellow]\n")
+    
+    def report(key, entry, status):
+        if status in ("built", "current"):
+            console.print(f"  [green]✓[/green] {entry['title']}: {status}")
+        else:
+            console.print(f"  [red]✗[/red] {entry['title']}: {status}")
+    
+    async def _run():
+        cache_context = cache_bypassed() if args.no_cache else contextlib.nullcontext()
+        try:
+            with cache_context:
+                return await build_abstraction_index(force=args.force, on_result=report)
+        finally:
+            await close_async_clients()
+    
+    results = asyncio.run(_run())
+    failed = sum(1 for status in results.values() if status not in ("built", "current"))
+    console.print(f"\n[bold]Abstraction index:[/bold] {len(results) - failed} ready, {failed} failed")
+    if failed:
+        sys.exit(1)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="AI Narrative Transformation System",
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     
+    parser.add_argument(
+        'command',
+        nargs='?',
+        choices=['warm-cache'],
+        help='warm-cache: prebuild Stage 1 abstractions for every bundled source'
+    )
+    
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='With warm-cache, rebuild entries even if they are current'
+    )
+    
     parser.add_argument(
         '--source', '-s',
         help='Name of the source story (e.g., "Romeo and Juliet")'
@@ -238,15 +347,109 @@ def main():
         help='Resume from the last checkpoint'
     )
     
+    parser.add_argument(
+        '--story-mode',
+        choices=NarrativeTransformer.STORY_MODES,
+        default=None,
+        help='How Stage 6 writes the story: one call, streamed into story.md, '
+             f'or concurrent per-section calls (default: {STORY_MODE}; stream in interactive mode)'
+    )
+    
+    parser.add_argument(
+        '--character-mode',
+        choices=NarrativeTransformer.CHARACTER_MODES,
+        default=CHARACTER_MODE,
+        help='How Stage 3 transforms the cast: one call, or one concurrent call per character '
+             f'(default: {CHARACTER_MODE})'
+    )
+    
+    parser.add_argument(
+        '--stream',
+        action='store_const',
+        dest='story_mode',
+        const='stream',
+        help='Shorthand for --story-mode stream'
+    )
+    
+    parser.add_argument(
+        '--batch', '-b',
+        metavar='JOBS_JSONL',
+        help='Run a batch of jobs from a JSONL file (one {"source", "target"} object per line)'
+    )
+    
+    parser.add_argument(
+        '--concurrency', '-c',
+        type=int,
+        default=BATCH_CONCURRENCY,
+        help=f'Maximum number of concurrent batch jobs (default: {BATCH_CONCURRENCY})'
+    )
+    
+    parser.add_argument(
+        '--batch-summary',
+        metavar='PATH',
+        help='Where to stream the batch JSONL summary (default: <output>/batch_summary.jsonl)'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Bypass the on-disk LLM response cache for this run'
+    )
+    
+    parser.add_argument(
+        '--trace',
+        metavar='PATH',
+        help='Append span timings for stages, LLM calls, parsing and validation to a JSONL trace file'
+    )
+    
+    parser.add_argument(
+        '--record',
+        metavar='CASSETTE',
+        help='Record every LLM request/response pair to a cassette file (.gz to compress)'
+    )
+    
+    parser.add_argument(
+        '--replay',
+        metavar='CASSETTE',
+        help='Serve LLM responses from a recorded cassette instead of the API'
+    )
+    
+    parser.add_argument(
+        '--replay-latency',
+        choices=LATENCIES,
+        default='recorded',
+        help='Wait the recorded latency before each replayed response, or none (default: recorded)'
+    )
+    
     args = parser.parse_args()
     
-    # Validate configuration
+    if args.trace:
+        configure_tracing(args.trace)
+    
+    if args.record and args.replay:
+        parser.error("--record and --replay cannot be used together")
+    try:
+        if args.record:
+            configure_cassette(args.record, "record")
+        elif args.replay:
+            configure_cassette(args.replay, "replay", args.replay_latency)
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]Cassette Error:[/bold red] {e}")
+        sys.exit(1)
+    
+    # Validate configuration (a replay needs no API key)
     try:
-        validate_config()
+        if not replaying():
+            validate_config()
+        get_backend()
     except ValueError as e:
         console.print(f"[bold red]Configuration Error:[/bold red] {e}")
         sys.exit(1)
     
+    if args.command == 'warm-cache':
+        warm_cache_mode(args)
+        return
+    
     # Handle list sources
     if args.list_sources:
         sources = load_source_materials()
@@ -254,6 +457,11 @@ def main():
         show_world_templates()
         return
     
+    # Handle batch mode
+    if args.batch:
+        batch_mode(args)
+        return
+    
     # Handle resume mode
     if args.resume:
         cli_mode(args)
@@ -265,7 +473,11 @@ def main():
     elif args.source_file and args.target:
         cli_mode(args)
     else:
-        interactive_mode()
+        interactive_mode(
+            use_cache=not args.no_cache,
+            story_mode=args.story_mode or "stream",
+            character_mode=args.character_mode
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from groq import RateLimitError
+
+from benchmarks.fake_llm_server import FakeLLMServer
+from pipeline import clients, hedging, ratelimit
+from pipeline.backends import GroqBackend, LLMBackend, OpenAICompatibleBackend, create_backend
+from pipeline.cache import cache_bypassed
+from pipeline.clients import close_clients, configure_backend, get_async_client, get_client
+from pipeline.hedging import LatencyHistory
+from pipeline.retry import RATE_LIMITED, classify_error
+from pipeline.utils import make_llm_call, stream_llm_call
+
+
+MESSAGES = [{"role": "user", "content": "Say hello"}]
+
+
+@pytest.fixture
+def server():
+    with FakeLLMServer(seed=3, median_ms=0) as server:
+        yield server
+
+
+@pytest.fixture
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(clients, '_backend', None)
+    monkeypatch.setattr(ratelimit, 'RATE_LIMIT_RPM', 0)
+    monkeypatch.setattr(ratelimit, 'RATE_LIMIT_TPM', 0)
+    monkeypatch.setattr(hedging, '_history', LatencyHistory(str(tmp_path / "cache")))
+    with cache_bypassed():
+        yield
+    close_clients()
+
+
+class TestCreateBackend:
+    
+    def test_selects_by_name(self):
+        assert isinstance(create_backend("groq", None, "key"), GroqBackend)
+        backend = create_backend("openai", "http://localhost:8000/v1", None)
+        assert isinstance(backend, OpenAICompatibleBackend)
+        assert backend.api_key == "none"
+    
+    def test_rejects_unknown_backend(self):
+        with pytest.raises(ValueError, match="Unknown LLM backend"):
+            create_backend("bedrock", None, None)
+    
+    def test_openai_backend_needs_base_url(self):
+        with pytest.raises(ValueError, match="LLM_BASE_URL"):
+            create_backend("openai", "", None)
+    
+    def test_backends_must_build_both_clients(self):
+        class SyncOnly(LLMBackend):
+            def client(self, api_key, http_client):
+                return None
+    
+        with pytest.raises(TypeError, match="async_client"):
+            SyncOnly()
+
+
+class TestOpenAICompatibleBackend:
+    
+    def test_completion(self, server, isolated):
+        configure_backend("openai", base_url=f"{server.base_url}/v1")
+        content = make_llm_call(get_client(), "local-model", MESSAGES, 0.7)
+    
+        assert len(content.split()) == 600
+        assert server.stats['requests'] == 1
+    
+    def test_stream_reports_usage(self, server, isolated):
+        configure_backend("openai", base_url=f"{server.base_url}/v1")
+        content, stats = stream_llm_call(get_client(), "local-model", MESSAGES, 0.7)
+    
+        assert len(content.split()) == 600
+        assert stats['completion_tokens'] == -(-len(content) // 4)
+    
+    def test_async_completion(self, server, isolated):
+        configure_backend("openai", base_url=f"{server.base_url}/v1")
+    
+        async def call():
+            client = get_async_client()
+            response = await client.chat.completions.create(model="local-model", messages=MESSAGES)
+            return response.choices[0].message.content
+    
+        assert asyncio.run(call())
+    
+    def test_errors_keep_groq_types(self, isolated):
+        with FakeLLMServer(median_ms=0, rate_limit_rate=1.0) as server:
+            configure_backend("openai", base_url=f"{server.base_url}/v1")
+            with pytest.raises(RateLimitError) as excinfo:
+                get_client().chat.completions.create(model="local-model", messages=MESSAGES)
+    
+        assert classify_error(excinfo.value) == RATE_LIMITED
+    
+    def test_pipeline_runs_on_openai_backend(self, server, isolated, tmp_path):
+        from pipeline.orchestrator import NarrativeTransformer
+    
+        configure_backend("openai", base_url=f"{server.base_url}/v1")
+        transformer = NarrativeTransformer(output_dir=str(tmp_path / "out"), use_cache=False, story_mode="stream")
+        result = transformer.run_pipeline("Hamlet", "Orbital station")
+    
+        assert result['story']
+        assert result['usage']['completion_tokens'] > 0
+        assert server.stats['errors'] == 0
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import os
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from pipeline import batch
+from pipeline.batch import load_jobs, run_batch, _job_output_dir
+from pipeline.metrics import RunMetrics
+
+
+class StubTransformer:
+    """Stands in for NarrativeTransformer; jobs whose target is 'fail' raise."""
+    
+    active = 0
+    peak = 0
+    
+    def __init__(self, output_dir, use_cache, console, story_mode, character_mode):
+        self.output_dir = output_dir
+        self.metrics = RunMetrics()
+        self.render_errors = {}
+    
+    async def run_pipeline_async(self, source, target, source_file=None):
+        cls = type(self)
+        cls.active += 1
+        cls.peak = max(cls.peak, cls.active)
+        try:
+            await asyncio.sleep(0.05)
+            if target == 'fail':
+                raise RuntimeError("stage 2 exploded")
+            with open(os.path.join(self.output_dir, "story.md"), 'w') as f:
+                f.write(f"{source} in {target}")
+        finally:
+            cls.active -= 1
+        return {'artifacts': {'metadata': {'overall_score': {'overall_score': 7.5, 'passed': True}}}}
+    
+    async def wait_for_outputs_async(self, timeout=None):
+        return {}
+
+
+class TestLoadJobs:
+    
+    def test_assigns_default_ids_and_skips_comments(self, tmp_path):
+        jobs_file = tmp_path / "jobs.jsonl"
+        jobs_file.write_text(
+            '{"id": "hamlet", "source": "Hamlet", "target": "Cyberpunk"}\n'
+            '\n'
+            '# comment\n'
+            '{"source": "Macbeth", "target": "Space"}\n'
+        )
+        jobs = load_jobs(str(jobs_file))
+        assert [job['id'] for job in jobs] == ['hamlet', 'job_0004']
+    
+    def test_missing_target_rejected(self, tmp_path):
+        jobs_file = tmp_path / "jobs.jsonl"
+        jobs_file.write_text('{"source": "Hamlet"}\n')
+        with pytest.raises(ValueError, match="target"):
+            load_jobs(str(jobs_file))
+    
+    def test_duplicate_ids_rejected(self, tmp_path):
+        jobs_file = tmp_path / "jobs.jsonl"
+        jobs_file.write_text(
+            '{"id": "a", "source": "Hamlet", "target": "X"}\n'
+            '{"id": "a", "source": "Macbeth", "target": "Y"}\n'
+        )
+        with pytest.raises(ValueError, match="duplicate"):
+            load_jobs(str(jobs_file))
+
+    
+    def test_unknown_source_rejected_with_suggestion(self, tmp_path):
+        jobs_file = tmp_path / "jobs.jsonl"
+        jobs_file.write_text('{"source": "Hamlet Prince", "target": "X"}\n')
+        with pytest.raises(ValueError, match="Did you mean: Hamlet"):
+            load_jobs(str(jobs_file))
+
+
+class TestJobOutputDir:
+    
+    def test_sanitizes_job_id(self):
+        assert _job_output_dir('out', {'id': 'hamlet / cyber'}) == 'out/hamlet_cyber'
+    
+    def test_explicit_output_wins(self):
+        assert _job_output_dir('out', {'id': 'a', 'output': 'custom'}) == 'custom'
+
+
+class TestRunBatch:
+    
+    @pytest.fixture(autouse=True)
+    def stub_transformer(self, monkeypatch):
+        stub = type('Stub', (StubTransformer,), {})
+        monkeypatch.setattr(batch, 'NarrativeTransformer', stub)
+        return stub
+    
+    def _jobs(self, count, fail=()):
+        return [
+            {'id': f"job{i}", 'source': 'Hamlet', 'target': 'fail' if i in fail else f"World {i}"}
+            for i in range(count)
+        ]
+    
+    def test_respects_concurrency_limit(self, tmp_path, stub_transformer):
+        results = run_batch(self._jobs(6), output_root=str(tmp_path), concurrency=2)
+        assert len(results) == 6
+        assert stub_transformer.peak == 2
+    
+    def test_each_job_writes_to_its_own_directory(self, tmp_path):
+        run_batch(self._jobs(3), output_root=str(tmp_path), concurrency=3)
+        for i in range(3):
+            job_dir = tmp_path / f"job{i}"
+            assert (job_dir / "story.md").read_text() == f"Hamlet in World {i}"
+            assert (job_dir / "run.log").exists()
+    
+    def test_summary_lines_streamed_as_jobs_finish(self, tmp_path):
+        summary_path = tmp_path / "summary.jsonl"
+        lines_at_result = []
+        
+        def on_result(summary):
+            lines_at_result.append(len(summary_path.read_text().splitlines()))
+        
+        run_batch(self._jobs(3), output_root=str(tmp_path), summary_path=str(summary_path),
+                  concurrency=1, on_result=on_result)
+        
+        assert lines_at_result == [1, 2, 3]
+        summaries = [json.loads(line) for line in summary_path.read_text().splitlines()]
+        assert [s['id'] for s in summaries] == ['job0', 'job1', 'job2']
+        assert summaries[0]['overall_score'] == 7.5
+    
+    def test_failing_job_does_not_abort_batch(self, tmp_path):
+        results = run_batch(self._jobs(3, fail={1}), output_root=str(tmp_path), concurrency=2)
+        
+        by_id = {r['id']: r for r in results}
+        assert by_id['job1']['status'] == 'error'
+        assert by_id['job1']['error'] == "RuntimeError: stage 2 exploded"
+        assert by_id['job0']['status'] == by_id['job2']['status'] == 'ok'
+        summary_lines = (tmp_path / "batch_summary.jsonl").read_text().splitlines()
+        assert len(summary_lines) == 3
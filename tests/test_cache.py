@@ -0,0 +1,132 @@
+import json
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from types import SimpleNamespace
+
+from pipeline.cache import ResponseCache, SQLiteStore, StageCache, make_cache_key
+from pipeline import memo, ratelimit, utils
+from pipeline.utils import make_llm_call
+
+
+class TestMakeCacheKey:
+    
+    def test_same_request_same_key(self):
+        messages = [{'role': 'user', 'content': 'Hamlet'}]
+        assert make_cache_key('m', messages, 0.7) == make_cache_key('m', list(messages), 0.7)
+    
+    def test_parameters_change_key(self):
+        messages = [{'role': 'user', 'content': 'Hamlet'}]
+        base = make_cache_key('m', messages, 0.7)
+        assert make_cache_key('m', messages, 0.3) != base
+        assert make_cache_key('other', messages, 0.7) != base
+        assert make_cache_key('m', messages, 0.7, {'type': 'json_object'}) != base
+        assert make_cache_key('m', messages, 0.7, max_tokens=100) != base
+
+
+class TestResponseCache:
+    
+    def test_miss_then_hit(self, tmp_path):
+        cache = ResponseCache(str(tmp_path), max_bytes=1024)
+        assert cache.get('k') is None
+        cache.put('k', 'value')
+        assert cache.get('k') == 'value'
+        assert cache.stats() == {'hits': 1, 'misses': 1}
+    
+    def test_lru_eviction(self, tmp_path):
+        cache = ResponseCache(str(tmp_path), max_bytes=10)
+        cache.put('a', 'aaaa')
+        cache.put('b', 'bbbb')
+        cache.get('a')
+        cache.put('c', 'cccc')
+        assert cache.get('b') is None
+        assert cache.get('a') == 'aaaa'
+        assert cache.get('c') == 'cccc'
+    
+    def test_shared_between_instances(self, tmp_path):
+        ResponseCache(str(tmp_path)).put('k', 'value')
+        assert ResponseCache(str(tmp_path)).get('k') == 'value'
+
+
+class FakeClient:
+    
+    def __init__(self, *replies):
+        self.chat = SimpleNamespace(completions=self)
+        self.replies = list(replies)
+    
+    def create(self, **kwargs):
+        message = SimpleNamespace(content=json.dumps(self.replies.pop(0)))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+class TestMakeLLMCallCaching:
+    
+    MESSAGES = [{'role': 'user', 'content': 'Hamlet'}]
+    JSON_MODE = {'type': 'json_object'}
+    
+    @pytest.fixture
+    def cache(self, tmp_path, monkeypatch):
+        cache = ResponseCache(str(tmp_path))
+        monkeypatch.setattr(utils, 'get_response_cache', lambda: cache)
+        monkeypatch.setattr(ratelimit, 'RATE_LIMIT_RPM', 0)
+        monkeypatch.setattr(ratelimit, 'RATE_LIMIT_TPM', 0)
+        return cache
+    
+    def _call(self, client, validate=None):
+        return json.loads(make_llm_call(client, 'm', self.MESSAGES, 0.7, self.JSON_MODE, validate=validate))
+    
+    def test_valid_response_cached(self, cache):
+        client = FakeClient({'ok': True})
+        self._call(client, validate=lambda data: data['ok'])
+        assert self._call(client, validate=lambda data: data['ok']) == {'ok': True}
+    
+    def test_rejected_response_not_cached(self, cache):
+        client = FakeClient({'ok': False}, {'ok': True})
+        assert self._call(client, validate=lambda data: data['ok']) == {'ok': False}
+        assert cache.get(make_cache_key('m', self.MESSAGES, 0.7, self.JSON_MODE)) is None
+        assert self._call(client, validate=lambda data: data['ok']) == {'ok': True}
+
+
+class TestStageCache:
+    
+    def test_round_trip(self, tmp_path):
+        cache = StageCache(str(tmp_path))
+        assert cache.get('fp') is None
+        cache.put('fp', 'world_definition', {'world_name': 'Neo Tokyo'})
+        assert StageCache(str(tmp_path)).get('fp') == {'world_name': 'Neo Tokyo'}
+    
+    def test_store_must_define_schema(self, tmp_path):
+        class SchemalessStore(SQLiteStore):
+            pass
+    
+        with pytest.raises(TypeError, match="_init_schema"):
+            SchemalessStore(str(tmp_path), "store.sqlite3")
+    
+    def test_clear_one_stage(self, tmp_path):
+        cache = StageCache(str(tmp_path))
+        cache.put('a', 'source_abstraction', {})
+        cache.put('b', 'world_definition', {})
+        cache.clear('source_abstraction')
+        assert cache.get('a') is None
+        assert cache.get('b') == {}
+
+
+class TestStageFingerprint:
+    
+    def test_key_order_does_not_matter(self):
+        assert (memo.stage_fingerprint('world_definition', {'a': 1, 'b': 2})
+                == memo.stage_fingerprint('world_definition', {'b': 2, 'a': 1}))
+    
+    def test_inputs_and_stage_change_fingerprint(self):
+        base = memo.stage_fingerprint('world_definition', {'target_setting': 'Mars'})
+        assert memo.stage_fingerprint('world_definition', {'target_setting': 'Venus'}) != base
+        assert memo.stage_fingerprint('plot_reconstruction', {'target_setting': 'Mars'}) != base
+    
+    def test_template_and_settings_change_fingerprint(self, monkeypatch):
+        base = memo.stage_fingerprint('world_definition', {'target_setting': 'Mars'})
+        monkeypatch.setitem(memo.STAGE_TEMPLATES, 'world_definition', ('Edited template',))
+        assert memo.stage_fingerprint('world_definition', {'target_setting': 'Mars'}) != base
+        monkeypatch.undo()
+        monkeypatch.setattr(memo, 'MODEL_NAME', 'other-model')
+        assert memo.stage_fingerprint('world_definition', {'target_setting': 'Mars'}) != base
@@ -0,0 +1,226 @@
+import asyncio
+import time
+import pytest
+import sys
+from types import SimpleNamespace
+sys.path.insert(0, '.')
+
+from pipeline import cassette, hedging, ratelimit, utils
+from pipeline.cache import cache_bypassed
+from pipeline.cassette import Cassette, CassetteClient, CassetteMismatchError, configure_cassette, wrap_client
+from pipeline.hedging import LatencyHistory
+from pipeline.utils import make_llm_call, make_llm_call_async, stream_llm_call
+
+
+def messages(prompt: str) -> list:
+    return [{"role": "system", "content": "You are a test."}, {"role": "user", "content": prompt}]
+
+
+def usage(completion_tokens: int):
+    return SimpleNamespace(prompt_tokens=10, completion_tokens=completion_tokens, total_tokens=10 + completion_tokens)
+
+
+class FakeCompletions:
+    
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+    
+    def _content(self, kwargs) -> str:
+        self.calls += 1
+        return f"reply {self.calls} to {kwargs['messages'][-1]['content']}"
+    
+    def create(self, stream: bool = False, **kwargs):
+        time.sleep(self.delay)
+        content = self._content(kwargs)
+        if stream:
+            chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "))])
+                      for word in content.split()]
+            return iter(chunks + [SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=usage(len(chunks))))])
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage(5))
+
+
+class AsyncFakeCompletions(FakeCompletions):
+    
+    async def create(self, stream: bool = False, **kwargs):
+        await asyncio.sleep(self.delay)
+        message = SimpleNamespace(content=self._content(kwargs))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage(5))
+
+
+def fake_client(completions) -> SimpleNamespace:
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+class Offline:
+    
+    class chat:
+        class completions:
+            @staticmethod
+            def create(**kwargs):
+                raise AssertionError("replay must not reach the API")
+
+
+class AsyncOffline:
+    
+    class chat:
+        class completions:
+            @staticmethod
+            async def create(**kwargs):
+                raise AssertionError("replay must not reach the API")
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(ratelimit, 'RATE_LIMIT_RPM', 0)
+    monkeypatch.setattr(ratelimit, 'RATE_LIMIT_TPM', 0)
+    monkeypatch.setattr(hedging, '_history', LatencyHistory(str(tmp_path / "cache")))
+    with cache_bypassed():
+        yield
+    configure_cassette(None)
+
+
+class TestCassette:
+    
+    def test_record_then_replay(self, tmp_path):
+        path = str(tmp_path / "run.jsonl")
+        recorder = Cassette(path, "record")
+        client = CassetteClient(fake_client(FakeCompletions()), recorder)
+        first = make_llm_call(client, "m", messages("hello"), 0.7)
+        second = make_llm_call(client, "m", messages("world"), 0.7, response_format={"type": "json_object"})
+        recorder.close()
+    
+        player = Cassette(path, "replay", latency="zero")
+        client = CassetteClient(Offline, player)
+        assert len(player) == 2
+        assert make_llm_call(client, "m", messages("world"), 0.7, response_format={"type": "json_object"}) == second
+        assert make_llm_call(client, "m", messages("hello"), 0.7) == first
+    
+    def test_identical_requests_replay_in_order(self, tmp_path):
+        path = str(tmp_path / "run.jsonl.gz")
+        recorder = Cassette(path, "record")
+        client = CassetteClient(fake_client(FakeCompletions()), recorder)
+        recorded = [make_llm_call(client, "m", messages("same"), 0.7) for _ in range(2)]
+        recorder.close()
+    
+        client = CassetteClient(Offline, Cassette(path, "replay", latency="zero"))
+        replayed = [make_llm_call(client, "m", messages("same"), 0.7) for _ in range(3)]
+        assert replayed == recorded + recorded[-1:]
+    
+    def test_stream_record_and_replay(self, tmp_path):
+        path = str(tmp_path / "run.jsonl")
+        recorder = Cassette(path, "record")
+        client = CassetteClient(fake_client(FakeCompletions()), recorder)
+        content, _ = stream_llm_call(client, "m", messages("stream me"), 0.7)
+        recorder.close()
+    
+        tokens = []
+        client = CassetteClient(Offline, Cassette(path, "replay", latency="zero"))
+        replayed, stats = stream_llm_call(client, "m", messages("stream me"), 0.7, on_token=tokens.append)
+        assert replayed == content == "".join(tokens)
+        assert stats['completion_tokens'] == 5
+    
+    def test_async_replay_uses_recorded_latency(self, tmp_path):
+        path = str(tmp_path / "run.jsonl")
+    
+        async def record():
+            client = CassetteClient(fake_client(AsyncFakeCompletions(delay=0.2)), recorder)
+            return await make_llm_call_async(client, "m", messages("slow"), 0.7)
+    
+        async def replay(latency):
+            client = CassetteClient(AsyncOffline, Cassette(path, "replay", latency=latency))
+            start = time.perf_counter()
+            content = await make_llm_call_async(client, "m", messages("slow"), 0.7)
+            return content, time.perf_counter() - start
+    
+        recorder = Cassette(path, "record")
+        recorded = asyncio.run(record())
+        recorder.close()
+    
+        content, elapsed = asyncio.run(replay("recorded"))
+        assert content == recorded
+        assert elapsed >= 0.18
+        _, elapsed = asyncio.run(replay("zero"))
+        assert elapsed < 0.1
+    
+    def test_mismatch_reports_prompt_diff(self, tmp_path):
+        path = str(tmp_path / "run.jsonl")
+        recorder = Cassette(path, "record")
+        make_llm_call(CassetteClient(fake_client(FakeCompletions()), recorder), "m", messages("Target: Mars"), 0.7)
+        recorder.close()
+    
+        client = CassetteClient(Offline, Cassette(path, "replay", latency="zero"))
+        with pytest.raises(CassetteMismatchError) as excinfo:
+            make_llm_call(client, "m", messages("Target: Venus"), 0.7)
+        assert "-Target: Mars" in str(excinfo.value)
+        assert "+Target: Venus" in str(excinfo.value)
+    
+    def test_wrap_client_follows_configuration(self, tmp_path):
+        client = fake_client(FakeCompletions())
+        assert wrap_client(client) is client
+    
+        configure_cassette(str(tmp_path / "run.jsonl"), "record")
+        assert isinstance(wrap_client(client), CassetteClient)
+        assert not cassette.replaying()
+    
+    def test_rejects_unknown_mode(self, tmp_path):
+        with pytest.raises(ValueError):
+            Cassette(str(tmp_path / "run.jsonl"), "rewind")
+
+
+class StaleCache:
+    
+    def __init__(self):
+        self.puts = 0
+    
+    def get(self, key):
+        return "stale"
+    
+    def put(self, key, content):
+        self.puts += 1
+
+
+class CountingLimiter:
+    
+    def __init__(self):
+        self.acquired = 0
+    
+    def acquire(self, model, tokens):
+        self.acquired += 1
+        return 0.0
+    
+    def settle(self, model, estimated, actual):
+        pass
+
+
+class TestCassetteBypass:
+    
+    @pytest.fixture
+    def stale_cache(self, monkeypatch):
+        cache = StaleCache()
+        monkeypatch.setattr(utils, 'get_response_cache', lambda: cache)
+        return cache
+    
+    @pytest.fixture
+    def limiter(self, monkeypatch):
+        limiter = CountingLimiter()
+        monkeypatch.setattr(utils, 'get_rate_limiter', lambda: limiter)
+        return limiter
+    
+    def test_recording_skips_response_cache(self, tmp_path, stale_cache):
+        client = CassetteClient(fake_client(FakeCompletions()), Cassette(str(tmp_path / "run.jsonl"), "record"))
+        assert make_llm_call(client, "m", messages("hello"), 0.7) == "reply 1 to hello"
+        assert stale_cache.puts == 0
+        assert make_llm_call(fake_client(FakeCompletions()), "m", messages("hello"), 0.7) == "stale"
+    
+    def test_recording_is_rate_limited_and_replay_is_not(self, tmp_path, limiter):
+        path = str(tmp_path / "run.jsonl")
+        recorder = Cassette(path, "record")
+        make_llm_call(CassetteClient(fake_client(FakeCompletions()), recorder), "m", messages("hello"), 0.7)
+        recorder.close()
+        assert limiter.acquired == 1
+    
+        client = CassetteClient(Offline, Cassette(path, "replay", latency="zero"))
+        make_llm_call(client, "m", messages("hello"), 0.7)
+        assert limiter.acquired == 1
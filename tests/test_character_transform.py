@@ -0,0 +1,111 @@
+import asyncio
+import json
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+import httpx
+from groq import AuthenticationError, InternalServerError
+
+from pipeline import character_transform
+from pipeline.character_transform import transform_characters_fanout_async
+from pipeline.retry import CircuitOpenError
+
+
+CAST = [{'name': 'Hamlet', 'archetype': 'Avenger'}, {'name': 'Ophelia', 'archetype': 'Innocent'}]
+
+
+def _character(name):
+    return {
+        'original_name': name, 'new_name': f"{name} Prime", 'new_identity': 'Heir', 'occupation_or_role': 'Analyst',
+        'preserved_motivation': 'Justice', 'preserved_flaw': 'Indecision', 'world_specific_traits': ['Implant']
+    }
+
+
+def _api_error(cls, status):
+    request = httpx.Request("POST", "http://llm.test/chat/completions")
+    return cls("error", response=httpx.Response(status, request=request), body=None)
+
+
+class FakeLLM:
+    """Answers single-character calls from ``replies[name]`` in order; group dynamics always succeed."""
+    
+    def __init__(self, replies):
+        self.replies = {name: list(items) for name, items in replies.items()}
+        self.calls = []
+    
+    async def __call__(self, client, messages, **kwargs):
+        prompt = messages[-1]['content']
+        if "TRANSFORMED CAST" in prompt:
+            self.calls.append(('group', None))
+            return json.dumps({'group_dynamics': {'key_relationship_transformation': 'Rivals'}})
+        name = next(c['name'] for c in CAST if f'"name":"{c["name"]}"' in prompt)
+        self.calls.append((name, "PREVIOUS ATTEMPT WAS REJECTED" in prompt))
+        reply = self.replies[name].pop(0)
+        if isinstance(reply, BaseException):
+            raise reply
+        return reply if isinstance(reply, str) else json.dumps(reply)
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    def install(replies):
+        fake = FakeLLM(replies)
+        monkeypatch.setattr(character_transform, 'make_llm_call_async', fake)
+        monkeypatch.setattr(character_transform, 'get_async_client', lambda: object())
+        return fake
+    return install
+
+
+def _run(max_retries=2):
+    return asyncio.run(transform_characters_fanout_async(CAST, {'world_name': 'Orbital'}, max_retries=max_retries))
+
+
+class TestTransformCharactersFanout:
+    
+    def test_transforms_each_character(self, fake_llm):
+        fake = fake_llm({'Hamlet': [_character('Hamlet')], 'Ophelia': [_character('Ophelia')]})
+        result = _run()
+    
+        assert [c['original_name'] for c in result['transformed_characters']] == ['Hamlet', 'Ophelia']
+        assert result['group_dynamics'] == {'key_relationship_transformation': 'Rivals'}
+        assert sorted(name for name, _ in fake.calls if name != 'group') == ['Hamlet', 'Ophelia']
+    
+    def test_validation_and_parse_errors_fed_back(self, fake_llm):
+        invalid = dict(_character('Ophelia'), new_identity='')
+        fake = fake_llm({'Hamlet': ['not json', _character('Hamlet')], 'Ophelia': [invalid, _character('Ophelia')]})
+        result = _run()
+    
+        assert len(result['transformed_characters']) == 2
+        assert ('Hamlet', True) in fake.calls
+        assert ('Ophelia', True) in fake.calls
+    
+    def test_fatal_error_raised_without_retry(self, fake_llm):
+        error = _api_error(AuthenticationError, 401)
+        fake = fake_llm({'Hamlet': [error, error], 'Ophelia': [error, error]})
+        with pytest.raises(AuthenticationError):
+            _run()
+    
+        assert len(fake.calls) == 2
+    
+    def test_circuit_open_raised(self, fake_llm):
+        fake = fake_llm({'Hamlet': [_character('Hamlet')], 'Ophelia': [CircuitOpenError(5.0)]})
+        with pytest.raises(CircuitOpenError):
+            _run()
+    
+        assert len(fake.calls) == 2
+    
+    def test_transient_error_retried_without_feedback(self, fake_llm):
+        fake = fake_llm({
+            'Hamlet': [_character('Hamlet')],
+            'Ophelia': [_api_error(InternalServerError, 503), _character('Ophelia')]
+        })
+        result = _run()
+    
+        assert len(result['transformed_characters']) == 2
+        assert [rejected for name, rejected in fake.calls if name == 'Ophelia'] == [False, False]
+    
+    def test_gives_up_after_max_retries(self, fake_llm):
+        fake_llm({'Hamlet': [_character('Hamlet')], 'Ophelia': ['bad', 'bad']})
+        with pytest.raises(ValueError, match="Ophelia"):
+            _run(max_retries=1)
@@ -0,0 +1,111 @@
+import json
+import os
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from pipeline import checkpoint
+from pipeline.checkpoint import CheckpointStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore(str(tmp_path / "checkpoints"), legacy_path=str(tmp_path / "checkpoint.json"))
+
+
+def _write_legacy(path):
+    with open(path, 'w') as f:
+        json.dump({
+            'completed_stage': 2,
+            'source_name': 'Hamlet',
+            'target_setting': 'Cyberpunk Tokyo',
+            'artifacts': {'source_analysis': {'title': 'Hamlet'}, 'world': {}},
+            'timestamp': '2025-01-01T00:00:00'
+        }, f)
+
+
+class TestCheckpointStore:
+    
+    def test_each_stage_is_its_own_record(self, store):
+        store.begin("Hamlet", "Cyberpunk Tokyo")
+        store.save_stage(1, {'source_analysis': {'title': 'Hamlet'}})
+        store.save_stage(2, {'world': {'world_name': 'Neo Tokyo'}})
+        
+        files = sorted(os.listdir(store.directory))
+        assert files == ['01_stage_1.json', '02_stage_2.json', 'manifest.json']
+        with open(os.path.join(store.directory, '02_stage_2.json')) as f:
+            assert json.load(f) == {'stage': 2, 'artifacts': {'world': {'world_name': 'Neo Tokyo'}}}
+        assert store.manifest()['completed_stage'] == 2
+    
+    def test_earlier_records_are_not_rewritten(self, store):
+        store.begin("Hamlet", "Cyberpunk Tokyo")
+        first = store.save_stage(1, {'source_analysis': {}})
+        mtime = os.stat(first).st_mtime_ns
+        store.save_stage(2, {'world': {}})
+        assert os.stat(first).st_mtime_ns == mtime
+    
+    def test_load_reads_latest_value_only(self, store):
+        store.begin("Hamlet", "Cyberpunk Tokyo")
+        store.save_stage(4, {'plot': {'version': 1}})
+        store.save_stage(5, {'plot': {'version': 2}, 'consistency': {}})
+        os.remove(os.path.join(store.directory, '01_stage_4.json'))
+        
+        assert store.load_artifacts() == {'plot': {'version': 2}, 'consistency': {}}
+    
+    def test_load_subset(self, store):
+        store.begin("Hamlet", "Cyberpunk Tokyo")
+        store.save_stage(1, {'source_analysis': {'title': 'Hamlet'}})
+        store.save_stage(2, {'world': {}})
+        os.remove(os.path.join(store.directory, '02_stage_2.json'))
+        
+        assert store.load_artifacts(('source_analysis',)) == {'source_analysis': {'title': 'Hamlet'}}
+    
+    def test_reopened_store_sees_manifest(self, store):
+        store.begin("Hamlet", "Cyberpunk Tokyo")
+        store.save_stage(1, {'source_analysis': {}})
+        reopened = CheckpointStore(store.directory)
+        assert reopened.exists()
+        assert reopened.manifest()['source_name'] == "Hamlet"
+    
+    def test_begin_discards_previous_run(self, store):
+        store.begin("Hamlet", "Cyberpunk Tokyo")
+        store.save_stage(1, {'source_analysis': {}})
+        store.begin("The Odyssey", "Space")
+        assert os.listdir(store.directory) == ['manifest.json']
+        assert store.load_artifacts() == {}
+    
+    def test_save_without_begin_fails(self, store):
+        with pytest.raises(RuntimeError):
+            store.save_stage(1, {})
+    
+    def test_clear(self, store):
+        store.begin("Hamlet", "Cyberpunk Tokyo")
+        store.clear()
+        assert not store.exists()
+        assert not os.path.exists(store.directory)
+    
+    def test_legacy_checkpoint_migrated(self, store):
+        _write_legacy(store.legacy_path)
+        
+        manifest = store.manifest()
+        assert manifest['completed_stage'] == 2
+        assert manifest['timestamp'] == '2025-01-01T00:00:00'
+        assert store.load_artifacts() == {'source_analysis': {'title': 'Hamlet'}, 'world': {}}
+        assert not os.path.exists(store.legacy_path)
+    
+    def test_failed_migration_keeps_legacy_checkpoint(self, store, monkeypatch):
+        _write_legacy(store.legacy_path)
+        write_text_atomic = checkpoint.write_text_atomic
+    
+        def crash_on_manifest(path, text):
+            if path == store.manifest_path:
+                raise OSError("disk full")
+            return write_text_atomic(path, text)
+    
+        monkeypatch.setattr(checkpoint, 'write_text_atomic', crash_on_manifest)
+        with pytest.raises(OSError):
+            store.manifest()
+        assert os.path.exists(store.legacy_path)
+    
+        monkeypatch.setattr(checkpoint, 'write_text_atomic', write_text_atomic)
+        assert CheckpointStore(store.directory, store.legacy_path).manifest()['completed_stage'] == 2
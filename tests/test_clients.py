@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from pipeline import clients
+from pipeline.backends import LLMBackend
+from pipeline.clients import close_async_clients, close_clients, configure_backend, get_async_client, get_client
+
+
+class FakeClient:
+    
+    def __init__(self, api_key, http_client):
+        self.api_key = api_key
+        self.http_client = http_client
+        self.closed = False
+    
+    def close(self):
+        self.closed = True
+        self.http_client.close()
+
+
+class FakeAsyncClient(FakeClient):
+    
+    async def close(self):
+        self.closed = True
+        await self.http_client.aclose()
+
+
+class FakeBackend(LLMBackend):
+    
+    name = "fake"
+    
+    def __init__(self):
+        super().__init__(api_key="default-key")
+        self.built = []
+    
+    def client(self, api_key, http_client):
+        self.built.append(api_key)
+        return FakeClient(api_key, http_client)
+    
+    def async_client(self, api_key, http_client):
+        self.built.append(api_key)
+        return FakeAsyncClient(api_key, http_client)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = FakeBackend()
+    monkeypatch.setattr(clients, '_backend', backend)
+    monkeypatch.setattr(clients, '_clients', {})
+    monkeypatch.setattr(clients, '_async_clients', clients.weakref.WeakKeyDictionary())
+    yield backend
+    close_clients()
+
+
+class TestGetClient:
+    
+    def test_one_client_shared_across_threads(self, backend):
+        seen = []
+        threads = [threading.Thread(target=lambda: seen.append(get_client())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    
+        assert len({id(client) for client in seen}) == 1
+        assert backend.built == ["default-key"]
+    
+    def test_one_client_per_api_key(self, backend):
+        assert get_client("a") is get_client("a")
+        assert get_client("a") is not get_client("b")
+        assert get_client().api_key == "default-key"
+    
+    def test_transport_uses_configured_pool(self, backend, monkeypatch):
+        monkeypatch.setattr(clients, 'HTTP_MAX_CONNECTIONS', 7)
+        monkeypatch.setattr(clients, 'HTTP_MAX_KEEPALIVE_CONNECTIONS', 3)
+        pool = get_client().http_client._transport._pool
+    
+        assert pool._max_connections == 7
+        assert pool._max_keepalive_connections == 3
+    
+    def test_configure_backend_closes_previous_clients(self, backend, monkeypatch):
+        client = get_client()
+        monkeypatch.setattr(clients, 'create_backend', lambda name, base_url, api_key: FakeBackend())
+        configure_backend("fake")
+    
+        assert client.closed
+        assert get_client() is not client
+
+
+class TestGetAsyncClient:
+    
+    def test_shared_within_a_loop(self, backend):
+        async def stage():
+            await asyncio.sleep(0)
+            return get_async_client()
+    
+        async def run():
+            first, second = await asyncio.gather(stage(), stage())
+            await close_async_clients()
+            return first, second
+    
+        first, second = asyncio.run(run())
+        assert first is second
+        assert first.closed
+    
+    def test_one_client_per_loop(self, backend):
+        async def run():
+            return get_async_client()
+    
+        assert asyncio.run(run()) is not asyncio.run(run())
+        assert backend.built == ["default-key", "default-key"]
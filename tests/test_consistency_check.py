@@ -0,0 +1,135 @@
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from pipeline.consistency_check import (
+    categories_to_recheck,
+    artifact_sections,
+    changed_sections,
+    select_fix_fragments,
+    _merge_fixes,
+    _merge_recheck,
+    _unchanged_recheck
+)
+
+
+PLOT = {
+    'reconstructed_plot': {
+        'setup': {'scene': 'A neon market'},
+        'rising_action': [
+            {'event': 'Leak', 'cause': 'Ghost', 'effect': 'Doubt'},
+            {'event': 'Play', 'cause': 'Doubt', 'effect': 'Proof'}
+        ],
+        'climax': {'event': 'Duel', 'stakes': 'The company'}
+    },
+    'cause_effect_chain': ['Leak -> Doubt']
+}
+
+CHARACTERS = {
+    'transformed_characters': [{'original_name': 'Hamlet'}, {'original_name': 'Ophelia'}],
+    'group_dynamics': {'alliances': []}
+}
+
+REVIEW = {
+    'thematic_fidelity': {'score': 8, 'lost_themes': []},
+    'internal_consistency': {'score': 5, 'logical_issues': ['Climax stakes unclear'], 'world_rule_violations': []},
+    'originality_check': {'score': 9, 'copied_elements': ['None']},
+    'cultural_sensitivity': {'score': 9, 'concerns': []},
+    'overall_pass': False,
+    'required_fixes': ['Clarify climax stakes'],
+    'overall_score': {'overall_score': 7.6}
+}
+
+
+class TestCategoriesToRecheck:
+    
+    def test_only_categories_with_issues(self):
+        assert categories_to_recheck(REVIEW) == ['internal_consistency']
+    
+    def test_falls_back_to_all_categories(self):
+        assert len(categories_to_recheck({'required_fixes': ['Something']})) == 4
+
+
+class TestChangedSections:
+    
+    def test_section_paths(self):
+        sections = artifact_sections(PLOT, CHARACTERS)
+        assert 'plot.reconstructed_plot.rising_action[1]' in sections
+        assert 'characters.transformed_characters[0]' in sections
+        assert 'plot.cause_effect_chain' in sections
+    
+    def test_only_changed_sections_reported(self):
+        fixed = {**PLOT, 'reconstructed_plot': {**PLOT['reconstructed_plot'], 'climax': {'event': 'Duel', 'stakes': 'Denmark Corp'}}}
+        changed = changed_sections(PLOT, CHARACTERS, fixed, CHARACTERS)
+        assert changed == {'plot.reconstructed_plot.climax': {'event': 'Duel', 'stakes': 'Denmark Corp'}}
+    
+    def test_removed_sections_reported(self):
+        trimmed = {'transformed_characters': CHARACTERS['transformed_characters'][:1], 'group_dynamics': {'alliances': []}}
+        changed = changed_sections(PLOT, CHARACTERS, PLOT, trimmed)
+        assert changed == {'characters.transformed_characters[1]': None}
+
+
+class TestMergeRecheck:
+    
+    def test_rescored_categories_replace_previous(self):
+        response = {
+            'internal_consistency': {'score': 9, 'logical_issues': []},
+            'thematic_fidelity': {'score': 1},
+            'required_fixes': []
+        }
+        merged = _merge_recheck(REVIEW, response, ['internal_consistency'], {'plot.reconstructed_plot.climax': {}})
+        assert merged['internal_consistency']['score'] == 9
+        assert merged['thematic_fidelity'] == REVIEW['thematic_fidelity']
+        assert merged['required_fixes'] == []
+        assert 'overall_score' not in merged
+        assert merged['recheck']['changed_sections'] == ['plot.reconstructed_plot.climax']
+    
+    def test_missing_category_keeps_previous(self):
+        merged = _merge_recheck(REVIEW, {'required_fixes': []}, ['internal_consistency'], {'x': 1})
+        assert merged['internal_consistency'] == REVIEW['internal_consistency']
+    
+    def test_unchanged_keeps_required_fixes(self):
+        result = _unchanged_recheck(REVIEW)
+        assert result['required_fixes'] == REVIEW['required_fixes']
+        assert result['recheck']['rescored_categories'] == []
+
+
+class TestFixFragments:
+    
+    def test_only_named_sections_sent(self):
+        fragments = select_fix_fragments(['Climax stakes are unclear'], PLOT, CHARACTERS)
+        assert list(fragments) == ['plot.reconstructed_plot.climax']
+    
+    def test_character_names_match(self):
+        fragments = select_fix_fragments(['Ophelia lacks agency'], PLOT, CHARACTERS)
+        assert list(fragments) == ['characters.transformed_characters[1]']
+    
+    def test_unmatched_issue_adds_nothing(self):
+        fragments = select_fix_fragments(['Climax is rushed', 'Tone is uneven'], PLOT, CHARACTERS)
+        assert list(fragments) == ['plot.reconstructed_plot.climax']
+        assert select_fix_fragments(['Tone is too light'], PLOT, CHARACTERS) == {}
+    
+    def test_numbered_event_selects_one_item(self):
+        fragments = select_fix_fragments(['Rising action event 2 contradicts the rules'], PLOT, CHARACTERS)
+        assert list(fragments) == ['plot.reconstructed_plot.rising_action[1]']
+        fragments = select_fix_fragments(['rising_action[0] lacks a cause'], PLOT, CHARACTERS)
+        assert list(fragments) == ['plot.reconstructed_plot.rising_action[0]']
+    
+    def test_unnumbered_rising_action_selects_every_item(self):
+        fragments = select_fix_fragments(['Rising action drags'], PLOT, CHARACTERS)
+        assert list(fragments) == [
+            'plot.reconstructed_plot.rising_action[0]', 'plot.reconstructed_plot.rising_action[1]'
+        ]
+    
+    def test_merge_applies_patches(self):
+        fixes = {'patches': [{'op': 'replace', 'path': 'plot.reconstructed_plot.climax.stakes', 'value': 'Denmark Corp'}]}
+        plot, characters, applied = _merge_fixes(fixes, ['Climax stakes'], PLOT, CHARACTERS)
+        assert plot['reconstructed_plot']['climax']['stakes'] == 'Denmark Corp'
+        assert plot['reconstructed_plot']['rising_action'] is not PLOT['reconstructed_plot']['rising_action']
+        assert applied[0]['patched_paths'] == ['plot.reconstructed_plot.climax.stakes']
+    
+    def test_merge_without_valid_patches_flags_review(self):
+        fixes = {'patches': [{'op': 'replace', 'path': 'plot.nowhere.x', 'value': 'y'}]}
+        plot, _, applied = _merge_fixes(fixes, ['Climax stakes'], PLOT, CHARACTERS)
+        assert plot is PLOT
+        assert [fix['status'] for fix in applied] == ['rejected', 'flagged']
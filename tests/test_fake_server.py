@@ -0,0 +1,155 @@
+import json
+import random
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from groq import Groq, RateLimitError
+
+from benchmarks.fake_llm_server import FakeLLMServer, ResponseSynthesizer, identify_template
+from prompts.templates import (
+    SOURCE_ABSTRACTION_PROMPT,
+    WORLD_DEFINITION_PROMPT,
+    CHARACTER_TRANSFORM_PROMPT,
+    CHARACTER_SINGLE_TRANSFORM_PROMPT,
+    CONSISTENCY_CHECK_PROMPT,
+    STORY_GENERATION_PROMPT
+)
+from pipeline import clients, hedging, ratelimit
+from pipeline.clients import close_clients
+from pipeline.hedging import LatencyHistory
+from pipeline.retry import RATE_LIMITED, classify_error, retry_after
+from pipeline.schemas import (
+    validate_source_abstraction,
+    validate_world_definition,
+    validate_character_transformation,
+    validate_transformed_character
+)
+
+
+@pytest.fixture
+def server():
+    with FakeLLMServer(seed=7, median_ms=0) as server:
+        yield server
+
+
+@pytest.fixture
+def synthesizer():
+    return ResponseSynthesizer(random.Random(0))
+
+
+class TestResponseSynthesizer:
+    
+    def test_identifies_templates(self):
+        assert identify_template(SOURCE_ABSTRACTION_PROMPT.format(source_material="x")) == "SOURCE_ABSTRACTION_PROMPT"
+        single = CHARACTER_SINGLE_TRANSFORM_PROMPT.format(character="{}", cast="[]", world="w", feedback="")
+        assert identify_template(single) == "CHARACTER_SINGLE_TRANSFORM_PROMPT"
+        assert identify_template("Hello there") is None
+    
+    def test_source_abstraction_is_valid(self, synthesizer):
+        prompt = SOURCE_ABSTRACTION_PROMPT.format(source_material="A story.")
+        data = json.loads(synthesizer.respond("SOURCE_ABSTRACTION_PROMPT", prompt, json_mode=True))
+    
+        valid, _, error = validate_source_abstraction(data)
+        assert valid, error
+    
+    def test_world_definition_is_valid(self, synthesizer):
+        prompt = WORLD_DEFINITION_PROMPT.format(target_setting="Mars", themes="love")
+        data = json.loads(synthesizer.respond("WORLD_DEFINITION_PROMPT", prompt, json_mode=True))
+    
+        valid, _, error = validate_world_definition(data)
+        assert valid, error
+    
+    def test_characters_keep_original_names(self, synthesizer):
+        cast = '[{"name":"Hamlet","archetype":"a"},{"name":"Ophelia","archetype":"b"}]'
+        prompt = CHARACTER_TRANSFORM_PROMPT.format(characters=cast, world="w")
+        data = json.loads(synthesizer.respond("CHARACTER_TRANSFORM_PROMPT", prompt, json_mode=True))
+    
+        valid, _, error = validate_character_transformation(data)
+        assert valid, error
+        assert [c['original_name'] for c in data['transformed_characters']] == ["Hamlet", "Ophelia"]
+    
+        prompt = CHARACTER_SINGLE_TRANSFORM_PROMPT.format(
+            character='{"name":"Ophelia","archetype":"b"}', cast=cast, world="w", feedback=""
+        )
+        data = json.loads(synthesizer.respond("CHARACTER_SINGLE_TRANSFORM_PROMPT", prompt, json_mode=True))
+        valid, _, error = validate_transformed_character(data)
+        assert valid, error
+        assert data['original_name'] == "Ophelia"
+    
+    def test_consistency_check_passes_unless_fix_rate(self, synthesizer):
+        prompt = CONSISTENCY_CHECK_PROMPT.format(original_analysis="a", world="w", characters="c", plot="p")
+        data = json.loads(synthesizer.respond("CONSISTENCY_CHECK_PROMPT", prompt, json_mode=True))
+        assert data['required_fixes'] == []
+        assert data['internal_consistency']['logical_issues'] == []
+        assert data['thematic_fidelity']['score'] == 8
+    
+        synthesizer.fix_rate = 1.0
+        data = json.loads(synthesizer.respond("CONSISTENCY_CHECK_PROMPT", prompt, json_mode=True))
+        assert data['required_fixes']
+    
+    def test_story_is_prose(self, synthesizer):
+        prompt = STORY_GENERATION_PROMPT.format(world="w", characters="c", plot="p")
+        story = synthesizer.respond("STORY_GENERATION_PROMPT", prompt, json_mode=False)
+        assert len(story.split()) == synthesizer.prose_words
+        assert "\n\n" in story
+
+
+class TestFakeLLMServer:
+    
+    def _client(self, server) -> Groq:
+        return Groq(api_key="fake", base_url=server.base_url, max_retries=0)
+    
+    def test_chat_completion_roundtrip(self, server):
+        prompt = WORLD_DEFINITION_PROMPT.format(target_setting="Mars", themes="love")
+        with self._client(server) as client:
+            response = client.chat.completions.create(
+                model="m", messages=[{"role": "user", "content": prompt}], response_format={"type": "json_object"}
+            )
+    
+        valid, _, error = validate_world_definition(json.loads(response.choices[0].message.content))
+        assert valid, error
+        assert response.usage.completion_tokens > 0
+        assert server.stats['templates'] == {"WORLD_DEFINITION_PROMPT": 1}
+    
+    def test_streaming_reports_usage(self, server):
+        prompt = STORY_GENERATION_PROMPT.format(world="w", characters="c", plot="p")
+        with self._client(server) as client:
+            chunks = list(client.chat.completions.create(
+                model="m", messages=[{"role": "user", "content": prompt}], stream=True
+            ))
+    
+        text = "".join(c.choices[0].delta.content or "" for c in chunks if c.choices)
+        assert len(text.split()) == 600
+        assert chunks[-1].x_groq.usage.completion_tokens > 0
+    
+    def test_injected_rate_limit(self):
+        with FakeLLMServer(median_ms=0, rate_limit_rate=1.0, retry_after_s=2) as server:
+            with self._client(server) as client:
+                with pytest.raises(RateLimitError) as excinfo:
+                    client.chat.completions.create(model="m", messages=[{"role": "user", "content": "hi"}])
+    
+        assert classify_error(excinfo.value) == RATE_LIMITED
+        assert retry_after(excinfo.value) == 2
+        assert server.stats['rate_limited'] == 1
+    
+    def test_pipeline_runs_end_to_end(self, server, tmp_path, monkeypatch):
+        from pipeline.orchestrator import NarrativeTransformer
+    
+        monkeypatch.setattr(clients, '_backend', None)
+        monkeypatch.setattr(ratelimit, 'RATE_LIMIT_RPM', 0)
+        monkeypatch.setattr(ratelimit, 'RATE_LIMIT_TPM', 0)
+        monkeypatch.setattr(hedging, '_history', LatencyHistory(str(tmp_path / "cache")))
+        clients.configure_backend("groq", base_url=server.base_url, api_key="fake")
+        try:
+            transformer = NarrativeTransformer(output_dir=str(tmp_path / "out"), use_cache=False)
+            result = transformer.run_pipeline("Hamlet", "Cyberpunk megacity")
+        finally:
+            close_clients()
+    
+        assert result['story']
+        assert result['artifacts']['metadata']['overall_score']['passed']
+        assert (tmp_path / "out" / "metrics.json").exists()
+        assert server.stats['errors'] == 0
+        assert server.stats['templates'].get("STORY_GENERATION_PROMPT", 0) + \
+            server.stats['templates'].get("STORY_SECTION_PROMPT", 0) >= 1
@@ -0,0 +1,251 @@
+import asyncio
+import threading
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from types import SimpleNamespace
+
+from pipeline import hedging, ratelimit, utils
+from pipeline.cache import cache_bypassed
+from pipeline.hedging import HedgeBudget, LatencyHistory, hedged_call_async, percentile, record_latency
+from pipeline.metrics import RunMetrics, track_run, stage_scope
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    history = LatencyHistory(str(tmp_path), history_size=50)
+    monkeypatch.setattr(hedging, '_history', history)
+    monkeypatch.setattr(hedging, 'hedge_budget', HedgeBudget(max_ratio=1.0))
+    return history
+
+
+def seed(history, key, latency, count=20):
+    for _ in range(count):
+        history.record(key, latency)
+
+
+class Request:
+    
+    def __init__(self, delay: float, result: str, error: Exception = None):
+        self.delay = delay
+        self.result = result
+        self.error = error
+        self.cancelled = False
+    
+    async def __call__(self):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def hedge_with(request):
+    """A hedge callback that always has budget and sends ``request``."""
+    async def hedge():
+        return request() if request is not None else None
+    return hedge
+
+
+class TestLatencyHistory:
+    
+    def test_percentile(self):
+        assert percentile([5, 1, 4, 2, 3], 50) == 3
+        assert percentile(list(range(1, 101)), 95) == 95
+    
+    def test_threshold_needs_min_samples(self, history):
+        seed(history, 'k', 0.1, count=5)
+        assert history.threshold('k', pct=95, min_samples=20) is None
+        seed(history, 'k', 0.1, count=15)
+        assert history.threshold('k', pct=95, min_samples=20) == 0.1
+    
+    def test_keeps_only_recent_latencies(self, history):
+        seed(history, 'k', 9.0, count=50)
+        seed(history, 'k', 1.0, count=50)
+        assert history.recent('k') == [1.0] * 50
+        assert history.threshold('k', pct=100, min_samples=1) == 1.0
+
+
+class TestHedgedCall:
+    
+    def run(self, coro):
+        metrics = RunMetrics()
+        
+        async def scoped():
+            with track_run(metrics), stage_scope('plot_reconstruction'):
+                return await coro
+        
+        return asyncio.run(scoped()), metrics
+    
+    def test_fast_hedge_wins_and_primary_is_cancelled(self, history):
+        seed(history, 'plot_reconstruction:m', 0.02)
+        primary, hedge = Request(5.0, 'slow'), Request(0.01, 'fast')
+        
+        result, metrics = self.run(hedged_call_async('m', primary, hedge_with(hedge), enabled=True))
+        
+        assert result == 'fast'
+        assert primary.cancelled
+        assert (metrics.hedged_calls, metrics.hedge_wins) == (1, 1)
+    
+    def test_no_hedge_before_threshold(self, history):
+        seed(history, 'plot_reconstruction:m', 1.0)
+        calls = []
+        
+        result, metrics = self.run(hedged_call_async('m', Request(0.01, 'primary'), hedge_with(lambda: calls.append(1)), enabled=True))
+        
+        assert result == 'primary'
+        assert calls == []
+        assert metrics.hedged_calls == 0
+    
+    def test_failed_hedge_falls_back_to_primary(self, history):
+        seed(history, 'plot_reconstruction:m', 0.01)
+        hedge = Request(0, None, error=RuntimeError("boom"))
+        
+        result, metrics = self.run(hedged_call_async('m', Request(0.1, 'primary'), hedge_with(hedge), enabled=True))
+        
+        assert result == 'primary'
+        assert (metrics.hedged_calls, metrics.hedge_wins) == (1, 0)
+    
+    def test_no_rate_limit_budget_means_no_hedge(self, history):
+        seed(history, 'plot_reconstruction:m', 0.01)
+        
+        result, metrics = self.run(hedged_call_async('m', Request(0.05, 'primary'), hedge_with(None), enabled=True))
+        
+        assert result == 'primary'
+        assert hedging.hedge_budget.hedges == 0
+    
+    def test_hedges_are_capped(self, history, monkeypatch):
+        monkeypatch.setattr(hedging, 'hedge_budget', HedgeBudget(max_ratio=0.5))
+        monkeypatch.setattr(history, 'threshold', lambda key: 0.01)
+        
+        hedges = 0
+        for _ in range(6):
+            _, metrics = self.run(hedged_call_async('m', Request(0.2, 'p'), hedge_with(Request(0, 'h')), enabled=True))
+            hedges += metrics.hedged_calls
+        assert hedges == 3
+    
+    def test_disabled_skips_history(self, history, monkeypatch):
+        monkeypatch.setattr(hedging, '_history', None)
+        result, metrics = self.run(hedged_call_async('m', Request(0, 'p'), hedge_with(Request(0, 'h')), enabled=False))
+        
+        assert result == 'p'
+        assert hedging._history is None
+        assert metrics.hedged_calls == 0
+
+
+class SlowClient:
+    
+    def __init__(self, delay: float):
+        self.chat = SimpleNamespace(completions=self)
+        self.delay = delay
+    
+    async def create(self, **kwargs):
+        await asyncio.sleep(self.delay)
+        message = SimpleNamespace(content='ok')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+class TestRecordLatency:
+    
+    @pytest.fixture(autouse=True)
+    def slow_budget(self, monkeypatch):
+        async def acquire(client, model, messages, max_tokens=None):
+            await asyncio.sleep(0.2)
+        
+        monkeypatch.setattr(ratelimit, 'RATE_LIMIT_RPM', 0)
+        monkeypatch.setattr(ratelimit, 'RATE_LIMIT_TPM', 0)
+        monkeypatch.setattr(utils, '_acquire_budget_async', acquire)
+    
+    def call(self):
+        async def scoped():
+            with cache_bypassed(), stage_scope('world_building'):
+                return await utils.make_llm_call_async(SlowClient(0.01), 'm', [{'role': 'user', 'content': 'x'}], 0.5)
+        
+        return asyncio.run(scoped())
+    
+    def test_records_only_http_time(self, history, monkeypatch):
+        monkeypatch.setattr(hedging, 'HEDGE_ENABLED', True)
+        assert self.call() == 'ok'
+        
+        latencies = history.recent('world_building:m')
+        assert len(latencies) == 1
+        assert latencies[0] < 0.15
+    
+    def test_disabled_never_opens_history(self, monkeypatch):
+        monkeypatch.setattr(hedging, 'HEDGE_ENABLED', False)
+        monkeypatch.setattr(hedging, '_history', None)
+        assert self.call() == 'ok'
+        
+        record_latency('m', 1.0)
+        assert hedging._history is None
+
+
+class ThreadRecordingLimiter:
+    
+    def __init__(self):
+        self.threads = {}
+    
+    async def acquire_async(self, model, tokens):
+        return 0.0
+    
+    def try_reserve(self, model, tokens):
+        self.threads['try_reserve'] = threading.current_thread()
+        return True
+    
+    def settle(self, model, estimated, actual):
+        self.threads['settle'] = threading.current_thread()
+
+
+class TestHedgedLLMCall:
+    
+    def test_budget_file_access_stays_off_the_event_loop(self, history, monkeypatch):
+        limiter = ThreadRecordingLimiter()
+        monkeypatch.setattr(utils, 'get_rate_limiter', lambda: limiter)
+        monkeypatch.setattr(hedging, 'HEDGE_ENABLED', True)
+        seed(history, 'world_building:m', 0.01)
+        client = SlowClient(0.1)
+        client_create = client.create
+    
+        async def create(**kwargs):
+            response = await client_create(**kwargs)
+            response.usage = SimpleNamespace(prompt_tokens=5, completion_tokens=5)
+            return response
+    
+        client.create = create
+    
+        async def scoped():
+            with cache_bypassed(), stage_scope('world_building'):
+                return await utils.make_llm_call_async(client, 'm', [{'role': 'user', 'content': 'x'}], 0.5)
+    
+        assert asyncio.run(scoped()) == 'ok'
+        assert set(limiter.threads) == {'try_reserve', 'settle'}
+        assert threading.main_thread() not in limiter.threads.values()
+    
+    def test_cancelled_primary_recorded_as_lower_bound(self, history, monkeypatch):
+        monkeypatch.setattr(hedging, 'HEDGE_ENABLED', True)
+        monkeypatch.setattr(ratelimit, 'RATE_LIMIT_RPM', 0)
+        monkeypatch.setattr(ratelimit, 'RATE_LIMIT_TPM', 0)
+        seed(history, 'world_building:m', 0.05)
+        client = SlowClient(0)
+        delays = [1.0, 0.01]
+        client_create = client.create
+    
+        async def create(**kwargs):
+            client.delay = delays.pop(0)
+            return await client_create(**kwargs)
+    
+        client.create = create
+    
+        async def scoped():
+            with cache_bypassed(), stage_scope('world_building'):
+                return await utils.make_llm_call_async(client, 'm', [{'role': 'user', 'content': 'x'}], 0.5)
+    
+        assert asyncio.run(scoped()) == 'ok'
+        # The hedge's latency is recorded as it wins, then the cancelled primary's lower bound
+        primary_lower_bound, hedge_latency = history.recent('world_building:m')[:2]
+        assert primary_lower_bound > 0.05
+        assert hedge_latency < primary_lower_bound
@@ -0,0 +1,67 @@
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from pipeline.library import SourceLibrary, SourceNotFoundError, normalize_title, get_source_library
+
+
+DATABASE = {
+    'romeo_and_juliet': {'title': 'Romeo and Juliet', 'author': 'William Shakespeare'},
+    'odyssey': {'title': 'The Odyssey', 'author': 'Homer', 'aliases': ['Odysseia']},
+    'frankenstein': {'title': 'Frankenstein', 'author': 'Mary Shelley'},
+    'les_miserables': {'title': 'Les Misérables', 'author': 'Victor Hugo'}
+}
+
+
+@pytest.fixture
+def library():
+    return SourceLibrary(DATABASE)
+
+
+class TestNormalizeTitle:
+    
+    def test_normalization(self):
+        assert normalize_title('  The Odyssey! ') == 'odyssey'
+        assert normalize_title('Romeo & Juliet') == 'romeo and juliet'
+        assert normalize_title('romeo_and_juliet') == 'romeo and juliet'
+        assert normalize_title('Les Misérables') == 'les miserables'
+
+
+class TestSourceLibrary:
+    
+    @pytest.mark.parametrize('name,key', [
+        ('Romeo & Juliet', 'romeo_and_juliet'),
+        ('romeo_and_juliet', 'romeo_and_juliet'),
+        ('odyssey', 'odyssey'),
+        ('Odysseia', 'odyssey'),
+        ('Frankenstein Mary Shelley', 'frankenstein'),
+        ('Les Miserables', 'les_miserables')
+    ])
+    def test_exact_lookup(self, library, name, key):
+        assert library.find(name)[0] == key
+    
+    @pytest.mark.parametrize('name,key', [
+        ('Romeo Juliet', 'romeo_and_juliet'),
+        ('Frankenstien', 'frankenstein'),
+        ('The Odysey', 'odyssey')
+    ])
+    def test_fuzzy_lookup(self, library, name, key):
+        assert library.resolve(name) == key
+    
+    def test_unknown_source_raises_with_suggestions(self, library):
+        with pytest.raises(SourceNotFoundError) as excinfo:
+            library.find('Romeo')
+        assert excinfo.value.suggestions == ['Romeo and Juliet']
+        assert 'Did you mean' in str(excinfo.value)
+    
+    def test_unrelated_name_has_no_suggestions(self, library):
+        with pytest.raises(SourceNotFoundError) as excinfo:
+            library.find('Moby Dick')
+        assert excinfo.value.suggestions == []
+    
+    def test_entries_keep_database_order(self, library):
+        assert [key for key, _ in library.entries()] == list(DATABASE)
+    
+    def test_bundled_library_loaded_once(self):
+        assert get_source_library() is get_source_library()
+        assert 'Hamlet' in get_source_library()
@@ -0,0 +1,74 @@
+import asyncio
+import types
+import sys
+sys.path.insert(0, '.')
+
+from pipeline.metrics import RunMetrics, format_prometheus, run_in_stage, stage_scope, track_run
+
+
+def usage(prompt: int, completion: int):
+    return types.SimpleNamespace(prompt_tokens=prompt, completion_tokens=completion)
+
+
+class TestStageMetrics:
+    
+    def test_counters_attributed_to_current_stage(self):
+        metrics = RunMetrics()
+        with track_run(metrics):
+            with stage_scope('world_definition'):
+                metrics.record_usage(usage(100, 20), latency_s=0.5)
+                metrics.record_retry()
+            with stage_scope('plot_reconstruction'):
+                metrics.record_usage(usage(300, 80), latency_s=1.5)
+                metrics.record_cache(hit=True)
+            metrics.record_usage(usage(1, 1))
+        
+        stages = metrics.stage_metrics()
+        assert list(stages) == ['world_definition', 'plot_reconstruction']
+        assert stages['world_definition']['prompt_tokens'] == 100
+        assert stages['world_definition']['retries'] == 1
+        assert stages['plot_reconstruction']['llm_time_s'] == 1.5
+        assert stages['plot_reconstruction']['cache_hits'] == 1
+        # Run totals include calls made outside any stage
+        assert metrics.usage()['llm_calls'] == 3
+        assert metrics.usage()['retries'] == 1
+    
+    def test_stage_scope_records_wall_time(self):
+        metrics = RunMetrics()
+        
+        async def run():
+            with track_run(metrics):
+                await asyncio.gather(
+                    run_in_stage('story_generation', asyncio.sleep(0.02)),
+                    run_in_stage('transformation_diff', asyncio.sleep(0.01))
+                )
+        
+        asyncio.run(run())
+        stages = metrics.stage_metrics()
+        assert stages['story_generation']['wall_time_s'] >= 0.02
+        assert stages['transformation_diff']['wall_time_s'] >= 0.01
+    
+    def test_memo_status_included(self):
+        metrics = RunMetrics()
+        metrics.record_stage_cache('source_abstraction', hit=True)
+        stage = metrics.stage_metrics()['source_abstraction']
+        assert stage['memo'] == 'hit'
+        assert stage['llm_calls'] == 0
+
+
+class TestFormatPrometheus:
+    
+    def test_gauges_per_stage(self):
+        metrics = RunMetrics()
+        with track_run(metrics), stage_scope('world_definition'):
+            metrics.record_usage(usage(100, 20), latency_s=0.5)
+        metrics.record_stage_cache('world_definition', hit=False)
+        
+        text = format_prometheus(metrics.stage_metrics(), wall_time_s=2.5, finished_at=1700000000)
+        
+        assert '# TYPE narrative_stage_prompt_tokens gauge' in text
+        assert 'narrative_stage_prompt_tokens{stage="world_definition"} 100' in text
+        assert 'narrative_stage_llm_seconds{stage="world_definition"} 0.5' in text
+        assert 'narrative_stage_memo_hit{stage="world_definition"} 0' in text
+        assert 'narrative_run_wall_seconds 2.5' in text
+        assert text.endswith('\n')
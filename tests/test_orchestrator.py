@@ -0,0 +1,206 @@
+import asyncio
+import json
+import random
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from types import SimpleNamespace
+
+import httpx
+from groq import AuthenticationError
+from rich.console import Console
+
+from benchmarks.fake_llm_server import ResponseSynthesizer, identify_template
+from pipeline import clients, hedging, orchestrator, ratelimit
+from pipeline.backends import LLMBackend
+from pipeline.cache import StageCache, cache_bypassed
+from pipeline.hedging import LatencyHistory
+from pipeline.orchestrator import NarrativeTransformer
+from pipeline.utils import _cached_stream_stats
+
+
+class FakeAsyncClient:
+    """In-process chat client answering every pipeline prompt with a schema-valid response."""
+    
+    def __init__(self, fail_templates=()):
+        self.chat = SimpleNamespace(completions=self)
+        self.synthesizer = ResponseSynthesizer(random.Random(0), prose_words=120)
+        self.fail_templates = set(fail_templates)
+        self.templates = []
+    
+    def _respond(self, messages, response_format):
+        prompt = messages[-1]['content']
+        template = identify_template(prompt)
+        self.templates.append(template)
+        if template in self.fail_templates:
+            request = httpx.Request("POST", "http://llm.test/chat/completions")
+            raise AuthenticationError("invalid key", response=httpx.Response(401, request=request), body=None)
+        json_mode = (response_format or {}).get('type') == 'json_object'
+        return self.synthesizer.respond(template, prompt, json_mode)
+    
+    async def create(self, messages, stream=False, response_format=None, **kwargs):
+        await asyncio.sleep(0)
+        content = self._respond(messages, response_format)
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=len(content) // 4)
+        if stream:
+            async def chunks():
+                delta = SimpleNamespace(content=content)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], x_groq=None)
+                yield SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=usage))
+            return chunks()
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+    
+    async def close(self):
+        pass
+
+
+class FakeBackend(LLMBackend):
+    
+    name = "fake"
+    
+    def __init__(self, client):
+        super().__init__(api_key="fake")
+        self._client = client
+    
+    def client(self, api_key, http_client):
+        raise AssertionError("the async pipeline should not build a sync client")
+    
+    def async_client(self, api_key, http_client):
+        return self._client
+
+
+@pytest.fixture
+def fake_client(tmp_path, monkeypatch):
+    def install(**kwargs):
+        client = FakeAsyncClient(**kwargs)
+        monkeypatch.setattr(clients, '_backend', FakeBackend(client))
+        monkeypatch.setattr(clients, '_async_clients', clients.weakref.WeakKeyDictionary())
+        return client
+
+    monkeypatch.setattr(ratelimit, 'RATE_LIMIT_RPM', 0)
+    monkeypatch.setattr(ratelimit, 'RATE_LIMIT_TPM', 0)
+    monkeypatch.setattr(hedging, '_history', LatencyHistory(str(tmp_path / "cache")))
+    with cache_bypassed():
+        yield install
+
+
+def _run(transformer, source="Hamlet", target="Orbital station"):
+    async def run():
+        result = await transformer.run_pipeline_async(source, target)
+        await transformer.wait_for_outputs_async()
+        return result
+    return asyncio.run(run())
+
+
+class TestRunPipelineAsync:
+    
+    def test_runs_every_stage(self, fake_client, tmp_path):
+        client = fake_client()
+        transformer = NarrativeTransformer(output_dir=str(tmp_path / "out"), use_cache=False)
+        result = _run(transformer)
+    
+        assert result['story']
+        stages = result['artifacts']['stages']
+        assert stages['3_character_transformation']['transformed_characters']
+        assert result['artifacts']['metadata']['overall_score']['passed']
+        assert {"STORY_GENERATION_PROMPT", "TRANSFORMATION_DIFF_PROMPT"} <= set(client.templates)
+        assert json.loads((tmp_path / "out" / "artifacts.json").read_text())['stages']
+    
+    def test_story_sections_written_concurrently(self, fake_client, tmp_path):
+        client = fake_client()
+        transformer = NarrativeTransformer(output_dir=str(tmp_path / "out"), use_cache=False, story_mode="sections")
+        result = _run(transformer)
+    
+        assert len(result['story_sections']) == client.templates.count("STORY_SECTION_PROMPT") > 1
+
+    def test_cached_story_stream_reported_without_throughput(self, fake_client, tmp_path, monkeypatch):
+        fake_client()
+    
+        async def cached_stream(world, characters, plot, on_token=None):
+            on_token("Once upon a time.")
+            return "Once upon a time.", _cached_stream_stats()
+    
+        monkeypatch.setattr(orchestrator, 'generate_story_stream_async', cached_stream)
+        console = Console(record=True, width=200)
+        transformer = NarrativeTransformer(output_dir=str(tmp_path / "out"), use_cache=False, console=console,
+                                           story_mode="stream")
+        _run(transformer)
+    
+        output = console.export_text()
+        assert "Streamed story (cached)" in output
+        assert "None tok/s" not in output
+
+
+class TestStage6Gather:
+    
+    def test_failed_diff_falls_back_without_losing_story(self, fake_client, tmp_path, monkeypatch):
+        fake_client()
+    
+        async def broken_diff(original_analysis, transformation):
+            raise RuntimeError("diff exploded")
+    
+        monkeypatch.setattr(orchestrator, 'generate_transformation_diff_async', broken_diff)
+        transformer = NarrativeTransformer(output_dir=str(tmp_path / "out"), use_cache=False)
+        result = _run(transformer)
+    
+        assert result['story']
+        assert transformer.artifacts['transformation_diff'] == orchestrator.fallback_transformation_diff()
+    
+    def test_failed_story_raises_after_diff_completes(self, fake_client, tmp_path):
+        client = fake_client(fail_templates={"STORY_GENERATION_PROMPT"})
+        transformer = NarrativeTransformer(output_dir=str(tmp_path / "out"), use_cache=False)
+    
+        with pytest.raises(AuthenticationError):
+            _run(transformer)
+    
+        assert "TRANSFORMATION_DIFF_PROMPT" in client.templates
+        assert not (tmp_path / "out" / "story.md").exists()
+
+
+class TestMapReduceFingerprint:
+    
+    @pytest.fixture(autouse=True)
+    def small_threshold(self, monkeypatch):
+        monkeypatch.setattr(orchestrator, 'SOURCE_MAPREDUCE_MIN_BYTES', 10)
+    
+    def _inputs(self, tmp_path, monkeypatch):
+        source_file = tmp_path / "source.txt"
+        source_file.write_text("A long tale. " * 20)
+        captured = {}
+        
+        async def memoized_stage(self, stage, inputs, compute):
+            captured[stage] = inputs
+            return {}
+        
+        monkeypatch.setattr(NarrativeTransformer, '_memoized_stage', memoized_stage)
+        transformer = NarrativeTransformer(output_dir=str(tmp_path / "out"))
+        asyncio.run(transformer._abstract_source_async("Custom", source_file=str(source_file)))
+        return captured['source_abstraction_mapreduce']
+    
+    @pytest.mark.parametrize('setting', [
+        'SOURCE_MAPREDUCE_MIN_BYTES', 'SOURCE_CHUNK_CHARS', 'SOURCE_CHUNK_CONCURRENCY', 'SOURCE_SUMMARY_MAX_TOKENS',
+        'SOURCE_REDUCE_MAX_CHARS'
+    ])
+    def test_settings_change_inputs(self, tmp_path, monkeypatch, setting):
+        base = self._inputs(tmp_path, monkeypatch)
+        monkeypatch.setattr(orchestrator, setting, getattr(orchestrator, setting) + 1)
+        assert self._inputs(tmp_path, monkeypatch) != base
+
+
+class TestMemoizedStage:
+    
+    def _run(self, transformer, result, accept):
+        async def compute():
+            return result
+        return asyncio.run(transformer._memoized_stage("plot_reconstruction", {"x": 1}, compute, accept=accept))
+    
+    def test_rejected_result_not_stored(self, tmp_path, monkeypatch):
+        stage_cache = StageCache(str(tmp_path / "cache"))
+        monkeypatch.setattr(orchestrator, 'get_stage_cache', lambda: stage_cache)
+        transformer = NarrativeTransformer(output_dir=str(tmp_path / "out"))
+    
+        assert self._run(transformer, {"valid": False}, lambda plot: plot["valid"]) == {"valid": False}
+        assert self._run(transformer, {"valid": True}, lambda plot: plot["valid"]) == {"valid": True}
+        assert self._run(transformer, {"valid": False}, lambda plot: plot["valid"]) == {"valid": True}
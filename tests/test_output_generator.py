@@ -0,0 +1,45 @@
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from pipeline.output_generator import build_story_sections, _handoff_summary
+
+
+class TestBuildStorySections:
+    
+    def test_sections_follow_plot_order(self):
+        plot = {
+            'reconstructed_plot': {
+                'setup': {'scene': 'Opening'},
+                'inciting_incident': {'event': 'Disruption', 'cause': 'Choice'},
+                'rising_action': [
+                    {'event': 'Escalation', 'effect': 'Tension'},
+                    {'event': 'Betrayal', 'effect': 'Isolation'}
+                ],
+                'climax': {'event': 'Confrontation', 'stakes': 'Everything'},
+                'falling_action': {'immediate_aftermath': 'Silence'},
+                'resolution': {'final_state': 'Peace'}
+            }
+        }
+        sections = build_story_sections(plot)
+        assert [s['key'] for s in sections] == [
+            'setup', 'inciting_incident', 'rising_action[0]', 'rising_action[1]',
+            'climax', 'falling_action', 'resolution'
+        ]
+        assert sections[3]['label'] == 'Rising Action 2'
+    
+    def test_missing_sections_are_skipped(self):
+        plot = {'reconstructed_plot': {'setup': {'scene': 'Opening'}, 'climax': {'event': 'Peak'}}}
+        assert [s['key'] for s in build_story_sections(plot)] == ['setup', 'climax']
+
+
+class TestHandoffSummary:
+    
+    def test_prefers_event_fields(self):
+        beat = {'event': 'The vault opens', 'cause': 'A leaked key', 'effect': 'Alarms sound'}
+        assert _handoff_summary(beat) == 'The vault opens Alarms sound'
+    
+    def test_long_text_is_truncated(self):
+        summary = _handoff_summary('word ' * 200)
+        assert len(summary) <= 243
+        assert summary.endswith('...')
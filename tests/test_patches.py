@@ -0,0 +1,121 @@
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from pipeline.patches import parse_path, format_path, apply_patch, PatchError
+
+
+DOCUMENTS = {
+    'plot': {
+        'reconstructed_plot': {
+            'climax': {'event': 'Duel', 'stakes': 'Unclear'},
+            'rising_action': [
+                {'event': 'Leak', 'cause': 'Ghost', 'effect': 'Doubt'},
+                {'event': 'Play', 'cause': 'Doubt', 'effect': 'Proof'}
+            ]
+        }
+    },
+    'characters': {'transformed_characters': [{'original_name': 'Hamlet', 'new_name': 'Hal'}]}
+}
+
+
+class TestParsePath:
+    
+    def test_keys_and_indices(self):
+        assert parse_path('plot.reconstructed_plot.rising_action[1].effect') == [
+            'plot', 'reconstructed_plot', 'rising_action', 1, 'effect'
+        ]
+    
+    def test_round_trip(self):
+        path = 'characters.transformed_characters[0].new_name'
+        assert format_path(parse_path(path)) == path
+    
+    @pytest.mark.parametrize('path', ['', 'plot..climax', '[0].x', 'plot.climax.', 'plot.rising action'])
+    def test_invalid(self, path):
+        with pytest.raises(PatchError):
+            parse_path(path)
+
+
+class TestApplyPatch:
+    
+    def test_replace_only_touches_path(self):
+        patched, paths, rejected = apply_patch(DOCUMENTS, [
+            {'op': 'replace', 'path': 'plot.reconstructed_plot.rising_action[1].effect', 'value': 'Confession'}
+        ])
+        events = patched['plot']['reconstructed_plot']['rising_action']
+        assert events[1]['effect'] == 'Confession'
+        assert events[0] == DOCUMENTS['plot']['reconstructed_plot']['rising_action'][0]
+        assert paths == ['plot.reconstructed_plot.rising_action[1].effect']
+        assert rejected == []
+    
+    def test_input_not_mutated(self):
+        apply_patch(DOCUMENTS, [{'op': 'replace', 'path': 'plot.reconstructed_plot.climax.stakes', 'value': 'The firm'}])
+        assert DOCUMENTS['plot']['reconstructed_plot']['climax']['stakes'] == 'Unclear'
+    
+    def test_insert_into_list(self):
+        patched, paths, _ = apply_patch(DOCUMENTS, [
+            {'op': 'insert', 'path': 'plot.reconstructed_plot.rising_action[1]',
+             'value': {'event': 'Warning', 'cause': 'Leak', 'effect': 'Play'}}
+        ])
+        events = patched['plot']['reconstructed_plot']['rising_action']
+        assert [e['event'] for e in events] == ['Leak', 'Warning', 'Play']
+        assert paths == ['plot.reconstructed_plot.rising_action[1]']
+    
+    @pytest.mark.parametrize('operation', [
+        {'op': 'delete', 'path': 'plot.reconstructed_plot.climax', 'value': None},
+        {'op': 'replace', 'path': 'plot.reconstructed_plot.climax.stakes'},
+        {'op': 'replace', 'path': 'world.rules', 'value': 'x'},
+        {'op': 'replace', 'path': 'plot.reconstructed_plot.rising_action[5]', 'value': {}},
+        {'op': 'replace', 'path': 'plot.reconstructed_plot.climax', 'value': 'Flattened'},
+        {'op': 'insert', 'path': 'plot.reconstructed_plot.climax.stakes', 'value': 'x'},
+        {'op': 'insert', 'path': 'plot.reconstructed_plot.rising_action[3]', 'value': {}},
+        {'op': 'replace', 'path': 'plot.missing.field', 'value': 'x'},
+        {'op': 'replace', 'path': 'plot.foo', 'value': 'x'},
+        {'op': 'replace', 'path': 'plot.reconstructed_plot', 'value': {}},
+        {'op': 'replace', 'path': 'characters.transformed_characters[0]', 'value': {}},
+        {'op': 'replace', 'path': 'plot.reconstructed_plot.climax.stakes', 'value': '  '},
+        {'op': 'replace', 'path': 'plot.reconstructed_plot.climax', 'value': {'event': 'Duel', 'twist': 'x'}},
+        {'op': 'insert', 'path': 'plot.reconstructed_plot.rising_action[0]', 'value': {}},
+        {'op': 'insert', 'path': 'plot.reconstructed_plot.rising_action[0]', 'value': {'event': 'x', 'mood': 'y'}}
+    ])
+    def test_invalid_operations_rejected(self, operation):
+        patched, paths, rejected = apply_patch(DOCUMENTS, [operation])
+        assert patched == DOCUMENTS
+        assert paths == []
+        assert len(rejected) == 1
+    
+    def test_valid_operations_survive_rejections(self):
+        _, paths, rejected = apply_patch(DOCUMENTS, [
+            {'op': 'replace', 'path': 'plot.nope[0]', 'value': 'x'},
+            {'op': 'replace', 'path': 'characters.transformed_characters[0].new_name', 'value': 'Hamza'}
+        ])
+        assert paths == ['characters.transformed_characters[0].new_name']
+        assert rejected[0]['path'] == 'plot.nope[0]'
+    
+    def test_operation_breaking_cause_effect_chain_rejected(self):
+        patched, paths, rejected = apply_patch(DOCUMENTS, [
+            {'op': 'replace', 'path': 'plot.reconstructed_plot.climax', 'value': {'event': 'Duel'}},
+            {'op': 'replace', 'path': 'plot.reconstructed_plot.climax.event', 'value': 'Ambush'}
+        ])
+        assert patched['plot']['reconstructed_plot']['climax'] == {'event': 'Ambush', 'stakes': 'Unclear'}
+        assert paths == ['plot.reconstructed_plot.climax.event']
+        assert 'Climax missing stakes' in rejected[0]['reason']
+    
+    def test_operation_breaking_character_schema_rejected(self):
+        character = {
+            'original_name': 'Hamlet', 'new_name': 'Hal', 'new_identity': 'Heir', 'occupation_or_role': 'Analyst',
+            'preserved_motivation': 'Justice', 'preserved_flaw': 'Indecision', 'world_specific_traits': ['Implant']
+        }
+        documents = {'characters': {
+            'transformed_characters': [character, dict(character, original_name='Ophelia', new_name='Ophira')],
+            'group_dynamics': {'key_relationship_transformation': 'Rivals'}
+        }}
+        patched, paths, rejected = apply_patch(documents, [
+            {'op': 'replace', 'path': 'characters.transformed_characters[1]',
+             'value': {'original_name': 'Ophelia', 'new_name': 'Ophira'}},
+            {'op': 'replace', 'path': 'characters.transformed_characters[1].preserved_flaw', 'value': 'Devotion'}
+        ])
+        assert patched['characters']['transformed_characters'][1]['preserved_flaw'] == 'Devotion'
+        assert paths == ['characters.transformed_characters[1].preserved_flaw']
+        assert rejected[0]['path'] == 'characters.transformed_characters[1]'
+        assert 'new_identity' in rejected[0]['reason']
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+import time
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from types import SimpleNamespace
+
+from pipeline import ratelimit
+from pipeline.ratelimit import RateLimiter, estimate_request_tokens
+
+
+def _reserve_many(state_path, count):
+    limiter = RateLimiter(state_path, rpm=1000, tpm=0)
+    for _ in range(count):
+        limiter.reserve('m', 0)
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "ratelimit.json")
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    # No refill while a test drains the bucket, however slow the filesystem is
+    monkeypatch.setattr(ratelimit, 'time', SimpleNamespace(time=lambda: 1_000_000.0, sleep=time.sleep))
+
+
+class TestRateLimiter:
+    
+    def test_full_bucket_does_not_wait(self, state_path):
+        limiter = RateLimiter(state_path, rpm=60, tpm=6000)
+        assert limiter.reserve('m', 100) == 0
+    
+    def test_overdrawn_requests_wait_for_refill(self, state_path, frozen_clock):
+        limiter = RateLimiter(state_path, rpm=60, tpm=0)
+        for _ in range(60):
+            assert limiter.reserve('m', 0) == 0
+        # 60 rpm refills one request per second
+        assert limiter.reserve('m', 0) == pytest.approx(1.0)
+        assert limiter.reserve('m', 0) == pytest.approx(2.0)
+    
+    def test_overdrawn_tokens_wait_for_refill(self, state_path, frozen_clock):
+        limiter = RateLimiter(state_path, rpm=0, tpm=600)
+        assert limiter.reserve('m', 600) == 0
+        # 600 tpm refills 10 tokens per second
+        assert limiter.reserve('m', 50) == pytest.approx(5.0)
+    
+    def test_models_have_separate_budgets(self, state_path):
+        limiter = RateLimiter(state_path, rpm=1, tpm=0)
+        assert limiter.reserve('a', 0) == 0
+        assert limiter.reserve('b', 0) == 0
+        assert limiter.reserve('a', 0) > 0
+    
+    def test_settle_refunds_overestimate(self, state_path):
+        limiter = RateLimiter(state_path, rpm=0, tpm=600)
+        limiter.reserve('m', 600)
+        limiter.settle('m', 600, 100)
+        assert limiter.reserve('m', 400) == 0
+    
+    def test_budget_shared_through_state_file(self, state_path):
+        RateLimiter(state_path, rpm=2, tpm=0).reserve('m', 0)
+        RateLimiter(state_path, rpm=2, tpm=0).reserve('m', 0)
+        assert RateLimiter(state_path, rpm=2, tpm=0).reserve('m', 0) > 0
+    
+    def test_changed_limits_reset_bucket(self, state_path):
+        RateLimiter(state_path, rpm=1, tpm=0).reserve('m', 0)
+        assert RateLimiter(state_path, rpm=1, tpm=0).reserve('m', 0) > 0
+        assert RateLimiter(state_path, rpm=10, tpm=0).reserve('m', 0) == 0
+    
+    def test_no_lost_updates_across_processes(self, state_path, frozen_clock):
+        ctx = multiprocessing.get_context('fork')
+        workers = [ctx.Process(target=_reserve_many, args=(state_path, 50)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        
+        with open(state_path) as f:
+            remaining = json.load(f)['m']['requests']
+        # 200 requests drawn from a 1000 bucket
+        assert remaining == 800
+    
+    def test_state_written_atomically(self, state_path):
+        limiter = RateLimiter(state_path, rpm=60, tpm=0)
+        limiter.reserve('m', 0)
+        assert sorted(os.listdir(os.path.dirname(state_path))) == ['ratelimit.json', 'ratelimit.json.lock']
+
+
+class TestAcquire:
+    
+    @pytest.fixture(autouse=True)
+    def fast_polling(self, monkeypatch):
+        monkeypatch.setattr(ratelimit, 'RATE_LIMIT_POLL_INTERVAL', 0.05)
+    
+    def test_refund_wakes_sleeper_early(self, state_path):
+        limiter = RateLimiter(state_path, rpm=0, tpm=60)
+        limiter.reserve('m', 60)
+        # 60 tpm refills one token per second: this caller would sleep 30s
+        timer = threading.Timer(0.2, limiter.settle, args=('m', 60, 10))
+        timer.start()
+        start = time.monotonic()
+        limiter.acquire('m', 30)
+        timer.join()
+        assert time.monotonic() - start < 2
+    
+    def test_later_reservations_do_not_delay_earlier(self, state_path, frozen_clock):
+        limiter = RateLimiter(state_path, rpm=60, tpm=0)
+        for _ in range(60):
+            limiter.reserve('m', 0)
+        ticket, wait = limiter._reserve('m', 0)
+        for _ in range(10):
+            limiter.reserve('m', 0)
+        assert wait == pytest.approx(1.0)
+        assert limiter._remaining('m', ticket) == pytest.approx(1.0)
+    
+    def test_async_refund_wakes_sleeper_early(self, state_path):
+        limiter = RateLimiter(state_path, rpm=0, tpm=60)
+        limiter.reserve('m', 60)
+    
+        async def run():
+            asyncio.get_running_loop().call_later(0.2, limiter.settle, 'm', 60, 10)
+            return await limiter.acquire_async('m', 30)
+    
+        start = time.monotonic()
+        waited = asyncio.run(run())
+        assert 0.1 < waited < 2
+        assert time.monotonic() - start < 2
+
+
+class TestEstimateRequestTokens:
+    
+    def test_includes_completion_budget(self):
+        messages = [{'role': 'user', 'content': 'x' * 400}]
+        assert estimate_request_tokens(messages, max_tokens=50) == 150
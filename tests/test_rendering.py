@@ -0,0 +1,148 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from rich.console import Console
+
+from pipeline import orchestrator
+from pipeline.batch import _run_job
+from pipeline.orchestrator import NarrativeTransformer
+
+
+ARTIFACTS = {'metadata': {'source_title': 'Hamlet', 'target_world': 'Mars', 'overall_score': {'overall_score': 8}}}
+STORY = "# Title\n\n---\n\nOnce upon a time."
+
+
+@pytest.fixture
+def pdf_pool(monkeypatch):
+    # Stand-in PDF renderers are not picklable; run them on threads
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(orchestrator, 'get_process_pool', lambda: pool)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+def _transformer(tmp_path, console=None):
+    return NarrativeTransformer(output_dir=str(tmp_path), use_cache=False, console=console or Console(quiet=True))
+
+
+def _slow_pdf(release: threading.Event):
+    def generate_pdf(story, metadata, path):
+        release.wait(5)
+        with open(path, 'w') as f:
+            f.write(story)
+        return path
+    return generate_pdf
+
+
+class TestSaveOutputs:
+    
+    def test_returns_before_background_renderers(self, tmp_path, pdf_pool, monkeypatch):
+        release = threading.Event()
+        monkeypatch.setattr(orchestrator, 'generate_pdf', _slow_pdf(release))
+        transformer = _transformer(tmp_path)
+    
+        async def run():
+            await transformer._save_outputs(STORY, ARTIFACTS, 'Hamlet', 'Mars')
+            saved = {name for name in ('story.md', 'artifacts.json', 'story.pdf') if (tmp_path / name).exists()}
+            release.set()
+            return saved, await transformer.wait_for_outputs_async()
+    
+        saved, timings = asyncio.run(run())
+        assert saved == {'story.md', 'artifacts.json'}
+        assert set(timings) == {'story.md', 'artifacts.json', 'visualization.md', 'transformation_summary.md', 'story.pdf'}
+        assert (tmp_path / 'story.pdf').read_text() == "Once upon a time."
+    
+    def test_background_renders_recorded_only_when_joined(self, tmp_path, pdf_pool, monkeypatch):
+        monkeypatch.setattr(orchestrator, 'generate_pdf', lambda story, metadata, path: path)
+        transformer = _transformer(tmp_path)
+    
+        async def run():
+            await transformer._save_outputs(STORY, ARTIFACTS, 'Hamlet', 'Mars')
+            timings = dict(transformer.render_timings)
+            concurrent.futures.wait(transformer._pending_outputs.values())
+            assert transformer.render_timings == timings
+            return await transformer.wait_for_outputs_async()
+    
+        timings = asyncio.run(run())
+        assert set(timings) == {'story.md', 'artifacts.json', 'visualization.md', 'transformation_summary.md', 'story.pdf'}
+        assert timings is not transformer.render_timings
+    
+    def test_primary_writes_do_not_block_event_loop(self, tmp_path, pdf_pool, monkeypatch):
+        def slow_artifacts(self, artifacts):
+            time.sleep(0.2)
+            return str(tmp_path / 'artifacts.json')
+    
+        monkeypatch.setattr(NarrativeTransformer, '_write_artifacts', slow_artifacts)
+        monkeypatch.setattr(orchestrator, 'generate_pdf', lambda story, metadata, path: path)
+        transformer = _transformer(tmp_path)
+        ticks = []
+    
+        async def ticker():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+    
+        async def run():
+            task = asyncio.ensure_future(ticker())
+            await transformer._save_outputs(STORY, ARTIFACTS, 'Hamlet', 'Mars')
+            task.cancel()
+            await transformer.wait_for_outputs_async()
+    
+        asyncio.run(run())
+        assert len(ticks) > 5
+    
+    def test_render_errors_reported(self, tmp_path, pdf_pool, monkeypatch):
+        def broken_pdf(story, metadata, path):
+            raise RuntimeError("font missing")
+    
+        monkeypatch.setattr(orchestrator, 'generate_pdf', broken_pdf)
+        console = Console(record=True, width=200)
+        transformer = _transformer(tmp_path, console)
+    
+        async def run():
+            await transformer._save_outputs(STORY, ARTIFACTS, 'Hamlet', 'Mars')
+            return await transformer.wait_for_outputs_async()
+    
+        timings = asyncio.run(run())
+        assert 'story.pdf' not in timings
+        assert transformer.render_errors == {'story.pdf': 'font missing'}
+        assert "Failed to render story.pdf" in console.export_text()
+
+
+class TestBatchJobRendering:
+    
+    @pytest.fixture
+    def fake_pipeline(self, monkeypatch):
+        async def run_pipeline_async(self, source, target, source_file=None):
+            await self._save_outputs(STORY, ARTIFACTS, source, target)
+            return {'story': STORY, 'artifacts': ARTIFACTS}
+    
+        monkeypatch.setattr(NarrativeTransformer, 'run_pipeline_async', run_pipeline_async)
+    
+    def test_job_waits_for_pdf(self, tmp_path, pdf_pool, fake_pipeline, monkeypatch):
+        release = threading.Event()
+        monkeypatch.setattr(orchestrator, 'generate_pdf', _slow_pdf(release))
+        threading.Timer(0.2, release.set).start()
+    
+        summary = asyncio.run(_run_job({'id': 'a', 'source': 'Hamlet', 'target': 'Mars'}, str(tmp_path), False))
+    
+        assert summary['status'] == 'ok'
+        assert 'story.pdf' in summary['render_timings']
+        assert (tmp_path / 'a' / 'story.pdf').exists()
+    
+    def test_render_failure_fails_job(self, tmp_path, pdf_pool, fake_pipeline, monkeypatch):
+        def broken_pdf(story, metadata, path):
+            raise RuntimeError("font missing")
+    
+        monkeypatch.setattr(orchestrator, 'generate_pdf', broken_pdf)
+    
+        summary = asyncio.run(_run_job({'id': 'a', 'source': 'Hamlet', 'target': 'Mars'}, str(tmp_path), False))
+    
+        assert summary['status'] == 'error'
+        assert summary['error'] == "Rendering failed: story.pdf: font missing"
+        assert summary['overall_score'] == 8
@@ -0,0 +1,176 @@
+import asyncio
+import httpx
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from groq import APIConnectionError, AuthenticationError, BadRequestError, InternalServerError, RateLimitError
+
+from pipeline.retry import (
+    CircuitBreaker,
+    CircuitOpenError,
+    classify_error,
+    decorrelated_jitter,
+    retry_after,
+    retry_with_backoff,
+    RATE_LIMITED,
+    TRANSIENT,
+    INVALID_OUTPUT,
+    FATAL
+)
+
+
+REQUEST = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+
+
+def status_error(cls, status: int, headers: dict = None, body: dict = None):
+    response = httpx.Response(status, headers=headers or {}, request=REQUEST)
+    return cls(f"Error code: {status}", response=response, body=body)
+
+
+class Flaky:
+    
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+    
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+class TestClassifyError:
+    
+    def test_rate_limit(self):
+        assert classify_error(status_error(RateLimitError, 429)) == RATE_LIMITED
+    
+    def test_server_and_transport_errors_are_transient(self):
+        assert classify_error(status_error(InternalServerError, 503)) == TRANSIENT
+        assert classify_error(APIConnectionError(request=REQUEST)) == TRANSIENT
+        assert classify_error(httpx.ReadTimeout("timed out")) == TRANSIENT
+    
+    def test_rejected_json_output_is_retryable(self):
+        body = {"error": {"code": "json_validate_failed", "message": "Failed to generate JSON"}}
+        assert classify_error(status_error(BadRequestError, 400, body=body)) == INVALID_OUTPUT
+    
+    def test_auth_validation_and_bugs_are_fatal(self):
+        assert classify_error(status_error(AuthenticationError, 401)) == FATAL
+        assert classify_error(status_error(BadRequestError, 400)) == FATAL
+        assert classify_error(ValueError("bad json")) == FATAL
+        assert classify_error(CircuitOpenError(10)) == FATAL
+
+
+class TestRetryAfter:
+    
+    def test_seconds(self):
+        assert retry_after(status_error(RateLimitError, 429, {"retry-after": "7"})) == 7.0
+    
+    def test_milliseconds_take_precedence(self):
+        error = status_error(RateLimitError, 429, {"retry-after": "7", "retry-after-ms": "1500"})
+        assert retry_after(error) == 1.5
+    
+    def test_http_date(self):
+        error = status_error(RateLimitError, 429, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        assert retry_after(error) == 0.0
+    
+    def test_missing(self):
+        assert retry_after(status_error(RateLimitError, 429)) is None
+        assert retry_after(ValueError("x")) is None
+
+
+class TestRetryWithBackoff:
+    
+    @pytest.fixture(autouse=True)
+    def no_sleep(self, monkeypatch):
+        self.sleeps = []
+        monkeypatch.setattr('pipeline.retry.time.sleep', self.sleeps.append)
+    
+    def test_jitter_stays_within_bounds(self):
+        for previous in (1.0, 5.0, 50.0):
+            delay = decorrelated_jitter(previous, base=1.0, cap=30.0)
+            assert 1.0 <= delay <= min(30.0, previous * 3)
+    
+    def test_transient_errors_are_retried(self):
+        func = Flaky(status_error(InternalServerError, 502), APIConnectionError(request=REQUEST))
+        assert retry_with_backoff(max_retries=3, initial_delay=1.0)(func)() == "ok"
+        assert func.calls == 3
+        assert len(self.sleeps) == 2
+    
+    def test_fatal_errors_are_not_retried(self):
+        func = Flaky(status_error(AuthenticationError, 401))
+        with pytest.raises(AuthenticationError):
+            retry_with_backoff(max_retries=3)(func)()
+        assert func.calls == 1
+    
+    def test_honors_retry_after(self):
+        func = Flaky(status_error(RateLimitError, 429, {"retry-after": "4"}))
+        retry_with_backoff(max_retries=1, initial_delay=0.5)(func)()
+        assert 4.0 <= self.sleeps[0] <= 4.5
+    
+    def test_gives_up_when_retry_after_exceeds_max_delay(self):
+        func = Flaky(status_error(RateLimitError, 429, {"retry-after": "3600"}))
+        with pytest.raises(RateLimitError):
+            retry_with_backoff(max_retries=3, max_delay=60)(func)()
+        assert func.calls == 1
+    
+    def test_async(self, monkeypatch):
+        async def no_sleep(delay):
+            pass
+        monkeypatch.setattr('pipeline.retry.asyncio.sleep', no_sleep)
+        errors = [status_error(InternalServerError, 500)]
+        
+        @retry_with_backoff(max_retries=2)
+        async def call():
+            if errors:
+                raise errors.pop()
+            return "ok"
+        
+        assert asyncio.run(call()) == "ok"
+
+
+class TestCircuitBreaker:
+    
+    def test_opens_after_consecutive_transient_failures(self, monkeypatch):
+        monkeypatch.setattr('pipeline.retry.time.sleep', lambda delay: None)
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+        func = Flaky(*[status_error(InternalServerError, 503)] * 3)
+        
+        with pytest.raises(InternalServerError):
+            retry_with_backoff(max_retries=2, breaker=breaker)(func)()
+        assert breaker.state == "open"
+        
+        # Queued work fails fast without calling the backend
+        with pytest.raises(CircuitOpenError):
+            retry_with_backoff(max_retries=2, breaker=breaker)(func)()
+        assert func.calls == 3
+    
+    def test_rate_limits_do_not_open_the_circuit(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        breaker.record_failure(RATE_LIMITED)
+        assert breaker.state == "closed"
+    
+    def test_half_open_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure(TRANSIENT)
+        assert breaker.state == "half_open"
+        
+        breaker.before_call()
+        # Only one probe at a time while half-open
+        breaker.reset_timeout = 60
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        
+        breaker.record_success()
+        assert breaker.state == "closed"
+        breaker.before_call()
+    
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0)
+        for _ in range(5):
+            breaker.record_failure(TRANSIENT)
+        breaker.before_call()
+        breaker.reset_timeout = 60
+        breaker.record_failure(TRANSIENT)
+        assert breaker.state == "open"
@@ -0,0 +1,58 @@
+import json
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from pipeline.serialization import render, drop_fields, to_prompt, estimate_tokens
+from pipeline.metrics import track_run
+
+
+ARTIFACT = {
+    'world_name': 'Neo Verona',
+    'internal_rules': [
+        {'rule': 'Data is currency', 'implication': 'Privacy is wealth'},
+        {'rule': 'No offline zones', 'implication': 'Nowhere to hide'}
+    ],
+    'setting_details': {'geography': 'Arcology', 'culture': 'Streaming'}
+}
+
+
+class TestRender:
+    
+    def test_compact_round_trips(self):
+        assert json.loads(render(ARTIFACT, 'compact')) == ARTIFACT
+    
+    def test_compact_is_smaller_than_pretty(self):
+        assert len(render(ARTIFACT, 'compact')) < len(render(ARTIFACT, 'pretty'))
+    
+    def test_lines_format(self):
+        assert render(ARTIFACT, 'lines').splitlines() == [
+            'world_name: Neo Verona',
+            'internal_rules:',
+            ' - rule: Data is currency; implication: Privacy is wealth',
+            ' - rule: No offline zones; implication: Nowhere to hide',
+            'setting_details:',
+            ' geography: Arcology',
+            ' culture: Streaming'
+        ]
+    
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            render(ARTIFACT, 'yaml')
+
+
+class TestDropFields:
+    
+    def test_drops_nested_keys(self):
+        chars = {'transformed_characters': [{'new_name': 'Rohan', 'visual_description': 'Tall'}]}
+        assert drop_fields(chars, ('visual_description',)) == {'transformed_characters': [{'new_name': 'Rohan'}]}
+
+
+class TestToPrompt:
+    
+    def test_records_savings_for_stage(self):
+        with track_run() as run:
+            to_prompt(ARTIFACT, stage='story', fmt='compact')
+        savings = run.prompt_savings()['story']
+        assert savings['baseline_tokens'] == estimate_tokens(json.dumps(ARTIFACT, indent=2))
+        assert savings['saved_tokens'] > 0
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from pipeline import source_abstraction
+from pipeline.source_abstraction import iter_source_chunks, extract_source_elements_from_file_async
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "novel.txt"
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+class TestIterSourceChunks:
+    
+    def test_chunks_end_at_paragraph_boundaries(self, tmp_path):
+        paragraphs = [f"Paragraph {i} " + "x" * 40 for i in range(10)]
+        path = _write(tmp_path, "\n\n".join(paragraphs))
+        
+        chunks = list(iter_source_chunks(path, max_chars=120))
+        
+        assert all(len(chunk) <= 120 for chunk in chunks)
+        assert "\n\n".join(chunks) == "\n\n".join(paragraphs)
+    
+    def test_chapter_heading_starts_new_chunk(self, tmp_path):
+        text = "CHAPTER I.\n\n" + "a" * 60 + "\n\nCHAPTER II.\n\n" + "b" * 60
+        chunks = list(iter_source_chunks(_write(tmp_path, text), max_chars=140))
+        assert [chunk.split("\n\n")[0] for chunk in chunks] == ["CHAPTER I.", "CHAPTER II."]
+    
+    def test_oversized_paragraph_split_at_sentences(self, tmp_path):
+        text = " ".join(f"Sentence number {i} ends here." for i in range(40))
+        chunks = list(iter_source_chunks(_write(tmp_path, text), max_chars=100))
+        assert len(chunks) > 1
+        assert all(len(chunk) <= 100 for chunk in chunks)
+        assert all(chunk.endswith('.') for chunk in chunks)
+    
+    def test_single_huge_line_is_bounded(self, tmp_path):
+        chunks = list(iter_source_chunks(_write(tmp_path, "z" * 1000), max_chars=64))
+        assert all(len(chunk) <= 64 for chunk in chunks)
+        assert "".join(chunks) == "z" * 1000
+
+
+class TestMapReduce:
+    
+    def _patch(self, monkeypatch, summary_length=10):
+        summarized, reduced = [], []
+        
+        async def summarize(excerpt, part_label):
+            summarized.append(part_label)
+            return "s" * summary_length
+        
+        async def extract(source_material):
+            reduced.append(source_material)
+            return {'title': 'Novel'}
+        
+        monkeypatch.setattr(source_abstraction, 'summarize_chunk_async', summarize)
+        monkeypatch.setattr(source_abstraction, 'extract_source_elements_async', extract)
+        return summarized, reduced
+    
+    def test_summaries_reduced_in_order(self, tmp_path, monkeypatch):
+        summarized, reduced = self._patch(monkeypatch)
+        path = _write(tmp_path, "\n\n".join("p" * 50 for _ in range(5)))
+        
+        abstraction, stats = asyncio.run(extract_source_elements_from_file_async(path, chunk_chars=60, concurrency=2))
+        
+        assert abstraction == {'title': 'Novel'}
+        assert stats == {'chunks': 5, 'condense_steps': 0}
+        assert summarized == [f"Part {i}" for i in range(1, 6)]
+        assert reduced[0].index("Part 1:") < reduced[0].index("Part 5:")
+    
+    def test_summaries_condensed_when_over_budget(self, tmp_path, monkeypatch):
+        summarized, reduced = self._patch(monkeypatch, summary_length=40)
+        path = _write(tmp_path, "\n\n".join("p" * 50 for _ in range(6)))
+        
+        _, stats = asyncio.run(extract_source_elements_from_file_async(
+            path, chunk_chars=60, concurrency=2, reduce_max_chars=100
+        ))
+        
+        assert stats['condense_steps'] >= 1
+        assert any(label.startswith("the summaries of parts 1-") for label in summarized)
+        assert "Parts 1-" in reduced[0]
+    
+    def test_empty_file_rejected(self, tmp_path, monkeypatch):
+        self._patch(monkeypatch)
+        with pytest.raises(ValueError, match="empty"):
+            asyncio.run(extract_source_elements_from_file_async(_write(tmp_path, "\n\n")))
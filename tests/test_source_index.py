@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from pipeline import source_index
+from pipeline.source_index import AbstractionIndex, build_abstraction_index
+from pipeline.source_abstraction import format_source_entry
+
+
+ENTRY = {
+    'title': 'Hamlet',
+    'author': 'William Shakespeare',
+    'year': 1600,
+    'type': 'Tragedy',
+    'summary': 'A prince avenges his father.',
+    'characters': ['Hamlet', 'Claudius'],
+    'themes': ['Revenge'],
+    'setting': 'Denmark'
+}
+
+ABSTRACTION = {
+    'title': 'Hamlet',
+    'core_themes': [
+        {'theme': 'Revenge', 'description': 'Cost of vengeance'},
+        {'theme': 'Madness', 'description': 'Feigned and real'}
+    ],
+    'character_archetypes': [
+        {'name': n, 'archetype': 'a', 'motivation': 'm', 'flaw': 'f', 'role_in_plot': 'r'}
+        for n in ('Hamlet', 'Claudius', 'Ophelia')
+    ],
+    'central_conflict': {'type': 'Both', 'description': 'd', 'opposing_forces': ['Hamlet', 'Claudius']},
+    'emotional_arc': {'opening_state': 'o', 'peak_emotion': 'p', 'closing_state': 'c'},
+    'plot_structure': {
+        'setup': 's', 'inciting_incident': 'i', 'rising_action': ['r'],
+        'climax': 'c', 'falling_action': 'f', 'resolution': 'r'
+    }
+}
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / "abstraction_index.json")
+
+
+def _fake_extract(result, calls):
+    async def extract(source_material):
+        calls.append(source_material)
+        return result
+    return extract
+
+
+class TestAbstractionIndex:
+    
+    def test_lookup_by_source_text(self, index_path):
+        index = AbstractionIndex(index_path)
+        index.put('hamlet', 'Hamlet', format_source_entry(ENTRY), ABSTRACTION)
+        index.save()
+        assert AbstractionIndex(index_path).lookup(format_source_entry(ENTRY)) == ABSTRACTION
+    
+    def test_changed_entry_is_stale(self, index_path):
+        index = AbstractionIndex(index_path)
+        index.put('hamlet', 'Hamlet', format_source_entry(ENTRY), ABSTRACTION)
+        changed = format_source_entry({**ENTRY, 'summary': 'A prince hesitates.'})
+        assert index.lookup(changed) is None
+        assert not index.is_current('hamlet', changed)
+    
+    def test_changed_template_is_stale(self, index_path, monkeypatch):
+        index = AbstractionIndex(index_path)
+        index.put('hamlet', 'Hamlet', format_source_entry(ENTRY), ABSTRACTION)
+        monkeypatch.setattr(source_index, 'template_version', lambda stage: 'edited')
+        assert index.lookup(format_source_entry(ENTRY)) is None
+
+
+class TestBuildAbstractionIndex:
+    
+    def test_builds_then_reuses(self, index_path, monkeypatch):
+        calls = []
+        monkeypatch.setattr(source_index, 'extract_source_elements_async', _fake_extract(ABSTRACTION, calls))
+        
+        first = asyncio.run(build_abstraction_index({'hamlet': ENTRY}, index_path))
+        second = asyncio.run(build_abstraction_index({'hamlet': ENTRY}, index_path))
+        forced = asyncio.run(build_abstraction_index({'hamlet': ENTRY}, index_path, force=True))
+        
+        assert (first, second, forced) == ({'hamlet': 'built'}, {'hamlet': 'current'}, {'hamlet': 'built'})
+        assert len(calls) == 2
+    
+    def test_invalid_abstraction_not_stored(self, index_path, monkeypatch):
+        monkeypatch.setattr(source_index, 'extract_source_elements_async', _fake_extract({'title': 'Hamlet'}, []))
+        
+        results = asyncio.run(build_abstraction_index({'hamlet': ENTRY}, index_path))
+        
+        assert results['hamlet'].startswith('invalid')
+        assert AbstractionIndex(index_path).entries == {}
+    
+    def test_removed_sources_dropped(self, index_path, monkeypatch):
+        monkeypatch.setattr(source_index, 'extract_source_elements_async', _fake_extract(ABSTRACTION, []))
+        asyncio.run(build_abstraction_index({'hamlet': ENTRY, 'macbeth': {**ENTRY, 'title': 'Macbeth'}}, index_path))
+        asyncio.run(build_abstraction_index({'hamlet': ENTRY}, index_path))
+        assert list(AbstractionIndex(index_path).entries) == ['hamlet']
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from types import SimpleNamespace
+
+from pipeline import utils
+from pipeline.cache import ResponseCache
+from pipeline.metrics import RunMetrics, track_run
+from pipeline.ratelimit import RateLimiter
+from pipeline.utils import stream_llm_call, stream_llm_call_async
+
+
+MESSAGES = [{'role': 'user', 'content': 'Tell a story'}]
+TOKENS = ["Once ", "upon ", "a ", "time."]
+USAGE = SimpleNamespace(prompt_tokens=30, completion_tokens=4, total_tokens=34)
+
+
+def _chunks(usage):
+    chunks = [
+        SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))], x_groq=None)
+        for token in TOKENS
+    ]
+    # Groq reports usage on the final chunk, which carries no content
+    chunks.append(SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=usage)))
+    return chunks
+
+
+class FakeStreamClient:
+    
+    def __init__(self, usage=USAGE):
+        self.chat = SimpleNamespace(completions=self)
+        self.usage = usage
+        self.calls = []
+    
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return iter(_chunks(self.usage))
+
+
+class FakeAsyncStreamClient(FakeStreamClient):
+    
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+    
+        async def stream():
+            for chunk in _chunks(self.usage):
+                yield chunk
+    
+        return stream()
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(utils, 'get_response_cache', lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def limiter(tmp_path, monkeypatch):
+    limiter = RateLimiter(str(tmp_path / "ratelimit.json"), rpm=0, tpm=6000)
+    monkeypatch.setattr(utils, 'get_rate_limiter', lambda: limiter)
+    return limiter
+
+
+def _remaining_tokens(limiter):
+    with open(limiter.state_path) as f:
+        return json.load(f)['m']['tokens']
+
+
+class TestStreamLLMCall:
+    
+    def test_streams_tokens_and_reports_usage(self, cache, limiter):
+        client, seen = FakeStreamClient(), []
+        with track_run(RunMetrics()) as run:
+            content, stats = stream_llm_call(client, 'm', MESSAGES, 0.7, on_token=seen.append)
+    
+        assert content == "Once upon a time."
+        assert seen == TOKENS
+        assert client.calls[0]['stream'] is True
+        assert stats['cached'] is False
+        assert stats['completion_tokens'] == 4
+        assert run.usage()['prompt_tokens'] == 30
+    
+    def test_settles_budget_with_reported_usage(self, cache, limiter):
+        stream_llm_call(FakeStreamClient(), 'm', MESSAGES, 0.7, max_tokens=500)
+        # The reservation covered the estimate; only the 34 reported tokens stay spent
+        assert _remaining_tokens(limiter) == pytest.approx(6000 - 34, abs=1)
+    
+    def test_cache_hit_skips_request(self, cache, limiter):
+        client = FakeStreamClient()
+        stream_llm_call(client, 'm', MESSAGES, 0.7)
+    
+        seen = []
+        with track_run(RunMetrics()) as run:
+            content, stats = stream_llm_call(client, 'm', MESSAGES, 0.7, on_token=seen.append)
+    
+        assert content == "Once upon a time."
+        assert seen == ["Once upon a time."]
+        assert stats['cached'] is True
+        assert len(client.calls) == 1
+        assert run.cache_stats() == {'hits': 1, 'misses': 0}
+
+
+class TestStreamLLMCallAsync:
+    
+    def test_streams_tokens_and_settles_budget(self, cache, limiter):
+        client, seen = FakeAsyncStreamClient(), []
+        content, stats = asyncio.run(
+            stream_llm_call_async(client, 'm', MESSAGES, 0.7, max_tokens=500, on_token=seen.append)
+        )
+    
+        assert content == "Once upon a time."
+        assert seen == TOKENS
+        assert stats['completion_tokens'] == 4
+        assert _remaining_tokens(limiter) == pytest.approx(6000 - 34, abs=1)
+    
+    def test_cache_hit_skips_request(self, cache, limiter):
+        client = FakeAsyncStreamClient()
+        asyncio.run(stream_llm_call_async(client, 'm', MESSAGES, 0.7))
+        content, stats = asyncio.run(stream_llm_call_async(client, 'm', MESSAGES, 0.7))
+    
+        assert content == "Once upon a time."
+        assert stats['cached'] is True
+        assert len(client.calls) == 1
+    
+    def test_usage_falls_back_to_token_count(self, cache, limiter):
+        _, stats = asyncio.run(stream_llm_call_async(FakeAsyncStreamClient(usage=None), 'm', MESSAGES, 0.7))
+    
+        assert stats['completion_tokens'] == len(TOKENS)
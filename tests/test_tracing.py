@@ -0,0 +1,90 @@
+import asyncio
+import json
+import pytest
+import sys
+sys.path.insert(0, '.')
+
+from pipeline import tracing
+from pipeline.tracing import configure_tracing, span, traced, to_chrome_trace
+
+
+@pytest.fixture
+def trace_path(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    configure_tracing(path)
+    yield path
+    configure_tracing(None)
+
+
+def read_spans(path: str) -> dict:
+    with open(path) as f:
+        events = [json.loads(line) for line in f]
+    return {event['name']: event for event in events if event['ph'] == 'X'}
+
+
+class TestTracing:
+    
+    def test_disabled_spans_are_noops(self, tmp_path):
+        configure_tracing(None)
+        with span("stage", cat="stage", x=1) as s:
+            s.set(y=2)
+        assert s is tracing._NOOP_SPAN
+    
+    def test_nested_spans(self, trace_path):
+        with span("run_pipeline", source="Hamlet"):
+            with span("world_definition", cat="stage") as inner:
+                inner.set(tokens=10)
+        
+        spans = read_spans(trace_path)
+        outer, inner = spans['run_pipeline'], spans['world_definition']
+        assert inner['args']['parent'] == outer['args']['id']
+        assert inner['args']['tokens'] == 10
+        assert outer['ts'] <= inner['ts']
+        assert inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+    
+    def test_error_recorded(self, trace_path):
+        with pytest.raises(ValueError):
+            with span("parse"):
+                raise ValueError("bad")
+        assert read_spans(trace_path)['parse']['args']['error'] == 'ValueError'
+    
+    def test_concurrent_tasks_get_separate_lanes(self, trace_path):
+        @traced(cat="llm")
+        async def call(delay):
+            await asyncio.sleep(delay)
+        
+        async def run():
+            await asyncio.gather(
+                asyncio.create_task(call(0.01), name="a"),
+                asyncio.create_task(call(0.01), name="b")
+            )
+        
+        asyncio.run(run())
+        with open(trace_path) as f:
+            events = [json.loads(line) for line in f]
+        lanes = {event['tid'] for event in events if event['ph'] == 'X'}
+        assert len(lanes) == 2
+        assert {e['args']['name'] for e in events if e['ph'] == 'M'} == {"a", "b"}
+    
+    def test_finished_tasks_release_their_lanes(self, trace_path):
+        @traced(cat="llm")
+        async def call():
+            await asyncio.sleep(0)
+        
+        async def run():
+            for _ in range(20):
+                await asyncio.create_task(call())
+        
+        asyncio.run(run())
+        assert len(tracing._tracer._lanes) == 0
+        with open(trace_path) as f:
+            events = [json.loads(line) for line in f]
+        assert len({event['tid'] for event in events if event['ph'] == 'X'}) == 20
+    
+    def test_to_chrome_trace(self, trace_path, tmp_path):
+        with span("run_pipeline"):
+            pass
+        output = str(tmp_path / "trace.json")
+        to_chrome_trace(trace_path, output)
+        with open(output) as f:
+            assert json.load(f)['traceEvents'][-1]['name'] == 'run_pipeline'
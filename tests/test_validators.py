@@ -5,7 +5,11 @@ sys.path.insert(0, '.')
 from pipeline.plot_reconstruction import validate_cause_effect_chain
 from pipeline.consistency_check import calculate_overall_score
 from pipeline.character_transform import calculate_preservation_score
-from pipeline.schemas import validate_world_definition, validate_character_transformation
+from pipeline.schemas import (
+    validate_world_definition,
+    validate_character_transformation,
+    validate_transformed_character
+)
 
 
 class TestValidateCauseEffectChain:
@@ -304,3 +308,34 @@ class TestValidateCharacterTransformation:
         valid, result, error = validate_character_transformation(chars)
         assert valid is False
         assert 'At least 2 characters' in error
+
+
+class TestValidateTransformedCharacter:
+    """Tests for single-character validation used by Stage 3 fan-out."""
+    
+    def test_valid_character(self):
+        char = {
+            'original_name': 'Romeo',
+            'new_name': 'Rohan',
+            'new_identity': 'Tech entrepreneur',
+            'occupation_or_role': 'Startup founder',
+            'preserved_motivation': 'Love conquers all',
+            'preserved_flaw': 'Impulsive decisions',
+            'world_specific_traits': ['Tech-savvy']
+        }
+        valid, result, error = validate_transformed_character(char)
+        assert valid is True
+        assert result['key_relationships'] == []
+    
+    def test_missing_flaw(self):
+        char = {
+            'original_name': 'Romeo',
+            'new_name': 'Rohan',
+            'new_identity': 'Engineer',
+            'occupation_or_role': 'Dev',
+            'preserved_motivation': 'Love',
+            'world_specific_traits': ['Smart']
+        }
+        valid, result, error = validate_transformed_character(char)
+        assert valid is False
+        assert 'preserved_flaw' in error